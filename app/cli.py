@@ -0,0 +1,326 @@
+import argparse
+import fnmatch
+import json
+import sys
+import time
+
+from app.data.executor_config import default_worker_count, default_shots_per_session, job_timeout, \
+    no_output_timeout, max_retries, journal_path, spool_poll_interval, spool_heartbeat_interval, spool_lease_timeout, \
+    staging_root, prefetch_depth
+from app.data.project import division_list
+from app.services.blend_cache import BlendCache
+from app.services.csv_manager import CSVManager
+from app.services.file_manager import FileManager
+from app.services.fingerprint import ShotFingerprint
+from app.services.job_journal import JobJournal
+from app.services.path_template import PathLayout
+from app.services.shot_builder import ShotBuilder
+from app.services.shot_executor import ShotExecutor
+from app.services.shot_job import ShotResult
+from app.services.shot_tree import ShotTree
+from app.services.spool_queue import SpoolQueue, SpoolWorker
+
+
+def log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def match_shot(patterns: list[str], shot_file: str, ep: str, seq: str, shot: str) -> bool:
+    if not patterns:
+        return True
+    keys = (shot_file, f"{ep}_{seq}_{shot}")
+    return any(fnmatch.fnmatch(key, pattern.lower()) for pattern in patterns for key in keys)
+
+
+def find_project(args) -> list | None:
+    project_data = ShotBuilder.find_project(args.project)
+    if not project_data:
+        log(f"Unknown project: {args.project}")
+        return None
+    if not FileManager().combine_paths(args.mastershot).exists():
+        log(f"Mastershot file not found: {args.mastershot}")
+        return None
+    return project_data
+
+
+def collect_jobs(args, project_data: list) -> tuple[list, list[ShotResult]] | None:
+    # Returns (jobs to build, skipped results) or None when the run has to be aborted
+    records = []
+    errors = []
+    shot_name = PathLayout.of(project_data).shot_names[division_list[1][0]].render
+    for record in CSVManager.cached_records(file_path=args.csv, errors=errors):
+        if match_shot(args.shots, shot_name(ep=record.ep, seq=record.seq, shot=record.shot), record.ep, record.seq,
+                      record.shot):
+            records.append(record)
+    jobs = ShotBuilder.build_jobs(project_data=project_data, master_file=args.mastershot, records=records)
+    if errors:
+        log(CSVManager.format_errors(args.csv, errors))
+        return None
+
+    # The shot tree index answers the existence checks, only the folders of these shots are checked again
+    shot_tree = ShotTree(project_data[0])
+    loaded = shot_tree.load()
+    if args.refresh_index:
+        checked, listed = shot_tree.refresh()
+        log(f"Shot tree index refreshed: {checked} folders checked, {listed} listed")
+    elif loaded:
+        shot_tree.refresh_shots(ShotBuilder.shot_folders(jobs))
+    FileManager.use_shot_tree(shot_tree)
+
+    jobs, missing = ShotBuilder.split_missing(jobs)
+    if missing and args.missing == "abort":
+        for job in missing:
+            log(f"Animation file not found: {job.animation_file}")
+        return None
+    skipped = [ShotResult(shot_file=job.shot_file, success=False, message="Animation file not found", skipped=True)
+               for job in missing]
+
+    jobs, up_to_date = ShotFingerprint.split_up_to_date(jobs, force=args.force, content_hash=args.content_hash)
+    skipped.extend(ShotResult(shot_file=job.shot_file, success=False, message="Up to date", skipped=True)
+                   for job in up_to_date)
+    return jobs, skipped
+
+
+def build(args) -> int:
+    project_data = find_project(args)
+    if not project_data:
+        return 2
+
+    journal = JobJournal(args.journal)
+    if args.dry_run:
+        return dry_run(args, project_data, journal)
+
+    label = JobJournal.run_label(project_data[2], args.csv, args.mastershot)
+    run_id = journal.unfinished_run(label) if args.resume else None
+    if run_id is not None:
+        jobs, completed = journal.resume_jobs(run_id)
+        log(f"Resuming run {run_id}: {completed} shot(s) already done, {len(jobs)} to go")
+        return execute(args, project_data, jobs, [], journal, run_id)
+
+    collected = collect_jobs(args, project_data)
+    if collected is None:
+        return 2
+    jobs, skipped = collected
+    return execute(args, project_data, jobs, skipped, journal, journal.start_run(label, jobs))
+
+
+def create_executor(args, journal: JobJournal) -> ShotExecutor:
+    return ShotExecutor(blender_path=args.blender, max_workers=args.workers,
+                        shots_per_session=args.shots_per_session, persistent=args.persistent,
+                        log_dir=args.log_dir, job_timeout=args.timeout, no_output_timeout=args.no_output_timeout,
+                        max_retries=args.retries, journal=journal, memory_limit=memory_limit(args),
+                        longest_first=args.order == "longest", staging_dir=args.staging,
+                        blend_cache=BlendCache() if args.blend_cache else None, prefetch_depth=args.prefetch)
+
+
+def dry_run(args, project_data: list, journal: JobJournal) -> int:
+    collected = collect_jobs(args, project_data)
+    if collected is None:
+        return 2
+    jobs, skipped = collected
+    executor = create_executor(args, journal)
+    schedule = executor.plan(jobs)
+    journal.close()
+
+    for session in schedule:
+        names = ", ".join(job.shot_file for job in session["jobs"])
+        log(f"slot {session['slot']}: {session['start']:8.1f}s - {session['end']:8.1f}s  {names}")
+    print(json.dumps({
+        "project": project_data[1],
+        "workers": executor.max_workers,
+        "order": args.order,
+        "cost_model": dict(zip(["base_seconds", "seconds_per_mb", "seconds_per_frame"],
+                               executor.cost_model.coefficients)),
+        "predicted_duration": round(max((session["end"] for session in schedule), default=0.0), 3),
+        "sessions": [
+            {
+                "slot": session["slot"],
+                "start": round(session["start"], 3),
+                "end": round(session["end"], 3),
+                "shots": [{"shot_file": job.shot_file, "estimate": round(executor.estimate_cost(job), 3)}
+                          for job in session["jobs"]],
+            }
+            for session in schedule
+        ],
+        "skipped": [{"shot_file": r.shot_file, "message": r.message} for r in skipped],
+    }, indent=2))
+    return 0
+
+
+def execute(args, project_data: list, jobs: list, results: list[ShotResult], journal: JobJournal, run_id: int) -> int:
+    start_time = time.monotonic()
+    executor = create_executor(args, journal)
+    try:
+        results.extend(executor.run(jobs, on_log=log, run_id=run_id))
+    except KeyboardInterrupt:
+        executor.cancel()
+        return 130
+    finally:
+        executor.shutdown()
+        journal.close()
+    return print_summary(project_data, results, start_time, run_id=run_id, log_dir=executor.last_log_dir)
+
+
+def print_summary(project_data: list, results: list[ShotResult], start_time: float, **extra) -> int:
+    summary = {
+        "project": project_data[1],
+        **extra,
+        "total": len(results),
+        "succeeded": sum(1 for r in results if r.success),
+        "failed": sum(1 for r in results if not r.success and not r.skipped),
+        "skipped": sum(1 for r in results if r.skipped),
+        "duration": round(time.monotonic() - start_time, 3),
+        "shots": [
+            {
+                "shot_file": r.shot_file,
+                "success": r.success,
+                "skipped": r.skipped,
+                "return_code": r.return_code,
+                "attempts": r.attempts,
+                "failure_class": r.failure_class,
+                "duration": round(r.duration, 3),
+                "message": r.message,
+                "timings": r.timings,
+                "counters": r.counters,
+                "log_file": r.log_file,
+                "peak_memory": r.peak_memory,
+                "open_link_time": round(r.open_link_time, 3),
+                "prefetched": r.prefetched,
+            }
+            for r in results
+        ],
+    }
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["failed"] == 0 else 1
+
+
+def spool_submit(args) -> int:
+    project_data = find_project(args)
+    if not project_data:
+        return 2
+    collected = collect_jobs(args, project_data)
+    if collected is None:
+        return 2
+    jobs, results = collected
+
+    start_time = time.monotonic()
+    queue = SpoolQueue(args.spool)
+    names = queue.submit(jobs)
+    log(f"Submitted {len(names)} shot(s) to {args.spool}")
+    if not args.wait:
+        print(json.dumps({"project": project_data[1], "spool": args.spool, "submitted": names,
+                          "skipped": [r.shot_file for r in results]}, indent=2))
+        return 0
+
+    def on_result(result: ShotResult):
+        log(f"{result.shot_file}: {'OK' if result.success else 'FAILED ' + result.message}")
+
+    results.extend(queue.wait(names, on_result=on_result, timeout=args.wait_timeout))
+    finished = {r.shot_file for r in results}
+    results.extend(ShotResult(shot_file=job.shot_file, success=False, message="No result before the wait timeout")
+                   for job in jobs if job.shot_file not in finished)
+    return print_summary(project_data, results, start_time, spool=args.spool)
+
+
+def spool_worker(args) -> int:
+    executor = create_executor(args, JobJournal(args.journal))
+    worker = SpoolWorker(SpoolQueue(args.spool), executor, lease_timeout=args.lease_timeout,
+                         heartbeat_interval=args.heartbeat_interval, poll_interval=args.poll_interval)
+    log(f"Spool worker {worker.worker} watching {args.spool}")
+    try:
+        results = worker.run(idle_exit=args.idle_exit)
+    except KeyboardInterrupt:
+        worker.stop()
+        return 130
+    finally:
+        executor.shutdown()
+        executor.journal.close()
+    log(f"Spool worker {worker.worker} built {sum(1 for r in results if r.success)} of {len(results)} shot(s)")
+    return 0 if all(r.success or r.skipped for r in results) else 1
+
+
+def memory_limit(args) -> int | None:
+    return int(args.memory_limit * 1024 ** 3) if args.memory_limit else None
+
+
+def add_job_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--project", required=True, help="Project name, code or drive letter")
+    parser.add_argument("--csv", required=True, help="Shot CSV (EP, SEQ, SHOT, START_FRAME, END_FRAME)")
+    parser.add_argument("--mastershot", required=True, help="Mastershot .blend file")
+    parser.add_argument("--shots", nargs="*", default=[],
+                        help="Shot filter patterns, e.g. 'ep001_seq0010_*' or '*_sh0020_lgt.blend'")
+    parser.add_argument("--force", action="store_true", help="Rebuild shots even when they are up to date")
+    parser.add_argument("--content-hash", action="store_true",
+                        help="Include a content hash of the mastershot and animation files in the fingerprint")
+    parser.add_argument("--missing", choices=["skip", "abort"], default="skip",
+                        help="What to do when an animation file is missing")
+    parser.add_argument("--refresh-index", action="store_true",
+                        help="Crawl the project's shot folders and refresh the local shot tree index first")
+
+
+def add_executor_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--blender", required=True, help="Blender executable")
+    parser.add_argument("--workers", type=int, default=default_worker_count)
+    parser.add_argument("--shots-per-session", type=int, default=default_shots_per_session)
+    parser.add_argument("--persistent", action="store_true",
+                        help="Feed shots to long-lived Blender workers over stdin")
+    parser.add_argument("--log-dir", help="Folder for the per-shot .log.gz files")
+    parser.add_argument("--timeout", type=float, default=job_timeout, help="Wall-clock seconds per shot")
+    parser.add_argument("--no-output-timeout", type=float, default=no_output_timeout,
+                        help="Seconds without Blender output before a shot is killed")
+    parser.add_argument("--retries", type=int, default=max_retries,
+                        help="Retries for transient failures (I/O errors, timeouts, killed)")
+    parser.add_argument("--memory-limit", type=float,
+                        help="GB all Blender processes may use together (default: 85%% of the total memory)")
+    parser.add_argument("--order", choices=["longest", "csv"], default="longest",
+                        help="Dispatch the longest estimated shots first, or keep the CSV order")
+    parser.add_argument("--staging", nargs="?", const=staging_root, metavar="DIR",
+                        help="Save the lighting files to a local folder (default: ~/.shot_builder/staging) and "
+                             "upload them to the mount in the background")
+    parser.add_argument("--blend-cache", action="store_true",
+                        help="Open the mastershot from a local copy kept in ~/.shot_builder/blend_cache")
+    parser.add_argument("--prefetch", type=int, default=prefetch_depth, metavar="SHOTS",
+                        help="Animation files read ahead of the running shots, 0 turns it off")
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Headless Shot Builder")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Generate lighting files from a shot CSV")
+    add_job_arguments(build_parser)
+    add_executor_arguments(build_parser)
+    build_parser.add_argument("--journal", default=journal_path, help="SQLite job journal")
+    build_parser.add_argument("--resume", action="store_true",
+                              help="Continue the latest interrupted run for this project, CSV and mastershot")
+    build_parser.add_argument("--dry-run", action="store_true",
+                              help="Print the predicted schedule without starting Blender")
+    build_parser.set_defaults(func=build)
+
+    submit_parser = subparsers.add_parser("spool-submit", help="Write one job file per shot to a shared spool")
+    add_job_arguments(submit_parser)
+    submit_parser.add_argument("--spool", required=True, help="Spool folder shared by all workers")
+    submit_parser.add_argument("--wait", action="store_true", help="Wait for the results and print a summary")
+    submit_parser.add_argument("--wait-timeout", type=float, help="Give up waiting after this many seconds")
+    submit_parser.set_defaults(func=spool_submit)
+
+    worker_parser = subparsers.add_parser("spool-worker", help="Build shots claimed from a shared spool")
+    worker_parser.add_argument("--spool", required=True, help="Spool folder shared by all workers")
+    add_executor_arguments(worker_parser)
+    worker_parser.add_argument("--journal", default=journal_path,
+                               help="SQLite journal holding the memory and duration history of built shots")
+    worker_parser.add_argument("--lease-timeout", type=float, default=spool_lease_timeout,
+                               help="Seconds without a heartbeat before a claimed shot is given to another worker")
+    worker_parser.add_argument("--heartbeat-interval", type=float, default=spool_heartbeat_interval)
+    worker_parser.add_argument("--poll-interval", type=float, default=spool_poll_interval,
+                               help="Seconds between spool scans")
+    worker_parser.add_argument("--idle-exit", type=float,
+                               help="Exit after the spool stayed empty for this many seconds")
+    worker_parser.set_defaults(func=spool_worker)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import os
+
+# Number of Blender processes running at the same time
+default_worker_count = max(1, (os.cpu_count() or 1) // 2)
+max_worker_count = max(1, os.cpu_count() or 1)
+
+# Number of shots built by one Blender session before it is restarted
+default_shots_per_session = 10
+max_shots_per_session = 100
+
+# What to do when the animation file of a selected shot is missing
+missing_file_policies = ["Skip", "Abort", "Ask Once"]
+
+# Persistent Blender workers (seconds)
+worker_start_timeout = 300
+worker_health_interval = 30
+worker_health_timeout = 15
+
+# Per-shot Blender logs, one sub folder per run
+log_root = os.path.join(os.path.expanduser("~"), ".shot_builder", "logs")
+# Tags printed by the generated scripts that are counted per shot
+log_counter_tags = ["OK", "INFO", "WARNING", "ERROR"]
+
+# Watchdog (seconds), a shot is killed when it runs too long or Blender stops printing
+job_timeout = 1800
+no_output_timeout = 600
+
+# Transient failures are retried with an exponential backoff
+max_retries = 2
+retry_backoff = 10
+transient_failure_patterns = [
+    "Input/output error",
+    "I/O error",
+    "Errno 5",
+    "Stale file handle",
+    "Resource temporarily unavailable",
+    "Connection timed out",
+    "Timed out",
+    "Killed",
+    "Cannot allocate memory",
+]
+
+# Resource aware scheduling, a shot starts only while the predicted memory of all Blenders fits under the limit
+memory_limit_fraction = 0.85  # of the total memory, when no limit is given
+default_shot_memory = 4 * 1024 ** 3  # bytes assumed for a shot that was never built
+cpu_limit = 1.0  # fraction of all cores the Blender processes may keep busy
+resource_sample_interval = 1.0
+# Pages swapped in or out per second that count as swapping, no new shot starts for swap_backoff seconds
+swap_pages_per_second = 256
+swap_backoff = 30
+
+# Cost model for longest-job-first dispatch, seconds = base + per_mb * animation size + per_frame * frames,
+# refitted from the journal once enough shots were built
+cost_base_seconds = 20.0
+cost_seconds_per_mb = 0.5
+cost_seconds_per_frame = 0.05
+cost_min_history = 5
+
+# Job journal used to resume interrupted runs
+journal_path = os.path.join(os.path.expanduser("~"), ".shot_builder", "journal.sqlite")
+
+# Parsed shot CSVs, reused while the CSV keeps its size and mtime (also read by the Blender scripts)
+shot_cache_path = os.path.join(os.path.expanduser("~"), ".shot_builder", "shot_cache.sqlite")
+
+# Spool directory shared between hosts (seconds), a claimed job whose lease is not refreshed goes back to pending
+spool_poll_interval = 5
+spool_heartbeat_interval = 60
+spool_lease_timeout = 300
+
+# Threads creating the lighting folders of a run, each folder costs a few round trips on network drives
+directory_workers = 16
+
+# Shot status sweep after a scan, stat results are reused for stat_cache_ttl seconds
+status_workers = 16
+stat_cache_ttl = 10.0
+
+# Local index of the animation and lighting shot folders, one file per project drive
+shot_tree_path = os.path.join(os.path.expanduser("~"), ".shot_builder", "shot_tree_{drive}.sqlite")
+shot_tree_extensions = (".blend",)  # files indexed inside the shot folders
+
+# Local staging, Blender saves the lighting file to a local folder and moves on to the next shot, upload threads
+# copy it to the mount, check size and checksum and rename it into place
+staging_root = os.path.join(os.path.expanduser("~"), ".shot_builder", "staging")
+upload_workers = 4
+upload_bandwidth = 0  # bytes per second shared by all uploads, 0 for no limit
+upload_chunk_size = 8 * 1024 * 1024
+
+# Local read-through cache of mastershot files, keyed by path, size and mtime and stored by content hash.
+# The least recently used copies are removed once the cache grows over the budget
+blend_cache_root = os.path.join(os.path.expanduser("~"), ".shot_builder", "blend_cache")
+blend_cache_budget = 20 * 1024 ** 3  # bytes
+
+# Read-ahead of the animation files of the next shots while the current ones build. Files read ahead and not yet
+# opened by Blender stay under prefetch_budget, 0 shots ahead turns it off
+prefetch_depth = 4
+prefetch_budget = 2 * 1024 ** 3  # bytes
+prefetch_workers = 2
@@ -8,3 +8,24 @@ division_list = [
     ["anm", "Animation", "02_production", "03_animation"],
     ["lgt", "Lighting", "03_post_production", "01_lighting"]
 ]
+
+# Path templates of every project. Fields come from project_list (drive, output_drive, code), division_list
+# (division, phase, folder) and the shot (ep, seq, shot, layer, extension). {root} and {output_root} are the
+# rendered "root" and "output_root" of the same project
+path_layout = {
+    "root": "/mnt/{drive}",
+    "output_root": "/mnt/{output_drive}",
+    "shot_folder": "{root}/{phase}/{folder}/{ep}/{ep}_{seq}/{ep}_{seq}_{shot}",
+    "shot_file": "{code}_{ep}_{seq}_{shot}_{division}.{extension}",
+    "exr": "{output_root}/{ep}/{ep}_{seq}/{ep}_{seq}_{shot}/exr/{layer}/{code}_{ep}_{seq}_{shot}_{layer}_####.exr",
+}
+
+# Project code -> templates that replace the ones of path_layout for that project
+project_path_layouts = {}
+
+# Regex of a field when a path is parsed back, the other fields match one name part without "/" or "_"
+path_field_patterns = {
+    "phase": r"[^/]+",
+    "folder": r"[^/]+",
+    "layer": r"[^/]+",
+}
@@ -15,44 +15,50 @@ import re
 # -----------------------------
 # Helpers: parse & path build
 # -----------------------------
-def parse_ep_sq_sh_from_blendname(name_noext: str):
-    m = re.search(r"(ep\d+).*?(sq\d+).*?(sh\d+)", name_noext, re.IGNORECASE)
-    if not m:
-        return ("ep000", "sq00", "sh0000")
-    ep, sq, sh = m.groups()
-    return ep.lower(), sq.lower(), sh.lower()
-
-def drive_letter_prefix(name_noext: str):
-    n = name_noext.lower()
-    if n.startswith("jgt"):
-        return "K"
-    if n.startswith("rmb"):
-        return "O"
-    return "K"  # fallback
-
-def prefix_title(name_noext: str):
-    n = name_noext.lower()
-    if n.startswith("jgt"):
-        return "jgt"
-    if n.startswith("rmb"):
-        return "rmb"
-    return ""  # fallback
+# Tabel path per project, sama dengan yang ditanam Shot Builder di script Blender-nya.
+# Dibuat dari app/data/project.py: print(pformat(PathLayout.script_tables(), width=120))
+PATH_TABLES = {'jgt': {'exr': ('/mnt/K/{ep}/{ep}_{seq}/{ep}_{seq}_{shot}/exr/{layer}/jgt_{ep}_{seq}_{shot}_{layer}_####.exr',
+                 '/mnt/K/(?P<ep>[^/_]+)/(?P=ep)_(?P<seq>[^/_]+)/(?P=ep)_(?P=seq)_(?P<shot>[^/_]+)/exr/(?P<layer>[^/]+)/jgt_(?P=ep)_(?P=seq)_(?P=shot)_(?P=layer)_\\#\\#\\#\\#\\.exr'),
+         'shot_file': ('jgt_{ep}_{seq}_{shot}_{division}.{extension}',
+                       'jgt_(?P<ep>[^/_]+)_(?P<seq>[^/_]+)_(?P<shot>[^/_]+)_(?P<division>[^/_]+)\\.(?P<extension>[^/_]+)'),
+         'shot_file_path': ('/mnt/J/{phase}/{folder}/{ep}/{ep}_{seq}/{ep}_{seq}_{shot}/jgt_{ep}_{seq}_{shot}_{division}.{extension}',
+                            '/mnt/J/(?P<phase>[^/]+)/(?P<folder>[^/]+)/(?P<ep>[^/_]+)/(?P=ep)_(?P<seq>[^/_]+)/(?P=ep)_(?P=seq)_(?P<shot>[^/_]+)/jgt_(?P=ep)_(?P=seq)_(?P=shot)_(?P<division>[^/_]+)\\.(?P<extension>[^/_]+)'),
+         'shot_name': ('jgt_{ep}_{seq}_{shot}', 'jgt_(?P<ep>[^/_]+)_(?P<seq>[^/_]+)_(?P<shot>[^/_]+)')},
+ 'rmb': {'exr': ('/mnt/O/{ep}/{ep}_{seq}/{ep}_{seq}_{shot}/exr/{layer}/rmb_{ep}_{seq}_{shot}_{layer}_####.exr',
+                 '/mnt/O/(?P<ep>[^/_]+)/(?P=ep)_(?P<seq>[^/_]+)/(?P=ep)_(?P=seq)_(?P<shot>[^/_]+)/exr/(?P<layer>[^/]+)/rmb_(?P=ep)_(?P=seq)_(?P=shot)_(?P=layer)_\\#\\#\\#\\#\\.exr'),
+         'shot_file': ('rmb_{ep}_{seq}_{shot}_{division}.{extension}',
+                       'rmb_(?P<ep>[^/_]+)_(?P<seq>[^/_]+)_(?P<shot>[^/_]+)_(?P<division>[^/_]+)\\.(?P<extension>[^/_]+)'),
+         'shot_file_path': ('/mnt/R/{phase}/{folder}/{ep}/{ep}_{seq}/{ep}_{seq}_{shot}/rmb_{ep}_{seq}_{shot}_{division}.{extension}',
+                            '/mnt/R/(?P<phase>[^/]+)/(?P<folder>[^/]+)/(?P<ep>[^/_]+)/(?P=ep)_(?P<seq>[^/_]+)/(?P=ep)_(?P=seq)_(?P<shot>[^/_]+)/rmb_(?P=ep)_(?P=seq)_(?P=shot)_(?P<division>[^/_]+)\\.(?P<extension>[^/_]+)'),
+         'shot_name': ('rmb_{ep}_{seq}_{shot}', 'rmb_(?P<ep>[^/_]+)_(?P<seq>[^/_]+)_(?P<shot>[^/_]+)')}}
+
+def compile_tables(tables: dict):
+    return {code: {name: (template, re.compile(pattern, re.IGNORECASE))
+                   for name, (template, pattern) in table.items()}
+            for code, table in tables.items()}
+
+COMPILED_TABLES = compile_tables(PATH_TABLES)
+
+def parse_shot_path(blend_path: str):
+    # (project code, ep, sq, sh) dari awal nama file, akhiran seperti _lgt_v002 atau _lgt_old diabaikan
+    name_noext = os.path.splitext(os.path.basename(blend_path))[0]
+    for code, table in COMPILED_TABLES.items():
+        m = table["shot_name"][1].search(name_noext)
+        if m:
+            return code, m.group("ep").lower(), m.group("seq").lower(), m.group("shot").lower()
+    return None
 
 def gen_ouput_path(layer_name: str):
     blend_path = bpy.data.filepath
-    name_noext = os.path.splitext(os.path.basename(blend_path))[0] if blend_path else ""
-
-    if not name_noext:
-        drive = "K"
-        ep, sq, sh = "ep000", "sq00", "sh0000"
-        title = ""
-    else:
-        drive = drive_letter_prefix(name_noext)
-        ep, sq, sh = parse_ep_sq_sh_from_blendname(name_noext)
-        title = prefix_title(name_noext)
-
-    # Folder berjenjang + exr + nama layer
-    dir_path = f"/mnt/{drive}/{ep}/{ep}_{sq}/{ep}_{sq}_{sh}/exr/{layer_name}/{title}_{ep}_{sq}_{sh}_{layer_name}_####"
+    parsed = parse_shot_path(blend_path) if blend_path else None
+    if not parsed:
+        # Jangan tebak shot, render ke folder shot palsu lebih susah dilacak daripada error
+        raise ValueError(f"Cannot read project/ep/seq/shot from the file name: {blend_path or 'unsaved file'}")
+    code, ep, sq, sh = parsed
+
+    # Folder berjenjang + exr + nama layer, ekstensi ditambahkan sendiri oleh node File Output
+    template = COMPILED_TABLES[code]["exr"][0]
+    dir_path = os.path.splitext(template.format(ep=ep, seq=sq, shot=sh, layer=layer_name))[0]
     return dir_path
 
 # -----------------------------
@@ -259,6 +265,12 @@ class COMPOSITOR_OT_node_generator(bpy.types.Operator):
 
     def execute(self, context):
         scene = context.scene
+        # Path output dicek dulu, sebelum setting scene diubah
+        try:
+            gen_ouput_path("beauty")
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
         apply_scene_settings(scene)
         build_nodes(scene)
         self.report({'INFO'}, "Prefs applied, nodes generated, paths set")
@@ -3,8 +3,46 @@ import os
 import sys
 import csv
 import re
+import sqlite3
+
+def read_shot_cache(cache_path, csv_file_path, shot_name):
+    # Frame range from the shot cache written by Shot Builder, None when the CSV changed since it was cached
+    # or the shot is not cached (invalid rows are left out of the cache, the CSV scan still sees them)
+    if not cache_path or not os.path.exists(cache_path):
+        return None
+    parts = shot_name.lower().split("_")
+    if len(parts) != 3:
+        return None
+    try:
+        stat = os.stat(csv_file_path)
+        connection = sqlite3.connect(f"file:{cache_path}?mode=ro", uri=True)
+        try:
+            # Primary key lookups, the cached rows are never scanned
+            row = connection.execute("SELECT csv_id FROM csv_files WHERE path = ? AND size = ? AND mtime_ns = ?",
+                                     (os.path.abspath(csv_file_path), stat.st_size, stat.st_mtime_ns)).fetchone()
+            if row is None:
+                return None
+            shot = connection.execute("SELECT start_frame, end_frame FROM shots "
+                                      "WHERE csv_id = ? AND ep = ? AND seq = ? AND shot = ?",
+                                      (row[0], *parts)).fetchone()
+            return shot
+        finally:
+            connection.close()
+    except (OSError, sqlite3.Error) as e:
+        print(f"Shot cache tidak bisa dibaca: {e}")
+        return None
+
+def read_csv_and_set_frame_range(csv_file_path, shot_name, cache_path=None):
+    # Pakai cache dulu, baca CSV hanya kalau cache tidak cocok dengan file CSV
+    cached = read_shot_cache(cache_path, csv_file_path, shot_name)
+    if cached:
+        start_frame, end_frame = cached
+        print(f"Shot '{shot_name}' ditemukan di shot cache dengan start_frame: {start_frame} "
+              f"dan end_frame: {end_frame}")
+        bpy.context.scene.frame_start = start_frame
+        bpy.context.scene.frame_end = end_frame
+        return True
 
-def read_csv_and_set_frame_range(csv_file_path, shot_name):
     # Baca CSV dan cari baris dengan nama shot yang cocok
     with open(csv_file_path, mode='r') as csvfile:
         reader = csv.reader(csvfile)
@@ -22,7 +60,7 @@ def read_csv_and_set_frame_range(csv_file_path, shot_name):
         print(f"Shot '{shot_name}' tidak ditemukan di CSV.")
         return False
 
-def link_and_save(master_file, animation_file, lighting_file, csv_file):
+def link_and_save(master_file, animation_file, lighting_file, csv_file, cache_path=None):
     # Open the master file
     bpy.ops.wm.open_mainfile(filepath=master_file)
     print(master_file)
@@ -117,7 +155,7 @@ def link_and_save(master_file, animation_file, lighting_file, csv_file):
 
     # Baca file CSV dan set frame range berdasarkan shot_name
     if csv_file:
-        if read_csv_and_set_frame_range(csv_file, shot_name):
+        if read_csv_and_set_frame_range(csv_file, shot_name, cache_path):
             print(f"Frame range untuk '{shot_name}' berhasil diatur berdasarkan CSV.")
         else:
             print(f"Frame range untuk shot '{shot_name}' tidak ditemukan di CSV.")
@@ -165,5 +203,9 @@ if __name__ == "__main__":
     animation_file = sys.argv[sys.argv.index('--') + 2]
     lighting_file = sys.argv[sys.argv.index('--') + 3]
     csv_file = sys.argv[sys.argv.index('--') + 4]  # Path CSV dari user
+    # Shot cache opsional, default sama dengan Shot Builder
+    args = sys.argv[sys.argv.index('--') + 1:]
+    cache_path = args[4] if len(args) > 4 else os.path.join(os.path.expanduser("~"), ".shot_builder",
+                                                            "shot_cache.sqlite")
 
-    link_and_save(master_file, animation_file, lighting_file, csv_file)
+    link_and_save(master_file, animation_file, lighting_file, csv_file, cache_path)
@@ -0,0 +1,114 @@
+import threading
+import time
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from app.services.file_manager import FileManager
+from app.services.fingerprint import ShotFingerprint
+from app.services.shot_builder import ShotBuilder
+from app.services.shot_executor import ShotExecutor
+from app.services.shot_job import ShotJob, ShotRecord, ShotResult
+
+
+class GenerateWorkerSignals(QObject):
+    progress = pyqtSignal(int, int, float)  # done, total, eta in seconds (-1 when unknown)
+    result = pyqtSignal(object)
+    log = pyqtSignal(str)
+    missing = pyqtSignal(list)  # jobs without an animation file, answered with resolve_missing
+    finished = pyqtSignal(list)
+
+
+class GenerateWorker(QRunnable):
+    def __init__(self, executor: ShotExecutor, jobs: list[ShotJob] = None, results: list[ShotResult] = None,
+                 run_id: int = None, project_data: list = None, master_file: str = "",
+                 records: list[ShotRecord] = None, label: str = "", ask_missing: bool = False, force: bool = False):
+        # Either the jobs of a resumed run, or the selected records that are turned into jobs before the run
+        super().__init__()
+        self.executor = executor
+        self.executor.reset_cancel()
+        self.jobs = jobs or []
+        self.run_id = run_id
+        self.results = list(results or [])
+        self.project_data = project_data
+        self.master_file = master_file
+        self.records = records
+        self.label = label
+        self.ask_missing = ask_missing
+        self.force = force
+        self.up_to_date = []
+        self.stopped = False  # missing animation files were not accepted, or the shots could not be checked
+        self.cancelled = False
+        self._skip_missing = False
+        self._answered = threading.Event()
+        self.signals = GenerateWorkerSignals()
+
+    def cancel(self):
+        self.cancelled = True
+        self._answered.set()
+        self.executor.cancel()
+
+    def resolve_missing(self, skip: bool):
+        self._skip_missing = skip
+        self._answered.set()
+
+    def prepare(self) -> bool:
+        # Every check here stats the network mount, False when there is nothing to build
+        jobs = ShotBuilder.build_jobs(project_data=self.project_data, master_file=self.master_file,
+                                      records=self.records)
+
+        # The shot tree index may be older than the last scan, the folders of the selected shots are checked again
+        if FileManager.shot_tree is not None and FileManager.shot_tree.drive == self.project_data[0]:
+            FileManager.shot_tree.refresh_shots(ShotBuilder.shot_folders(jobs))
+
+        # Apply the missing animation policy before anything starts
+        jobs, missing = ShotBuilder.split_missing(jobs)
+        if missing and self.ask_missing:
+            self.signals.missing.emit(missing)
+            self._answered.wait()
+            if not self._skip_missing or self.cancelled:
+                self.stopped = True
+                return False
+        self.results.extend(ShotResult(shot_file=job.shot_file, success=False, message="Animation file not found",
+                                       skipped=True) for job in missing)
+
+        # Shots whose inputs did not change since their last build are skipped
+        jobs, self.up_to_date = ShotFingerprint.split_up_to_date(jobs, force=self.force)
+        self.results.extend(ShotResult(shot_file=job.shot_file, success=False, message="Up to date", skipped=True)
+                            for job in self.up_to_date)
+        if not jobs or self.cancelled:
+            return False
+        self.jobs = jobs
+        self.run_id = self.executor.journal.start_run(self.label, jobs)
+        return True
+
+    def run(self):
+        if self.records is not None:
+            try:
+                prepared = self.prepare()
+            except Exception as e:
+                self.signals.log.emit(f"[ERROR] Could not prepare the shots: {e}")
+                self.stopped = True
+                prepared = False
+            if not prepared:
+                self.signals.finished.emit(self.results)
+                return
+
+        total = len(self.jobs)
+        done = 0
+        start_time = time.monotonic()
+
+        def on_result(result: ShotResult):
+            nonlocal done
+            done += 1
+            elapsed = time.monotonic() - start_time
+            eta = elapsed / done * (total - done)
+            self.signals.result.emit(result)
+            self.signals.progress.emit(done, total, eta)
+
+        self.signals.progress.emit(0, total, -1)
+        try:
+            self.results.extend(self.executor.run(self.jobs, on_result=on_result, on_log=self.signals.log.emit,
+                                                  run_id=self.run_id))
+        except Exception as e:
+            self.signals.log.emit(f"[ERROR] Shot generation stopped: {e}")
+        self.signals.finished.emit(self.results)
@@ -1,12 +1,26 @@
-from PyQt6.QtWidgets import QWidget, QFileDialog, QMessageBox, QAbstractItemView
+import os
+
+from PyQt6.QtCore import QThreadPool, QTimer, QFileSystemWatcher, QItemSelectionModel
+from PyQt6.QtWidgets import QWidget, QFileDialog, QMessageBox, QListView
+
+from app.modules.main.generate_worker import GenerateWorker
+from app.modules.main.shot_list_model import ShotListModel, ShotFilterProxyModel
+from app.modules.main.status_worker import StatusWorker
 
-from app.services.execute_program import ExecuteProgram
 from app.ui.shot_generator_widget_ui import Ui_Form
-from app.data.project import project_list, division_list
-from app.data.blender_config import collection_list, camera_collection_name
+from app.data.project import project_list
+from app.data.executor_config import default_worker_count, max_worker_count, default_shots_per_session, \
+    max_shots_per_session, missing_file_policies, staging_root
+from app.services.blend_cache import BlendCache
 from app.services.csv_manager import CSVManager
 from app.services.file_manager import FileManager
-from app.services.blender_settings import BlenderSettings
+from app.services.job_journal import JobJournal
+from app.services.shot_executor import ShotExecutor
+from app.services.shot_index import ShotIndex
+from app.services.shot_query import ShotQuery
+from app.services.shot_job import ShotResult
+from app.services.shot_status import StatCache, STATUS_UP_TO_DATE
+from app.services.shot_tree import ShotTree
 
 
 class ShotGeneratorHandler(QWidget):
@@ -21,16 +35,54 @@ class ShotGeneratorHandler(QWidget):
             lambda: self.on_select_file("mastershot", "Select Mastershot File"))
         for project in project_list:
             self.ui.comboBox_project.addItem(project[1])
-        self.ui.listWidget_available.setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
-        self.ui.listWidget_available.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
-        self.ui.listWidget_selected.setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
-        self.ui.listWidget_selected.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        # Both lists are views over shot models, the proxies sort and filter without touching the models
+        self.available_model = ShotListModel(self)
+        self.selected_model = ShotListModel(self)
+        self.available_proxy = ShotFilterProxyModel(self)
+        self.available_proxy.setSourceModel(self.available_model)
+        self.selected_proxy = ShotFilterProxyModel(self)
+        self.selected_proxy.setSourceModel(self.selected_model)
+        self.ui.listView_available.setModel(self.available_proxy)
+        self.ui.listView_selected.setModel(self.selected_proxy)
+        # The filter runs shortly after the user stops typing
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(150)
+        self.filter_timer.timeout.connect(self.on_filter)
+        self.ui.lineEdit_filter.textChanged.connect(self.filter_timer.start)
         self.ui.pushButton_listControl_add.clicked.connect(self.on_move_available_item)
         self.ui.pushButton_listControl_remove.clicked.connect(self.on_move_selected_item)
         self.ui.pushButton_generate.clicked.connect(self.on_generate)
         self.ui.pushButton_generate_clear.clicked.connect(self.on_clear)
+        self.ui.spinBox_workers.setMaximum(max_worker_count)
+        self.ui.spinBox_workers.setValue(default_worker_count)
+        self.ui.spinBox_session.setMaximum(max_shots_per_session)
+        self.ui.spinBox_session.setValue(default_shots_per_session)
+        self.ui.comboBox_missing.addItems(missing_file_policies)
+        self.ui.pushButton_generate_cancel.clicked.connect(self.on_cancel)
+        # The scanned CSV is read again shortly after it stops changing, editors write it in several steps
+        self.csv_watcher = QFileSystemWatcher(self)
+        self.csv_timer = QTimer(self)
+        self.csv_timer.setSingleShot(True)
+        self.csv_timer.setInterval(500)
+        self.csv_watcher.fileChanged.connect(self.csv_timer.start)
+        self.csv_timer.timeout.connect(self.on_csv_changed)
+        self.ui.checkBox_watch.toggled.connect(self.update_watch)
 
-        self.csv_data = None
+        self.shot_index = None
+        self.shot_query = None
+        self.watched_csv = None
+        self.changed_shots = {}  # lighting file name -> frame range before the CSV changed, until regenerated
+        # Status badges are filled in by a background sweep, the stat cache spares the network drives on rescans
+        self.stat_cache = StatCache()
+        self.shot_statuses = {}
+        self.status_worker = None
+        self.status_sweep = 0
+        for model in (self.available_model, self.selected_model):
+            model.set_statuses(self.shot_statuses)
+        self.worker = None
+        self.executor = None
+        self.journal = JobJournal()
 
     def on_scan_files(self):
         project_data = next((p for p in project_list if p[1] == self.ui.comboBox_project.currentText()), None)
@@ -38,28 +90,173 @@ class ShotGeneratorHandler(QWidget):
             QMessageBox.warning(self, "Error", "No project selected")
             return
 
-        self.ui.listWidget_available.clear()
+        self.available_model.set_shots([])
 
         csv_path = self.ui.lineEdit_csv.text()
         if not csv_path:
             QMessageBox.warning(self, "Error", "CSV path is empty")
             return
 
-        # Read CSV file
-        csv_data = CSVManager().read(file_path=csv_path, skip_header=True)
-        self.csv_data = csv_data
-        for row in csv_data:
-            # Expecting CSV format: EP, SEQ, SHOT, START_FRAME, END_FRAME
-            ep, seq, shot, start_frame, end_frame = row[0].lower(), row[1].lower(), row[2].lower(), int(row[3]), int(
-                row[4])
-            # print(
-            #     f"Scanning for EP: {ep}, SEQ: {seq}, SHOT: {shot}, Frames: {start_frame}-{end_frame} in project path: {project_path}")
-
-            file_name = FileManager().generate_file_name(project_code=project_data[2], ep=ep, seq=seq, shot=shot,
-                                                         division=division_list[1][0],
-                                                         extension="blend")  # Assuming 'lgt' division (target)
-            # print(f"File name: {file_name}")
-            self.ui.listWidget_available.addItem(file_name)
+        # Read and validate the CSV file once
+        errors = []
+        try:
+            records = list(CSVManager.cached_records(file_path=csv_path, errors=errors))
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not read CSV file: {e}")
+            return
+        if errors:
+            reply = QMessageBox.question(
+                self,
+                "Invalid CSV Rows",
+                f"{CSVManager.format_errors(csv_path, errors)}\n\n"
+                f"Do you want to continue with the {len(records)} valid shot(s)?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.No:
+                self.shot_index = None
+                self.shot_query = None
+                self.on_filter()
+                return
+
+        # Lighting file names ('lgt' division, target) are generated once and shared with on_generate
+        shot_index = ShotIndex(project_data[2], records)
+        if self.shot_index and self.shot_index.project_code == shot_index.project_code:
+            self.flag_changed(self.shot_index, shot_index)
+        else:
+            self.changed_shots = {}
+        self.shot_index = shot_index
+        selected = set(self.selected_model.shots())
+        self.available_model.set_shots([name for name in self.shot_index.file_names() if name not in selected],
+                                       self.shot_index)
+        self.selected_model.set_shots([name for name in self.selected_model.shots() if self.shot_index.get(name)],
+                                      self.shot_index)
+        for model in (self.available_model, self.selected_model):
+            model.set_changed(self.changed_shots)
+        self.shot_query = ShotQuery(self.shot_index)
+        self.on_filter()
+        self.watched_csv = csv_path
+        self.update_watch()
+        self.shot_statuses.clear()
+        self.start_status_sweep(project_data, records)
+
+    def start_status_sweep(self, project_data: list, records: list):
+        self.stop_status_sweep()
+        if not records:
+            return
+        if FileManager.shot_tree is None or FileManager.shot_tree.drive != project_data[0]:
+            FileManager.use_shot_tree(ShotTree(project_data[0]))
+        self.status_worker = StatusWorker(sweep_id=self.status_sweep, project_data=project_data,
+                                          master_file=self.ui.lineEdit_mastershot.text(), records=records,
+                                          stat_cache=self.stat_cache, shot_tree=FileManager.shot_tree)
+        self.status_worker.signals.statuses.connect(self.on_statuses)
+        self.status_worker.signals.log.connect(self.ui.plainTextEdit_log.appendPlainText)
+        self.status_worker.signals.finished.connect(self.on_status_finished)
+        QThreadPool.globalInstance().start(self.status_worker)
+
+    def stop_status_sweep(self):
+        # Batches of an older sweep that are still queued are recognized by their sweep id and dropped
+        self.status_sweep += 1
+        if self.status_worker:
+            self.status_worker.cancel()
+            self.status_worker = None
+
+    def on_statuses(self, sweep_id: int, statuses: dict):
+        if sweep_id != self.status_sweep:
+            return
+        self.shot_statuses.update(statuses)
+        self.repaint_lists()
+
+    def repaint_lists(self):
+        # Badges are read from data() again for the rows on screen only
+        self.ui.listView_available.viewport().update()
+        self.ui.listView_selected.viewport().update()
+
+    def on_status_finished(self, sweep_id: int):
+        if sweep_id == self.status_sweep:
+            self.status_worker = None
+
+    def update_watch(self):
+        if self.csv_watcher.files():
+            self.csv_watcher.removePaths(self.csv_watcher.files())
+        if self.ui.checkBox_watch.isChecked() and self.watched_csv and os.path.exists(self.watched_csv):
+            self.csv_watcher.addPath(self.watched_csv)
+
+    def on_csv_changed(self):
+        # Saving by replacing the file drops it from the watcher, it is added again once the new file exists
+        self.update_watch()
+        if not self.shot_index or not self.watched_csv:
+            return
+        errors = []
+        try:
+            records = list(CSVManager.cached_records(file_path=self.watched_csv, errors=errors))
+        except OSError as e:
+            self.ui.plainTextEdit_log.appendPlainText(f"Could not read CSV file: {e}")
+            return
+        if errors:
+            # Most likely still being written, the lists are kept until the next change
+            self.ui.plainTextEdit_log.appendPlainText(CSVManager.format_errors(self.watched_csv, errors))
+            return
+
+        shot_index = ShotIndex(self.shot_index.project_code, records)
+        added, removed, changed = self.shot_index.diff(shot_index)
+        self.flag_changed(self.shot_index, shot_index)
+
+        # Only the rows that changed are touched, the highlighted shots stay highlighted
+        views = ((self.ui.listView_available, self.available_proxy, self.available_model),
+                 (self.ui.listView_selected, self.selected_proxy, self.selected_model))
+        highlighted = [set(model.shot_at(row) for row in proxy.source_rows(view.selectionModel().selection()))
+                       for view, proxy, model in views]
+        removed = set(removed)
+        for name in removed:
+            self.shot_statuses.pop(name, None)
+        for model in (self.available_model, self.selected_model):
+            model.remove_shots(removed)
+            model.set_index(shot_index)
+            model.set_changed(self.changed_shots)
+        self.available_model.add_shots(added, shot_index)
+        self.shot_index = shot_index
+        self.shot_query = ShotQuery(shot_index)
+        self.on_filter()
+        for (view, proxy, model), shots in zip(views, highlighted):
+            if shots:
+                view.selectionModel().select(proxy.selection_of(model.rows_of(shots)),
+                                             QItemSelectionModel.SelectionFlag.ClearAndSelect)
+
+        # Only new and re-ranged shots need a fresh status, unless the previous sweep is still running
+        project_data = next((p for p in project_list if p[2] == shot_index.project_code), None)
+        if project_data and self.status_worker:
+            self.start_status_sweep(project_data, records)
+        elif project_data and (added or changed):
+            self.start_status_sweep(project_data, [shot_index.get(name) for name in added + changed])
+
+        if added or removed or changed:
+            self.ui.plainTextEdit_log.appendPlainText(
+                f"CSV changed: {len(added)} shot(s) added, {len(removed)} removed, "
+                f"{len(changed)} with a new frame range")
+
+    def flag_changed(self, old_index: ShotIndex, new_index: ShotIndex):
+        # Keeps the range the shot was last seen with, a range changed back to it is no longer flagged
+        _, removed, changed = old_index.diff(new_index)
+        for name in removed:
+            self.changed_shots.pop(name, None)
+        for name in changed:
+            old = old_index.get(name)
+            self.changed_shots.setdefault(name, (old.start_frame, old.end_frame))
+        for name, frame_range in list(self.changed_shots.items()):
+            record = new_index.get(name)
+            if record and (record.start_frame, record.end_frame) == frame_range:
+                del self.changed_shots[name]
+
+    def on_filter(self):
+        # Answered from the query index, the models and their rows stay untouched
+        accepted = self.shot_query.match(self.ui.lineEdit_filter.text()) if self.shot_query else None
+        self.available_proxy.set_accepted(accepted)
+        if accepted is None:
+            self.ui.label_filter.setText(f"{self.available_model.rowCount()} shots")
+        else:
+            self.ui.label_filter.setText(f"{self.available_proxy.rowCount()} of "
+                                         f"{self.available_model.rowCount()} shots")
 
     def on_select_file(self, file_type: str, message: str):
         file_path, _ = QFileDialog.getOpenFileName(self, message, "", "All Files (*)")
@@ -72,14 +269,17 @@ class ShotGeneratorHandler(QWidget):
                 self.ui.lineEdit_mastershot.setText(file_path)
 
     def on_move_available_item(self):
-        for item in self.ui.listWidget_available.selectedItems():
-            self.ui.listWidget_selected.addItem(item.text())
-            self.ui.listWidget_available.takeItem(self.ui.listWidget_available.row(item))
+        self.move_shots(self.ui.listView_available, self.available_proxy, self.available_model, self.selected_model)
 
     def on_move_selected_item(self):
-        for item in self.ui.listWidget_selected.selectedItems():
-            self.ui.listWidget_available.addItem(item.text())
-            self.ui.listWidget_selected.takeItem(self.ui.listWidget_selected.row(item))
+        self.move_shots(self.ui.listView_selected, self.selected_proxy, self.selected_model, self.available_model)
+
+    @staticmethod
+    def move_shots(view: QListView, proxy: ShotFilterProxyModel, source: ShotListModel, target: ShotListModel):
+        # One bulk removal and one bulk insert, however many shots are selected
+        rows = proxy.source_rows(view.selectionModel().selection())
+        view.clearSelection()
+        target.add_shots(source.take_rows(rows))
 
     def on_generate(self):
         project_data = next((p for p in project_list if p[1] == self.ui.comboBox_project.currentText()), None)
@@ -87,10 +287,6 @@ class ShotGeneratorHandler(QWidget):
             QMessageBox.warning(self, "Error", "No project selected")
             return
 
-        # Get project path
-        project_production_path = FileManager().get_project_path(project_data[0])
-        project_output_path = FileManager().get_project_path(project_data[-1])
-
         # Get mastershot file path
         mastershot_path = self.ui.lineEdit_mastershot.text()
         if not mastershot_path or not FileManager().combine_paths(mastershot_path).exists():
@@ -103,79 +299,169 @@ class ShotGeneratorHandler(QWidget):
             QMessageBox.warning(self, "Error", "Blender executable path is empty.")
             return
 
-        for index in range(self.ui.listWidget_selected.count()):
-            shot_file = self.ui.listWidget_selected.item(index).text()
-            print(f"Generating for shot file: {shot_file}")
-
-            for row in self.csv_data:
-                ep, seq, shot, start_frame, end_frame = row[0].lower(), row[1].lower(), row[2].lower(), int(
-                    row[3]), int(row[4])
-                expected_shot_file = FileManager().generate_file_name(project_code=project_data[2], ep=ep, seq=seq,
-                                                                      shot=shot,
-                                                                      division=division_list[1][0], extension="blend")
-                if shot_file == expected_shot_file:
-                    print(f"Match found in CSV for shot file: {shot_file} with frames {start_frame}-{end_frame}")
-
-                    # Get animation file
-                    animation_path = FileManager().generate_shot_path(project_path=project_production_path,
-                                                                      production=division_list[0][2],
-                                                                      division=division_list[0][3], ep=ep, seq=seq,
-                                                                      shot=shot)
-                    animation_name = FileManager().generate_file_name(project_code=project_data[2], ep=ep, seq=seq,
-                                                                      shot=shot,
-                                                                      division=division_list[0][0], extension="blend")
-                    animation_file = FileManager().combine_paths(animation_path, animation_name)
-
-                    # Check if animation file exists
-                    if not animation_file.exists():
-                        reply = QMessageBox.question(
-                            self,
-                            "Animation File Missing",
-                            "Animation file not found. Do you want to skip anyway?",
-                            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                            QMessageBox.StandardButton.No
-                        )
-
-                        if reply == QMessageBox.StandardButton.No:
-                            return
-                        else:
-                            break
-
-                    # Generate lighting path
-                    lighting_path = FileManager().generate_shot_path(project_path=project_production_path,
-                                                                     production=division_list[1][2],
-                                                                     division=division_list[1][3], ep=ep, seq=seq,
-                                                                     shot=shot)
-                    lighting_file = FileManager().combine_paths(lighting_path, shot_file)
-
-                    beauty_path = FileManager().generate_exr_type(project_code=project_data[2],
-                                                                  project_path=project_output_path, ep=ep,
-                                                                  seq=seq, shot=shot, exr_type="beauty")
-                    alpha_path = FileManager().generate_exr_type(project_code=project_data[2],
-                                                                 project_path=project_output_path, ep=ep,
-                                                                 seq=seq, shot=shot, exr_type="alpha_char")
-
-                    lighting_script = BlenderSettings.generate_lighting_script(master_file=str(mastershot_path),
-                                                                                   animation_file=str(animation_file),
-                                                                                   collection_list=collection_list,
-                                                                                   camera_collection=camera_collection_name,
-                                                                                   start_frame=start_frame,
-                                                                                   end_frame=end_frame,
-                                                                                   output_path=str(lighting_file),
-                                                                                   beauty_base_path=beauty_path,
-                                                                                   alpha_base_path=alpha_path)
-
-                    execute_blender = ExecuteProgram().blender_execute(blender_path=blender_executable, script=lighting_script)
-
-                    if execute_blender:
-                        print(f"Blender process for {shot_file} completed successfully.")
-                    else:
-                        print(f"Blender process for {shot_file} failed.")
-                        QMessageBox.critical(self, "Error", f"Failed to generate lighting file for: {shot_file}")
-                    break
-        QMessageBox.information(self, "Success", "Successfully generated lighting file")
+        # Offer to continue an interrupted run of the same project, CSV and mastershot
+        label = JobJournal.run_label(project_data[2], self.ui.lineEdit_csv.text(), mastershot_path)
+        run_id = self.journal.unfinished_run(label)
+        if run_id is not None:
+            states = self.journal.job_states(run_id)
+            remaining = sum(1 for state in states.values() if state != "done")
+            reply = QMessageBox.question(
+                self,
+                "Resume Interrupted Run",
+                f"A previous run was interrupted with {remaining} of {len(states)} shot(s) not done.\n"
+                "Do you want to resume it instead of generating the current selection?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.Yes
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                jobs, _ = self.journal.resume_jobs(run_id)
+                self.start_generate(GenerateWorker(executor=self.get_executor(blender_executable), jobs=jobs,
+                                                   run_id=run_id))
+                return
+            self.journal.finish_run(run_id, "abandoned")
+
+        if not self.shot_index or self.shot_index.project_code != project_data[2]:
+            QMessageBox.warning(self, "Error", "Scan the CSV file for the selected project first.")
+            return
+
+        records, skipped = [], []
+        for shot_file in self.selected_model.shots():
+            record = self.shot_index.get(shot_file)
+            if record is None:
+                skipped.append(ShotResult(shot_file=shot_file, success=False, message="No CSV row", skipped=True))
+                continue
+            records.append(record)
+        # The jobs are checked against the mount by the worker, the missing animation policy is asked from there
+        self.start_generate(GenerateWorker(executor=self.get_executor(blender_executable), project_data=project_data,
+                                           master_file=mastershot_path, records=records, results=skipped,
+                                           label=label, ask_missing=self.ui.comboBox_missing.currentText() != "Skip",
+                                           force=self.ui.checkBox_force.isChecked()))
+        for result in skipped:
+            self.ui.plainTextEdit_log.appendPlainText(f"[WARNING] No CSV row for shot file {result.shot_file}, "
+                                                      f"it is skipped")
+
+    def on_missing(self, missing: list):
+        policy = self.ui.comboBox_missing.currentText()
+        missing_names = "\n".join(job.shot_file for job in missing[:20])
+        if len(missing) > 20:
+            missing_names += f"\n... and {len(missing) - 20} more"
+        if policy == "Abort":
+            QMessageBox.warning(self, "Animation File Missing",
+                                f"Animation file not found for {len(missing)} shot(s):\n{missing_names}")
+            self.worker.resolve_missing(False)
+            return
+        if policy == "Ask Once":
+            reply = QMessageBox.question(
+                self,
+                "Animation File Missing",
+                f"Animation file not found for {len(missing)} shot(s):\n{missing_names}\n\n"
+                "Do you want to skip them and continue?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
+            )
+            self.worker.resolve_missing(reply == QMessageBox.StandardButton.Yes)
+            return
+        self.worker.resolve_missing(True)
+
+    def start_generate(self, worker: GenerateWorker):
+        self.worker = worker
+        self.worker.signals.progress.connect(self.on_generate_progress)
+        self.worker.signals.log.connect(self.ui.plainTextEdit_log.appendPlainText)
+        self.worker.signals.missing.connect(self.on_missing)
+        self.worker.signals.finished.connect(self.on_generate_finished)
+
+        self.ui.plainTextEdit_log.clear()
+        # Busy until the worker knows how many shots it builds
+        self.ui.progressBar_generate.setMaximum(0)
+        self.ui.progressBar_generate.setValue(0)
+        self.ui.label_generate_status.setText("Checking shots...")
+        self.set_generating(True)
+        QThreadPool.globalInstance().start(self.worker)
+
+    def get_executor(self, blender_executable: str) -> ShotExecutor:
+        # Persistent workers are kept alive between runs while the settings stay the same
+        settings = (blender_executable, self.ui.spinBox_workers.value(), self.ui.spinBox_session.value(),
+                    self.ui.checkBox_persistent.isChecked())
+        staging_dir = staging_root if self.ui.checkBox_staging.isChecked() else None
+        blend_cache = BlendCache() if self.ui.checkBox_blend_cache.isChecked() else None
+        if self.executor and (self.executor.blender_path, self.executor.max_workers,
+                              self.executor.shots_per_session, self.executor.persistent) == settings:
+            # The worker script reads the save path and the mastershot from each job, both can change between runs
+            self.executor.set_staging(staging_dir)
+            self.executor.blend_cache = blend_cache
+            return self.executor
+        if self.executor:
+            self.executor.shutdown()
+        self.executor = ShotExecutor(blender_path=blender_executable, max_workers=settings[1],
+                                     shots_per_session=settings[2], persistent=settings[3], journal=self.journal,
+                                     staging_dir=staging_dir, blend_cache=blend_cache)
+        return self.executor
+
+    def on_generate_progress(self, done: int, total: int, eta: float):
+        self.ui.progressBar_generate.setMaximum(total)
+        self.ui.progressBar_generate.setValue(done)
+        if eta < 0:
+            self.ui.label_generate_status.setText(f"{done}/{total} shots")
+        else:
+            minutes, seconds = divmod(int(eta), 60)
+            self.ui.label_generate_status.setText(f"{done}/{total} shots, ETA {minutes:d}:{seconds:02d}")
+
+    def on_generate_finished(self, results: list):
+        worker = self.worker
+        cancelled = worker.executor.cancelled
+        log_dir = worker.executor.last_log_dir
+        self.worker = None
+        self.set_generating(False)
+        if not worker.jobs:
+            # Stopped before any shot was built
+            self.ui.progressBar_generate.setMaximum(1)
+            self.ui.label_generate_status.setText("")
+            if worker.up_to_date:
+                QMessageBox.information(self, "Up to Date", ShotExecutor.summarize(results))
+            elif not worker.stopped and not worker.cancelled:
+                QMessageBox.warning(self, "Error", "No shots to generate.")
+            return
+        built = [result.shot_file for result in results if result.success]
+        self.stat_cache.clear()
+        for shot_file in built:
+            self.shot_statuses[shot_file] = (STATUS_UP_TO_DATE, self.shot_statuses.get(shot_file, (None, False))[1])
+        self.repaint_lists()
+        if any(shot_file in self.changed_shots for shot_file in built):
+            for shot_file in built:
+                self.changed_shots.pop(shot_file, None)
+            for model in (self.available_model, self.selected_model):
+                model.set_changed(self.changed_shots)
+        report = ShotExecutor.summarize(results)
+        if log_dir:
+            report += f"\n\nLogs: {log_dir}"
+        if cancelled:
+            QMessageBox.warning(self, "Cancelled", report)
+        elif all(result.success or result.skipped for result in results):
+            QMessageBox.information(self, "Success", report)
+        else:
+            QMessageBox.warning(self, "Generate Report", report)
+
+    def on_cancel(self):
+        if self.worker:
+            self.ui.label_generate_status.setText("Cancelling...")
+            self.ui.pushButton_generate_cancel.setEnabled(False)
+            self.worker.cancel()
+
+    def set_generating(self, generating: bool):
+        self.ui.pushButton_generate.setEnabled(not generating)
+        self.ui.pushButton_generate_scan.setEnabled(not generating)
+        self.ui.pushButton_generate_clear.setEnabled(not generating)
+        self.ui.pushButton_generate_cancel.setEnabled(generating)
 
     def on_clear(self):
-        self.ui.listWidget_selected.clear()
-        self.ui.listWidget_available.clear()
-        self.csv_data.clear()
\ No newline at end of file
+        self.selected_model.set_shots([])
+        self.available_model.set_shots([])
+        self.shot_query = None
+        self.on_filter()
+        self.shot_index = None
+        self.watched_csv = None
+        self.changed_shots = {}
+        self.update_watch()
+        self.stop_status_sweep()
+        self.shot_statuses.clear()
+        self.repaint_lists()
\ No newline at end of file
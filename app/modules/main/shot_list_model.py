@@ -0,0 +1,265 @@
+import bisect
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QAbstractProxyModel, QItemSelection, QModelIndex
+from PyQt6.QtGui import QFont, QColor, QIcon, QPixmap
+
+from app.services.shot_index import ShotIndex
+from app.services.shot_status import STATUS_MISSING, STATUS_READY, STATUS_BUILT, STATUS_UP_TO_DATE
+
+# Above this many separate row ranges a removal resets the model instead of sending one signal per range
+MAX_REMOVE_RANGES = 64
+# Badge colour per shot status
+STATUS_COLORS = {
+    STATUS_MISSING: "#d9534f",
+    STATUS_READY: "#5bc0de",
+    STATUS_BUILT: "#f0ad4e",
+    STATUS_UP_TO_DATE: "#5cb85c",
+}
+STATUS_TEXT = {
+    STATUS_MISSING: "Animation file missing",
+    STATUS_READY: "Ready to generate",
+    STATUS_BUILT: "Lighting file exists, inputs changed since it was built",
+    STATUS_UP_TO_DATE: "Lighting file is up to date",
+}
+
+
+class ShotListModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.shot_index = None
+        self._shots = []  # lighting file names
+        self.changed = {}  # lighting file name -> (start, end) before the CSV changed, shown until regenerated
+        self.statuses = {}  # lighting file name -> (status, renders), filled in by the status sweep
+        self._icons = {}  # status -> badge
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._shots)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        shot_file = self._shots[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return shot_file
+        if role == Qt.ItemDataRole.ToolTipRole and self.shot_index:
+            record = self.shot_index.get(shot_file)
+            if record:
+                tooltip = f"Frames {record.start_frame}-{record.end_frame} " \
+                          f"({record.end_frame - record.start_frame + 1} frames), CSV line {record.line}"
+                if shot_file in self.changed:
+                    start_frame, end_frame = self.changed[shot_file]
+                    tooltip += f"\nFrame range changed from {start_frame}-{end_frame}, needs regenerating"
+                if shot_file in self.statuses:
+                    status, renders = self.statuses[shot_file]
+                    tooltip += f"\n{STATUS_TEXT[status]}" + (", EXR folder exists" if renders else "")
+                return tooltip
+        if role == Qt.ItemDataRole.DecorationRole and shot_file in self.statuses:
+            return self.status_icon(self.statuses[shot_file][0])
+        if role == Qt.ItemDataRole.FontRole and shot_file in self.changed:
+            font = QFont()
+            font.setBold(True)
+            return font
+        return None
+
+    def shots(self) -> list[str]:
+        return list(self._shots)
+
+    def shot_at(self, row: int) -> str:
+        return self._shots[row]
+
+    def set_shots(self, shots: list[str], shot_index: ShotIndex = None):
+        self.beginResetModel()
+        self._shots = list(shots)
+        self.shot_index = shot_index
+        self.endResetModel()
+
+    def set_changed(self, changed: dict):
+        # Shared between both lists, the rows keep their place and only repaint
+        self.changed = changed
+        if self._shots:
+            self.dataChanged.emit(self.index(0), self.index(len(self._shots) - 1),
+                                  [Qt.ItemDataRole.FontRole, Qt.ItemDataRole.ToolTipRole])
+
+    def status_icon(self, status: str) -> QIcon:
+        if status not in self._icons:
+            pixmap = QPixmap(10, 10)
+            pixmap.fill(QColor(STATUS_COLORS[status]))
+            self._icons[status] = QIcon(pixmap)
+        return self._icons[status]
+
+    def set_statuses(self, statuses: dict):
+        # Shared between both lists and updated in place by the status sweep. No dataChanged is sent, over every row
+        # it makes the view lay out all rows again, the handler repaints the visible rows instead
+        self.statuses = statuses
+
+    def set_index(self, shot_index: ShotIndex):
+        # New records for the same shots, the rows stay where they are
+        self.shot_index = shot_index
+        if self._shots:
+            self.dataChanged.emit(self.index(0), self.index(len(self._shots) - 1), [Qt.ItemDataRole.ToolTipRole])
+
+    def rows_of(self, shots: set[str]) -> list[int]:
+        return [row for row, shot in enumerate(self._shots) if shot in shots]
+
+    def remove_shots(self, shots: set[str]) -> list[str]:
+        return self.take_rows(self.rows_of(shots))
+
+    def add_shots(self, shots: list[str], shot_index: ShotIndex = None):
+        # Shots stay in CSV order, sorting here is one keyed sort instead of a proxy calling data() per comparison
+        if not shots:
+            return
+        self.shot_index = shot_index or self.shot_index
+        if not self.shot_index:
+            self.beginInsertRows(QModelIndex(), len(self._shots), len(self._shots) + len(shots) - 1)
+            self._shots.extend(shots)
+            self.endInsertRows()
+            return
+        self.beginResetModel()
+        self._shots = sorted(self._shots + list(shots), key=self.shot_index.positions.__getitem__)
+        self.endResetModel()
+
+    def take_rows(self, rows: list[int]) -> list[str]:
+        # Removes the rows in one pass and returns their shots in list order
+        rows = sorted(set(rows))
+        if not rows:
+            return []
+        taken = [self._shots[row] for row in rows]
+        ranges = []  # (first, last) of every contiguous block
+        for row in rows:
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+
+        if len(ranges) > MAX_REMOVE_RANGES:
+            removed = set(rows)
+            self.beginResetModel()
+            self._shots = [shot for row, shot in enumerate(self._shots) if row not in removed]
+            self.endResetModel()
+            return taken
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._shots[first:last + 1]
+            self.endRemoveRows()
+        return taken
+
+
+class ShotFilterProxyModel(QAbstractProxyModel):
+    # Keeps the visible source rows in a list, so filtering and sorting cost one pass in Python and the view only
+    # asks for the rows on screen, a QSortFilterProxyModel would call back into Python for every source row
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.accepted = None  # lighting file names shown, None shows every shot
+        self.sort_order = None  # None keeps the source (CSV) order
+        self._rows = None  # visible source rows, None while every row is shown in source order
+        self._row_count = 0  # cached, views call index() once per row on select all
+
+    def setSourceModel(self, model: ShotListModel):
+        super().setSourceModel(model)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self.on_source_changed)
+        model.rowsAboutToBeInserted.connect(self.beginResetModel)
+        model.rowsInserted.connect(self.on_source_changed)
+        model.rowsAboutToBeRemoved.connect(self.beginResetModel)
+        model.rowsRemoved.connect(self.on_source_changed)
+        model.dataChanged.connect(self.on_source_data_changed)
+        self.beginResetModel()
+        self.on_source_changed()
+
+    def on_source_changed(self):
+        self.update_rows()
+        self.endResetModel()
+
+    def on_source_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex, roles: list = ()):
+        # Forwarded as one range over the visible rows, the views only repaint what is on screen
+        if self._row_count:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._row_count - 1, 0), roles)
+
+    def update_rows(self):
+        shots = self.sourceModel().shots()
+        self._row_count = len(shots)
+        if self.accepted is None and self.sort_order is None:
+            self._rows = None
+            return
+        if self.accepted is None:
+            rows = list(range(len(shots)))
+        else:
+            rows = [row for row, shot in enumerate(shots) if shot in self.accepted]
+        if self.sort_order is not None:
+            rows.sort(key=shots.__getitem__, reverse=self.sort_order == Qt.SortOrder.DescendingOrder)
+        self._rows = rows
+        self._row_count = len(rows)
+
+    def set_accepted(self, shots: set[str] | None):
+        self.beginResetModel()
+        self.accepted = shots
+        self.update_rows()
+        self.endResetModel()
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder):
+        # column -1 restores the CSV order
+        self.beginResetModel()
+        self.sort_order = order if column >= 0 else None
+        self.update_rows()
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else 1
+
+    def index(self, row: int, column: int = 0, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        if column != 0 or not 0 <= row < self._row_count or parent.isValid():
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index: QModelIndex) -> QModelIndex:
+        if not proxy_index.isValid():
+            return QModelIndex()
+        row = proxy_index.row() if self._rows is None else self._rows[proxy_index.row()]
+        return self.sourceModel().index(row, 0)
+
+    def mapFromSource(self, source_index: QModelIndex) -> QModelIndex:
+        if not source_index.isValid():
+            return QModelIndex()
+        if self._rows is None:
+            return self.createIndex(source_index.row(), 0)
+        if self.sort_order is None:
+            # Unsorted rows keep the source order, a binary search finds them
+            position = bisect.bisect_left(self._rows, source_index.row())
+            if position < len(self._rows) and self._rows[position] == source_index.row():
+                return self.createIndex(position, 0)
+            return QModelIndex()
+        if source_index.row() in self._rows:
+            return self.createIndex(self._rows.index(source_index.row()), 0)
+        return QModelIndex()
+
+    def selection_of(self, source_rows: list[int]) -> QItemSelection:
+        # The visible rows of source_rows as one range per contiguous block
+        if self._rows is None:
+            rows = sorted(source_rows)
+        else:
+            visible = set(source_rows)
+            rows = [row for row, source_row in enumerate(self._rows) if source_row in visible]
+        selection = QItemSelection()
+        first = None
+        for position, row in enumerate(rows):
+            if first is None:
+                first = row
+            if position + 1 == len(rows) or rows[position + 1] != row + 1:
+                selection.select(self.index(first), self.index(row))
+                first = None
+        return selection
+
+    def source_rows(self, selection: QItemSelection) -> list[int]:
+        # Walks the selected ranges instead of wrapping one QModelIndex per selected row
+        rows = []
+        for item_range in selection:
+            rows.extend(range(item_range.top(), item_range.bottom() + 1))
+        if self._rows is None:
+            return rows
+        return [self._rows[row] for row in rows]
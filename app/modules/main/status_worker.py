@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from app.data.executor_config import status_workers
+from app.services.fingerprint import ShotFingerprint
+from app.services.shot_builder import ShotBuilder
+from app.services.shot_job import ShotRecord
+from app.services.shot_status import ShotStatus, StatCache
+from app.services.shot_tree import ShotTree
+
+# Shots checked per thread pool task, and how often finished statuses are sent to the lists (seconds)
+STATUS_CHUNK_SIZE = 64
+STATUS_EMIT_INTERVAL = 0.2
+
+
+class StatusWorkerSignals(QObject):
+    statuses = pyqtSignal(int, object)  # sweep id, lighting file name -> (status, renders)
+    log = pyqtSignal(str)
+    finished = pyqtSignal(int)
+
+
+class StatusWorker(QRunnable):
+    def __init__(self, sweep_id: int, project_data: list, master_file: str, records: list[ShotRecord],
+                 stat_cache: StatCache, shot_tree: ShotTree = None):
+        super().__init__()
+        self.shot_tree = shot_tree
+        self.sweep_id = sweep_id
+        self.project_data = project_data
+        self.master_file = master_file
+        self.records = records
+        self.stat_cache = stat_cache
+        self.cancelled = False
+        self.signals = StatusWorkerSignals()
+
+    def cancel(self):
+        self.cancelled = True
+
+    @staticmethod
+    def lower_priority():
+        # The sweep shares the cores with the UI thread, on Linux a thread can be niced on its own
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+
+    def check_chunk(self, records: list[ShotRecord], script_hash: str | None) -> dict:
+        statuses = {}
+        for job in ShotBuilder.build_jobs(project_data=self.project_data, master_file=self.master_file,
+                                          records=records):
+            if self.cancelled:
+                break
+            statuses[job.shot_file] = ShotStatus.check(job, self.stat_cache, script_hash)
+        return statuses
+
+    def run(self):
+        # Chunks finish in CSV order, the top of the list gets its badges first
+        script_hash = ShotFingerprint.script_hash() if self.master_file else None
+        if self.shot_tree:
+            # Unchanged folders cost one stat each, afterwards the shot files are looked up in memory
+            if not self.shot_tree.loaded:
+                self.shot_tree.load()
+            checked, listed = self.shot_tree.refresh()
+            self.signals.log.emit(f"Shot tree index refreshed: {checked} folders checked, {listed} listed")
+            if self.cancelled:
+                self.signals.finished.emit(self.sweep_id)
+                return
+        chunks = [self.records[i:i + STATUS_CHUNK_SIZE] for i in range(0, len(self.records), STATUS_CHUNK_SIZE)]
+        pending = {}
+        last_emit = time.monotonic()
+        pool = ThreadPoolExecutor(max_workers=status_workers, initializer=self.lower_priority)
+        try:
+            for statuses in pool.map(lambda chunk: self.check_chunk(chunk, script_hash), chunks):
+                if self.cancelled:
+                    return
+                pending.update(statuses)
+                if time.monotonic() - last_emit >= STATUS_EMIT_INTERVAL:
+                    self.signals.statuses.emit(self.sweep_id, pending)
+                    pending = {}
+                    last_emit = time.monotonic()
+            if pending:
+                self.signals.statuses.emit(self.sweep_id, pending)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            self.signals.finished.emit(self.sweep_id)
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app.data.executor_config import blend_cache_root, blend_cache_budget
+from app.services.fingerprint import HASH_CHUNK_SIZE
+
+
+class BlendCache:
+    # Local copies of .blend files from the network mount. A source is looked up by path, size and mtime, its copy
+    # is stored under the blake2b hash of its content, so two sources with the same content share one copy
+    def __init__(self, root: str = blend_cache_root, budget: int = blend_cache_budget):
+        self.root = root
+        self.budget = budget
+        self.path = os.path.join(root, "index.sqlite")
+        self.pinned = set()  # content hashes handed out by this process, never evicted by it
+        self._lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.join(self.root, "blobs"), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS sources (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS libraries (
+                digest TEXT PRIMARY KEY,
+                paths TEXT NOT NULL
+            ) WITHOUT ROWID;
+        """)
+        return connection
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], f"{digest}.blend")
+
+    @staticmethod
+    def digest(local_path: str) -> str:
+        return os.path.splitext(os.path.basename(local_path))[0]
+
+    def fetch(self, source: str) -> str:
+        # Path of the local copy, copied on a miss. The source itself when it does not fit into the budget or
+        # changed while it was copied
+        source = os.path.abspath(source)
+        stat = os.stat(source)
+        with self._lock:
+            connection = self.connect()
+            try:
+                row = connection.execute("SELECT digest FROM sources WHERE path = ? AND size = ? AND mtime_ns = ?",
+                                         (source, stat.st_size, stat.st_mtime_ns)).fetchone()
+                if row and os.path.exists(self.blob_path(row[0])):
+                    digest = row[0]
+                else:
+                    if stat.st_size > self.budget:
+                        return source
+                    digest = self.copy(source)
+                    after = os.stat(source)
+                    if (after.st_size, after.st_mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                        # The copy is of no known version of the source, unless another source has the same content
+                        if not connection.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone():
+                            try:
+                                os.remove(self.blob_path(digest))
+                            except FileNotFoundError:
+                                pass
+                        return source
+                    with connection:
+                        connection.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                                           (source, stat.st_size, stat.st_mtime_ns, digest))
+                with connection:
+                    connection.execute("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?)",
+                                       (digest, stat.st_size, time.time()))
+                self.pinned.add(digest)
+                self.evict(connection)
+                return self.blob_path(digest)
+            finally:
+                connection.close()
+
+    def copy(self, source: str) -> str:
+        # Hashed while it is copied, then renamed into place, a copy is never seen half written
+        tmp_path = os.path.join(self.root, f"tmp-{os.getpid()}-{threading.get_ident()}.blend")
+        digest = hashlib.blake2b(digest_size=20)
+        try:
+            with open(source, "rb") as src, open(tmp_path, "wb") as dst:
+                while chunk := src.read(HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+                    dst.write(chunk)
+            blob_path = self.blob_path(digest.hexdigest())
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(tmp_path, blob_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return digest.hexdigest()
+
+    def evict(self, connection: sqlite3.Connection):
+        # Least recently used copies first, a Blender that already opened an evicted copy keeps reading it
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.budget:
+            return
+        for digest, size in connection.execute("SELECT digest, size FROM blobs ORDER BY last_used").fetchall():
+            if total <= self.budget:
+                break
+            if digest in self.pinned:
+                continue
+            try:
+                os.remove(self.blob_path(digest))
+            except FileNotFoundError:
+                pass
+            with connection:
+                connection.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                connection.execute("DELETE FROM sources WHERE digest = ?", (digest,))
+                connection.execute("DELETE FROM libraries WHERE digest = ?", (digest,))
+            total -= size
+
+    def libraries(self, local_path: str) -> list[str] | None:
+        # Libraries of a cached .blend file that can be cached too, None until they were reported
+        with self._lock:
+            connection = self.connect()
+            try:
+                row = connection.execute("SELECT paths FROM libraries WHERE digest = ?",
+                                         (self.digest(local_path),)).fetchone()
+            finally:
+                connection.close()
+        return json.loads(row[0]) if row else None
+
+    def set_libraries(self, local_path: str, libraries: list[str]):
+        with self._lock:
+            connection = self.connect()
+            try:
+                with connection:
+                    connection.execute("INSERT OR REPLACE INTO libraries VALUES (?, ?)",
+                                       (self.digest(local_path), json.dumps(libraries)))
+            finally:
+                connection.close()
+
+    def release(self):
+        # Copies handed out earlier may be evicted again
+        self.pinned.clear()
@@ -0,0 +1,201 @@
+import gzip
+import json
+import os
+import re
+import time
+
+from app.data.executor_config import log_counter_tags
+from app.services.execute_program import ExecuteProgram
+
+# Prefix of the JSON reply lines written by the persistent worker script
+WORKER_REPLY_PREFIX = "@@SHOT_BUILDER@@"
+
+LOG_TAG_PATTERN = re.compile(r"^\[(%s)\]" % "|".join(log_counter_tags))
+
+
+class BlenderSession:
+    def __init__(self, process, script_path: str, log_dir: str, jobs: list = None, persistent: bool = False):
+        self.process = process
+        self.script_path = script_path
+        self.log_dir = log_dir
+        self.jobs = list(jobs or [])  # every job handed to this Blender, counts towards its restart
+        self.outstanding = {job.lighting_file: job for job in self.jobs}  # output_path -> dispatched, not reported
+        self.persistent = persistent
+        self.start_time = time.monotonic()
+        self.partial_line = b""
+        self.eof = False
+        self.last_output_time = self.start_time
+        self.last_result_time = self.start_time  # end of the previous shot, or when a worker got its job
+        self.kill_reason = None
+        self.shot_start_times = {}  # output_path -> monotonic start time
+        self.timings = {}  # output_path -> raw JSON timings from the script
+        self.results = []
+
+        # Output routing, lines between SHOT_START and the shot result go to the shot log
+        self.current_shot = None
+        self.session_log = None
+        self.shot_logs = {}  # output_path -> (log path, gzip file)
+        self.counters = {}  # output_path -> {tag: count}
+
+        # Resource usage sampled from /proc
+        self.rss = 0
+        self.cpu = 0.0  # cores in use
+        self.cpu_time = 0.0
+        self.predicted_memory = 0
+        self.shot_peaks = {}  # output_path -> peak rss while the shot was built
+
+        # Persistent worker state
+        self.ready = not persistent
+        self.busy = False
+        self.retiring = False
+        self.ping_sent_time = None
+        self.last_healthy_time = self.start_time
+
+        os.set_blocking(self.fileno(), False)
+
+    @property
+    def idle(self) -> bool:
+        return self.persistent and self.ready and not self.busy and not self.retiring
+
+    def begin_run(self, log_dir: str):
+        # A persistent worker kept from an earlier run starts over, the same shots may be built again
+        self.log_dir = log_dir
+        self.outstanding.clear()
+        self.shot_start_times.clear()
+        self.timings.clear()
+        self.counters.clear()
+        self.shot_peaks.clear()
+        self.results = []
+
+    def fileno(self) -> int:
+        return self.process.stdout.fileno()
+
+    def read_lines(self) -> list[str]:
+        chunks = [self.partial_line]
+        while not self.eof:
+            try:
+                data = os.read(self.fileno(), 65536)
+            except BlockingIOError:
+                break
+            if not data:
+                self.eof = True
+                break
+            chunks.append(data)
+        if len(chunks) > 1:
+            self.last_output_time = time.monotonic()
+        lines = b"".join(chunks).split(b"\n")
+        self.partial_line = lines.pop()
+        if self.eof and self.partial_line:
+            lines.append(self.partial_line)
+            self.partial_line = b""
+        return [line.decode("utf-8", errors="replace").rstrip("\r") for line in lines]
+
+    def job_log_path(self, job) -> str:
+        return os.path.join(self.log_dir, f"{os.path.splitext(job.shot_file)[0]}.log.gz")
+
+    def begin_shot(self, job):
+        self.current_shot = job.lighting_file
+        self.counters[job.lighting_file] = {tag: 0 for tag in log_counter_tags}
+        if job.lighting_file not in self.shot_logs:
+            log_path = self.job_log_path(job)
+            self.shot_logs[job.lighting_file] = (log_path, gzip.open(log_path, "at", encoding="utf-8"))
+
+    def end_shot(self, output_path: str) -> tuple[str | None, dict]:
+        self.last_result_time = time.monotonic()
+        if self.current_shot == output_path:
+            self.current_shot = None
+        log_path, log_file = self.shot_logs.pop(output_path, (None, None))
+        if log_file:
+            log_file.close()
+        return log_path, self.counters.get(output_path, {})
+
+    def record(self, line: str):
+        if self.current_shot in self.shot_logs:
+            log_file = self.shot_logs[self.current_shot][1]
+            match = LOG_TAG_PATTERN.match(line)
+            if match:
+                self.counters[self.current_shot][match.group(1)] += 1
+        else:
+            if self.session_log is None:
+                self.session_log = gzip.open(os.path.join(self.log_dir, f"session_{self.process.pid}.log.gz"),
+                                             "at", encoding="utf-8")
+            log_file = self.session_log
+        log_file.write(line + "\n")
+
+    def parse_timings(self, output_path: str) -> dict:
+        try:
+            return json.loads(self.timings.get(output_path, "{}"))
+        except ValueError:
+            return {}
+
+    @staticmethod
+    def parse_reply(line: str) -> dict | None:
+        if not line.startswith(WORKER_REPLY_PREFIX):
+            return None
+        try:
+            return json.loads(line[len(WORKER_REPLY_PREFIX):])
+        except ValueError:
+            return None
+
+    def send(self, message: dict) -> bool:
+        try:
+            self.process.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+            self.process.stdin.flush()
+            return True
+        except (BrokenPipeError, OSError, ValueError):
+            return False
+
+    def send_job(self, job, script_job: dict) -> bool:
+        self.jobs.append(job)
+        self.outstanding[job.lighting_file] = job
+        # A retry of a shot this worker built before starts without the state of the earlier attempt
+        self.shot_start_times.pop(job.lighting_file, None)
+        self.timings.pop(job.lighting_file, None)
+        self.shot_peaks.pop(job.lighting_file, None)
+        self.busy = True
+        self.last_result_time = time.monotonic()
+        return self.send({"type": "job", "id": job.lighting_file, "job": script_job})
+
+    def ping(self) -> bool:
+        self.ping_sent_time = time.monotonic()
+        return self.send({"type": "ping"})
+
+    def retire(self):
+        # Ask the worker to quit once it has no job running
+        self.retiring = True
+        self.send({"type": "quit"})
+
+    def current_job_start_time(self) -> float | None:
+        # Start of the shot being built, or of the session while Blender is still loading
+        if self.current_shot is not None:
+            return self.shot_start_times.get(self.current_shot, self.start_time)
+        if self.unfinished_jobs() and not (self.persistent and not self.busy):
+            return self.last_result_time
+        return None
+
+    def kill(self, reason: str):
+        self.kill_reason = reason
+        ExecuteProgram.kill_tree(self.process)
+
+    def unfinished_jobs(self) -> list:
+        return list(self.outstanding.values())
+
+    def close(self, remove_script: bool = True) -> list[str]:
+        lines = self.read_lines()
+        for pipe in (self.process.stdin, self.process.stdout):
+            if pipe:
+                try:
+                    pipe.close()
+                except OSError:
+                    pass
+        if remove_script and os.path.exists(self.script_path):
+            os.remove(self.script_path)
+        return lines
+
+    def close_logs(self):
+        for _, log_file in self.shot_logs.values():
+            log_file.close()
+        self.shot_logs.clear()
+        if self.session_log:
+            self.session_log.close()
+            self.session_log = None
@@ -1,6 +1,9 @@
+from pprint import pformat
 from textwrap import dedent
 from string import Template
 
+from app.services.path_template import PathLayout
+
 
 class BlenderSettings:
     def __init__(self, blender_file: str):
@@ -10,11 +13,104 @@ class BlenderSettings:
     def generate_lighting_script(master_file:str, animation_file: str, collection_list: list, camera_collection: str,
                         start_frame: int, end_frame: int, output_path: str,
                         beauty_base_path: str, alpha_base_path: str) -> str:
+        job = {
+            "master_file": master_file,
+            "animation_file": animation_file,
+            "start_frame": start_frame,
+            "end_frame": end_frame,
+            "output_path": output_path,
+            "beauty_base_path": beauty_base_path,
+            "alpha_base_path": alpha_base_path,
+        }
+        return BlenderSettings.generate_lighting_batch_script(jobs=[job], collection_list=collection_list,
+                                                              camera_collection=camera_collection)
+
+    @staticmethod
+    def generate_lighting_batch_script(jobs: list, collection_list: list, camera_collection: str) -> str:
         tpl = Template(dedent("""
-            import bpy
+            JOBS = $JOBS
+            
+            failed = 0
+            for job in JOBS:
+                print(f"[SHOT_START] {job['output_path']}")
+                try:
+                    timings = build_shot(job)
+                except Exception as e:
+                    traceback.print_exc()
+                    print(f"[SHOT_FAILED] {job['output_path']}: {e}")
+                    failed += 1
+                else:
+                    print(f"[SHOT_TIMINGS] {job['output_path']}: {json.dumps(timings)}")
+                    print(f"[SHOT_OK] {job['output_path']}")
+                sys.stdout.flush()
+            
+            # Quit Blender
+            if failed:
+                sys.exit(1)
+            bpy.ops.wm.quit_blender()
+        """))
 
-            # Open master file
-            bpy.ops.wm.open_mainfile(filepath="$FILEPATH")
+        script = tpl.substitute(
+            JOBS=repr(jobs),
+        )
+
+        return BlenderSettings.generate_lighting_functions(collection_list=collection_list,
+                                                           camera_collection=camera_collection) + script
+
+    @staticmethod
+    def generate_worker_script(collection_list: list, camera_collection: str, reply_prefix: str) -> str:
+        # Long-lived worker: reads one JSON request per line from stdin and
+        # answers with one "<reply_prefix> {json}" line per request on stdout.
+        tpl = Template(dedent("""
+            def reply(message: dict):
+                sys.stdout.write("$REPLY_PREFIX " + json.dumps(message) + "\\n")
+                sys.stdout.flush()
+            
+            
+            reply({"type": "ready"})
+            for request_line in sys.stdin:
+                if not request_line.strip():
+                    continue
+                request = json.loads(request_line)
+                if request["type"] == "ping":
+                    reply({"type": "pong", "id": request.get("id")})
+                elif request["type"] == "quit":
+                    break
+                elif request["type"] == "job":
+                    job = request["job"]
+                    print(f"[SHOT_START] {job['output_path']}")
+                    try:
+                        timings = build_shot(job)
+                    except Exception as e:
+                        traceback.print_exc()
+                        print(f"[SHOT_FAILED] {job['output_path']}: {e}")
+                        reply({"type": "result", "id": request.get("id"), "status": "failed", "message": str(e)})
+                    else:
+                        print(f"[SHOT_TIMINGS] {job['output_path']}: {json.dumps(timings)}")
+                        print(f"[SHOT_OK] {job['output_path']}")
+                        reply({"type": "result", "id": request.get("id"), "status": "ok", "timings": timings})
+            
+            bpy.ops.wm.quit_blender()
+        """))
+
+        script = tpl.substitute(
+            REPLY_PREFIX=reply_prefix,
+        )
+
+        return BlenderSettings.generate_lighting_functions(collection_list=collection_list,
+                                                           camera_collection=camera_collection) + script
+
+    @staticmethod
+    def generate_lighting_functions(collection_list: list, camera_collection: str) -> str:
+        tpl = Template(dedent("""
+            import json
+            import os
+            import re
+            import sys
+            import time
+            import traceback
+
+            import bpy
             
             
             # Utility functions for collection management
@@ -112,10 +208,24 @@ class BlenderSettings:
             
             
             # Define file paths and parameters
+            # Path templates and regexes of every project, compiled by Shot Builder from app/data/project.py
+            PATH_TABLES = $PATH_TABLES
+            SHOT_PATH_REGEXES = [re.compile(table["shot_file_path"][1], re.IGNORECASE)
+                                 for table in PATH_TABLES.values()]
+            
+            
+            def parse_shot(path: str):
+                # (ep, seq, shot) of a shot file, None when the path is in no project layout
+                for regex in SHOT_PATH_REGEXES:
+                    match = regex.fullmatch(path)
+                    if match:
+                        return match.group("ep").lower(), match.group("seq").lower(), match.group("shot").lower()
+                return None
             
-            def link_animation():
+            
+            def link_animation(animation_file: str):
                 # Link the animation file
-                print("Animation file:", "$ANIMATION_FILE")
+                print("Animation file:", animation_file)
                 parents = {}
                 for name, prefix in $COLLECTION_LIST:
                     if name == "$CAMERA_COLLECTION":
@@ -123,7 +233,7 @@ class BlenderSettings:
                         continue
                     parents[name] = ensure_parent_in_scene(name)
             
-                with bpy.data.libraries.load("$ANIMATION_FILE", link=True) as (data_from, data_to):
+                with bpy.data.libraries.load(animation_file, link=True) as (data_from, data_to):
                     desired = {}
                     for parent_name, prefix in $COLLECTION_LIST:
                         if prefix is None:
@@ -161,10 +271,10 @@ class BlenderSettings:
                                 continue
             
                             # Ensure it's from the right library
-                            if not (col.library and col.library.filepath == "$ANIMATION_FILE"):
+                            if not (col.library and col.library.filepath == animation_file):
                                 col = next(
                                     (c for c in bpy.data.collections
-                                     if c.name == cname and c.library and c.library.filepath == "$ANIMATION_FILE"),
+                                     if c.name == cname and c.library and c.library.filepath == animation_file),
                                     None
                                 )
             
@@ -192,13 +302,13 @@ class BlenderSettings:
                     print("No active camera found in the scene.")
             
             
-            def set_duration():
+            def set_duration(start_frame: int, end_frame: int):
                 # Set the frame range based on the scene name
                 scene_data = bpy.data.scenes.get("Scene")
                 scene = bpy.context.scene
-                scene.frame_start = $START_FRAME
-                scene.frame_end = $END_FRAME
-                print(f"Frame range set to: {$START_FRAME} - {$END_FRAME}")
+                scene.frame_start = start_frame
+                scene.frame_end = end_frame
+                print(f"Frame range set to: {start_frame} - {end_frame}")
             
             
             def set_relative():
@@ -207,7 +317,7 @@ class BlenderSettings:
                 bpy.ops.file.make_paths_relative()
             
             
-            def beauty_node():
+            def beauty_node(base_path: str):
                 # Node Render Layer
                 bpy.data.scenes["Scene"].node_tree.nodes.new("CompositorNodeRLayers").name = "beauty_layer"
                 bpy.data.scenes["Scene"].node_tree.nodes["beauty_layer"].label = "beauty_layer"
@@ -237,9 +347,9 @@ class BlenderSettings:
             
                 # Base path output file (contoh path, sesuai generator)
                 bpy.data.scenes["Scene"].node_tree.nodes[
-                    "beauty_output"].base_path = "$BEAUTY_BASE_PATH"
+                    "beauty_output"].base_path = base_path
                 for slot in bpy.data.scenes["Scene"].node_tree.nodes["beauty_output"].file_slots:
-                    slot.path = "$BEAUTY_BASE_PATH"
+                    slot.path = base_path
             
                 # Sambungan antar socket
                 bpy.data.scenes["Scene"].node_tree.links.new(
@@ -264,7 +374,7 @@ class BlenderSettings:
                     )
             
             
-            def alpha_char_node():
+            def alpha_char_node(base_path: str):
                 # Node Render Layer
                 bpy.data.scenes["Scene"].node_tree.nodes.new("CompositorNodeRLayers").name = "alpha_chr_layer"
                 bpy.data.scenes["Scene"].node_tree.nodes["alpha_chr_layer"].label = "alpha_chr_layer"
@@ -283,9 +393,9 @@ class BlenderSettings:
             
                 # Base path output file (contoh path, sesuai generator)
                 bpy.data.scenes["Scene"].node_tree.nodes[
-                    "alpha_chr_output"].base_path = "$ALPHA_BASE_PATH"
+                    "alpha_chr_output"].base_path = base_path
                 for slot in bpy.data.scenes["Scene"].node_tree.nodes["alpha_chr_output"].file_slots:
-                    slot.path = "$ALPHA_BASE_PATH"
+                    slot.path = base_path
             
                 # Sambungan antar socket
                 bpy.data.scenes["Scene"].node_tree.links.new(
@@ -307,6 +417,61 @@ class BlenderSettings:
                 set_collection_holdout("SET")
             
             
+            def path_blocks():
+                # Data blocks with a file path on disk
+                for data in (bpy.data.libraries, bpy.data.images, bpy.data.sounds, bpy.data.movieclips,
+                             bpy.data.cache_files, bpy.data.volumes):
+                    for block in data:
+                        if block.filepath and not getattr(block, "packed_file", None):
+                            yield block
+            
+            
+            def local_path_blocks():
+                # Data blocks with a file path stored in this file. Paths inside linked data and indirect libraries
+                # are relative to their own library
+                for block in path_blocks():
+                    if not getattr(block, "library", None) and not getattr(block, "parent", None):
+                        yield block
+            
+            
+            def remap_relative(output_path: str):
+                # The file is saved to a staging folder first, relative paths have to point from its final folder
+                start = os.path.dirname(output_path)
+                for block in local_path_blocks():
+                    block.filepath = bpy.path.relpath(bpy.path.abspath(block.filepath), start=start)
+            
+            
+            def remap_to_source(source_path: str, library_copies: dict):
+                # The master was opened from a local cache copy, its relative paths are resolved from the canonical
+                # master on the mount. Libraries with a local copy are loaded from it, the others Blender could not
+                # find next to the copy are loaded again. Library paths stay canonical, linking the animation finds
+                # the libraries it shares with the master
+                start = os.path.dirname(source_path)
+                for block in list(local_path_blocks()):
+                    relative = block.filepath.startswith("//")
+                    if relative:
+                        block.filepath = os.path.normpath(bpy.path.abspath(block.filepath, start=start))
+                    if not isinstance(block, bpy.types.Library):
+                        continue
+                    canonical = os.path.normpath(bpy.path.abspath(block.filepath))
+                    if canonical in library_copies:
+                        block.filepath = library_copies[canonical]
+                        block.reload()
+                        block.filepath = canonical
+                    elif relative:
+                        block.reload()
+            
+            
+            def cacheable_libraries() -> list:
+                # Direct libraries without relative paths inside, a copy of them loads from any folder
+                libraries = {library.name: library for library in bpy.data.libraries if not library.parent}
+                for block in path_blocks():
+                    owner = getattr(block, "library", None) or getattr(block, "parent", None)
+                    if owner and block.filepath.startswith("//"):
+                        libraries.pop(owner.name, None)
+                return sorted(os.path.normpath(bpy.path.abspath(library.filepath)) for library in libraries.values())
+            
+            
             def cleanup_node():
                 scene = bpy.context.scene
                 tree = scene.node_tree
@@ -314,34 +479,60 @@ class BlenderSettings:
                     tree.nodes.remove(node)
             
             
-            # Execute functions
-            link_animation()
-            update_camera()
-            set_duration()
-            set_relative()
-            cleanup_node()
-            beauty_node()
-            alpha_char_node()
-            print("All operations completed successfully.")
+            def build_shot(job: dict) -> dict:
+                # The animation file has to belong to the shot that is built
+                shot = parse_shot(job["output_path"])
+                if shot and parse_shot(job["animation_file"]) != shot:
+                    raise ValueError(f"Animation file is not a file of shot {'_'.join(shot)}: "
+                                     f"{job['animation_file']}")
+            
+                timings = {}
+                started = time.perf_counter()
+            
+                # Open master file
+                bpy.ops.wm.open_mainfile(filepath=job["master_file"])
+                if job.get("master_source"):
+                    remap_to_source(job["master_source"], job.get("library_copies", {}))
+                    print(f"[SHOT_LIBRARIES] {job['output_path']}: {json.dumps(cacheable_libraries())}")
+                timings["open_master"] = time.perf_counter() - started
+            
+                # Execute functions
+                step = time.perf_counter()
+                link_animation(job["animation_file"])
+                timings["link_animation"] = time.perf_counter() - step
+            
+                step = time.perf_counter()
+                update_camera()
+                set_duration(job["start_frame"], job["end_frame"])
+                set_relative()
+                cleanup_node()
+                beauty_node(job["beauty_base_path"])
+                alpha_char_node(job["alpha_base_path"])
+                timings["setup"] = time.perf_counter() - step
+                print("All operations completed successfully.")
+            
+                # Save the modified Blender file, a staged file is uploaded to the output path by Shot Builder. Paths
+                # of a staged file or a cached master are made relative to the output folder
+                step = time.perf_counter()
+                save_path = job.get("save_path") or job["output_path"]
+                if save_path != job["output_path"] or job.get("master_source"):
+                    remap_relative(job["output_path"])
+                    bpy.ops.wm.save_as_mainfile(filepath=save_path, relative_remap=False)
+                else:
+                    bpy.ops.wm.save_as_mainfile(filepath=save_path)
+                timings["save"] = time.perf_counter() - step
+                print(f"File saved as: {save_path}")
+            
+                timings["total"] = time.perf_counter() - started
+                return timings
             
-            # Save the modified Blender file
-            bpy.ops.wm.save_as_mainfile(filepath="$OUTPUT_PATH")
-            print("File saved as: $OUTPUT_PATH")
             
-            # Quit Blender
-            bpy.ops.wm.quit_blender()
         """))
 
         script = tpl.substitute(
-            FILEPATH=master_file,
-            ANIMATION_FILE=animation_file,
             COLLECTION_LIST=collection_list,
             CAMERA_COLLECTION=camera_collection,
-            START_FRAME=start_frame,
-            END_FRAME=end_frame,
-            OUTPUT_PATH=output_path,
-            BEAUTY_BASE_PATH=beauty_base_path,
-            ALPHA_BASE_PATH=alpha_base_path,
+            PATH_TABLES=pformat(PathLayout.script_tables(), width=120),
         )
 
         return script
@@ -0,0 +1,71 @@
+import heapq
+import os
+
+from app.data.executor_config import cost_base_seconds, cost_seconds_per_mb, cost_seconds_per_frame, \
+    cost_min_history
+from app.services.shot_job import ShotJob
+
+
+class ShotCostModel:
+    def __init__(self, history: list[tuple[int, int, float]] = None):
+        # history: (animation file size, frame count, duration) of earlier builds
+        self.coefficients = self.fit(history or [])
+
+    @staticmethod
+    def fit(history: list[tuple[int, int, float]]) -> tuple[float, float, float]:
+        # Least squares fit of duration = base + per_mb * size + per_frame * frames,
+        # the defaults are kept until there is enough history or when the fit makes no sense
+        defaults = (cost_base_seconds, cost_seconds_per_mb, cost_seconds_per_frame)
+        if len(history) < cost_min_history:
+            return defaults
+        rows = [(1.0, size / 1024 ** 2, float(frames)) for size, frames, _ in history]
+        normal = [[sum(row[i] * row[j] for row in rows) for j in range(3)] for i in range(3)]
+        target = [sum(row[i] * duration for row, (_, _, duration) in zip(rows, history)) for i in range(3)]
+        solution = ShotCostModel.solve(normal, target)
+        if solution is None or any(value < 0 for value in solution):
+            return defaults
+        return solution[0], solution[1], solution[2]
+
+    @staticmethod
+    def solve(matrix: list[list[float]], vector: list[float]) -> list[float] | None:
+        # Gaussian elimination with partial pivoting, None for a singular system
+        size = len(vector)
+        rows = [matrix[i][:] + [vector[i]] for i in range(size)]
+        for column in range(size):
+            pivot = max(range(column, size), key=lambda r: abs(rows[r][column]))
+            if abs(rows[pivot][column]) < 1e-9:
+                return None
+            rows[column], rows[pivot] = rows[pivot], rows[column]
+            for r in range(column + 1, size):
+                factor = rows[r][column] / rows[column][column]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[column])]
+        solution = [0.0] * size
+        for r in reversed(range(size)):
+            solution[r] = (rows[r][size] - sum(rows[r][c] * solution[c] for c in range(r + 1, size))) / rows[r][r]
+        return solution
+
+    @staticmethod
+    def animation_size(job: ShotJob) -> int:
+        try:
+            return os.path.getsize(job.animation_file)
+        except OSError:
+            return 0
+
+    def estimate(self, job: ShotJob, past_duration: float = None) -> float:
+        # The last measured duration wins over the file size model
+        if past_duration:
+            return past_duration
+        base, per_mb, per_frame = self.coefficients
+        frames = job.end_frame - job.start_frame + 1
+        return base + per_mb * self.animation_size(job) / 1024 ** 2 + per_frame * frames
+
+    @staticmethod
+    def simulate(sessions: list[tuple[list[ShotJob], float]], slots: int) -> list[dict]:
+        # Plays the sessions in dispatch order on the free slots, returns the predicted schedule
+        free_slots = [(0.0, slot) for slot in range(max(1, slots))]
+        schedule = []
+        for jobs, cost in sessions:
+            start, slot = heapq.heappop(free_slots)
+            schedule.append({"slot": slot, "start": start, "end": start + cost, "jobs": jobs})
+            heapq.heappush(free_slots, (start + cost, slot))
+        return schedule
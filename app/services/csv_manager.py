@@ -1,4 +1,12 @@
 import csv
+import sqlite3
+from typing import Iterator
+
+from app.data.executor_config import shot_cache_path
+from app.services.shot_cache import ShotCache
+from app.services.shot_job import ShotRecord
+
+SHOT_COLUMNS = ["EP", "SEQ", "SHOT", "START_FRAME", "END_FRAME"]
 
 
 class CSVManager:
@@ -8,4 +16,75 @@ class CSVManager:
             reader = csv.reader(file)
             if skip_header:
                 next(reader)
-            return list(reader)
\ No newline at end of file
+            return list(reader)
+
+    @staticmethod
+    def read_records(file_path: str, skip_header: bool = True, errors: list = None) -> Iterator[ShotRecord]:
+        # Streams validated shot records row by row, invalid rows are left out and added to errors as (line, message)
+        errors = errors if errors is not None else []
+        seen = {}  # "ep/seq/shot" -> line of its first row, one string per shot keeps large exports small
+        with open(file_path, mode='r', newline='') as file:
+            reader = csv.reader(file)
+            if skip_header:
+                next(reader, None)
+            for row in reader:
+                line = reader.line_num
+                if not any(cell.strip() for cell in row):
+                    continue
+                if len(row) < len(SHOT_COLUMNS):
+                    errors.append((line, f"expected {len(SHOT_COLUMNS)} columns ({', '.join(SHOT_COLUMNS)}), "
+                                         f"got {len(row)}"))
+                    continue
+                ep, seq, shot = (cell.strip().lower() for cell in row[:3])
+                if not ep or not seq or not shot:
+                    errors.append((line, "EP, SEQ and SHOT must not be empty"))
+                    continue
+                try:
+                    start_frame, end_frame = int(row[3]), int(row[4])
+                except ValueError:
+                    errors.append((line, f"frame range '{row[3]}'-'{row[4]}' is not a whole number"))
+                    continue
+                if end_frame < start_frame:
+                    errors.append((line, f"END_FRAME {end_frame} is before START_FRAME {start_frame}"))
+                    continue
+                first_line = seen.setdefault(f"{ep}/{seq}/{shot}", line)
+                if first_line != line:
+                    errors.append((line, f"duplicate shot {ep} {seq} {shot}, first defined on line {first_line}"))
+                    continue
+                yield ShotRecord(ep, seq, shot, start_frame, end_frame, line)
+
+    @staticmethod
+    def cached_records(file_path: str, errors: list = None, cache_path: str = shot_cache_path) -> Iterator[ShotRecord]:
+        # Same records and errors as read_records, the CSV is only parsed again when its size or mtime changed
+        errors = errors if errors is not None else []
+        signature = ShotCache.signature(file_path)  # taken before parsing, an edit during the parse is a miss next time
+        try:
+            cache = ShotCache(cache_path)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Shot cache unavailable, reading the CSV: {e}")
+            yield from CSVManager.read_records(file_path, errors=errors)
+            return
+        try:
+            cached = cache.lookup(signature)
+            if cached:
+                csv_id, cached_errors = cached
+                errors.extend(cached_errors)
+                yield from cache.records(csv_id)
+                return
+            parse_errors = []
+            records = list(CSVManager.read_records(file_path, errors=parse_errors))
+            errors.extend(parse_errors)
+            try:
+                cache.store(signature, records, parse_errors)
+            except sqlite3.Error as e:
+                print(f"Could not update the shot cache: {e}")
+            yield from records
+        finally:
+            cache.close()
+
+    @staticmethod
+    def format_errors(file_path: str, errors: list[tuple[int, str]], limit: int = 20) -> str:
+        lines = [f"Line {line}: {message}" for line, message in errors[:limit]]
+        if len(errors) > limit:
+            lines.append(f"... and {len(errors) - limit} more")
+        return f"{len(errors)} invalid row(s) in {file_path}:\n" + "\n".join(lines)
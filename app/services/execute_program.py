@@ -1,16 +1,50 @@
+import os
+import signal
 import subprocess
 import tempfile
 
 class ExecuteProgram:
     @staticmethod
-    def blender_execute(blender_path: str, script: str):
+    def write_script(script: str) -> str:
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as tmp:
+            tmp.write(script)
+            return tmp.name
+
+    @staticmethod
+    def blender_command(blender_path: str, script_path: str) -> list[str]:
+        # --python-exit-code makes an uncaught script error visible in the exit status
+        return [blender_path, "--background", "--python-exit-code", "1", "--python", script_path]
+
+    @staticmethod
+    def blender_spawn(blender_path: str, script_path: str) -> subprocess.Popen:
+        # stdout and stderr are merged into one pipe, read by the caller without blocking
+        return subprocess.Popen(ExecuteProgram.blender_command(blender_path, script_path), stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, start_new_session=True)
+
+    @staticmethod
+    def blender_worker_spawn(blender_path: str, script_path: str) -> subprocess.Popen:
+        # Persistent worker: jobs are sent as JSON lines on stdin
+        return subprocess.Popen(ExecuteProgram.blender_command(blender_path, script_path), stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, start_new_session=True)
+
+    @staticmethod
+    def kill_tree(process: subprocess.Popen):
+        # Spawned processes lead their own session, so the group id is the process id
+        if process.poll() is not None:
+            return
         try:
-            with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as tmp:
-                tmp.write(script)
-                tmp_path = tmp.name
+            os.killpg(process.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError, PermissionError):
+            process.kill()
 
-            subprocess.run([blender_path, "--background", "--python", tmp_path])
-            return True
-        except subprocess.CalledProcessError as e:
+    @staticmethod
+    def blender_execute(blender_path: str, script: str):
+        tmp_path = ExecuteProgram.write_script(script)
+        try:
+            result = subprocess.run(ExecuteProgram.blender_command(blender_path, tmp_path))
+            return result.returncode == 0
+        except OSError as e:
             print(f"An error occurred while executing Blender: {e}")
-            return False
\ No newline at end of file
+            return False
+        finally:
+            os.remove(tmp_path)
@@ -1,22 +1,72 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from app.data.executor_config import directory_workers
+from app.data.project import path_layout
+from app.services.path_template import PathTemplate, PathLayout
+
 
 class FileManager:
+    # ShotTree of the current project, exists and list_dir answer from it and ask the file system when it cannot tell
+    shot_tree = None
+
+    @staticmethod
+    def use_shot_tree(shot_tree):
+        FileManager.shot_tree = shot_tree
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        if FileManager.shot_tree is not None:
+            known = FileManager.shot_tree.exists(str(path))
+            if known is not None:
+                return known
+        return os.path.exists(path)
+
+    @staticmethod
+    def list_dir(path: str) -> list[str]:
+        if FileManager.shot_tree is not None:
+            known = FileManager.shot_tree.list_dir(str(path))
+            if known is not None:
+                return known
+        return sorted(os.listdir(path))
+
     @staticmethod
     def get_project_path(project_code: str) -> str:
-        return os.path.join("/mnt", project_code)
+        return PathTemplate.compile(path_layout["root"]).render(drive=project_code)
+
+    @staticmethod
+    def generate_shot_path(project_code: str, project_path: str, production: str, division: str, ep: str, seq: str,
+                           shot: str) -> str:
+        # Only builds the path, the folders of the shots that are built are made by ensure_directories
+        return PathLayout.templates_of(project_code)["shot_folder"].render(root=project_path, phase=production,
+                                                                           folder=division, ep=ep, seq=seq, shot=shot)
 
     @staticmethod
-    def generate_shot_path(project_path: str, production: str, division: str, ep: str, seq: str, shot: str) -> str:
-        shot_path = os.path.join(project_path, production, division, f"{ep}", f"{ep}_{seq}",
-                            f"{ep}_{seq}_{shot}")
-        os.makedirs(shot_path, exist_ok=True)
-        return shot_path
+    def ensure_directories(paths, max_workers: int = directory_workers) -> dict[str, OSError]:
+        # Creates every unique folder once, in parallel, returns the folders that could not be created
+        unique = sorted(set(paths))
+        if not unique:
+            return {}
+
+        def ensure(path: str) -> OSError | None:
+            # One stat for a folder that already exists, makedirs tolerates another thread creating a parent
+            if os.path.isdir(path):
+                return None
+            try:
+                os.makedirs(path, exist_ok=True)
+            except OSError as e:
+                return e
+            return None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique)))) as pool:
+            errors = pool.map(ensure, unique)
+            return {path: error for path, error in zip(unique, errors) if error is not None}
 
     @staticmethod
     def generate_file_name(project_code: str, ep: str, seq: str, shot: str, division: str, extension: str) -> str:
-        return f"{project_code}_{ep}_{seq}_{shot}_{division}.{extension}"
+        return PathLayout.templates_of(project_code)["shot_file"].render(code=project_code, ep=ep, seq=seq, shot=shot,
+                                                                         division=division, extension=extension)
 
     @staticmethod
     def combine_paths(*args: str) -> Path:
@@ -24,5 +74,5 @@ class FileManager:
 
     @staticmethod
     def generate_exr_type(project_code: str, project_path: str, ep: str, seq: str, shot: str, exr_type: str) -> str:
-        return os.path.join(project_path, f"{ep}", f"{ep}_{seq}",
-                            f"{ep}_{seq}_{shot}", "exr", exr_type, f"{project_code}_{ep}_{seq}_{shot}_{exr_type}_####.exr")
+        return PathLayout.templates_of(project_code)["exr"].render(output_root=project_path, code=project_code, ep=ep,
+                                                                   seq=seq, shot=shot, layer=exr_type)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import mmap
+import os
+
+from app.data.blender_config import collection_list, camera_collection_name
+from app.services.blender_settings import BlenderSettings
+from app.services.file_manager import FileManager
+from app.services.shot_job import ShotJob
+
+SIDECAR_SUFFIX = ".fingerprint.json"
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class ShotFingerprint:
+    @staticmethod
+    def sidecar_path(lighting_file: str) -> str:
+        return lighting_file + SIDECAR_SUFFIX
+
+    @staticmethod
+    def file_signature(path: str, content_hash: bool = False, stat_file=os.stat) -> dict:
+        try:
+            stat = stat_file(path)
+        except OSError:
+            return {"path": path, "missing": True}
+        signature = {"path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if content_hash:
+            signature["blake2b"] = ShotFingerprint.hash_file(path, stat.st_size)
+        return signature
+
+    @staticmethod
+    def hash_file(path: str, size: int) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        if size == 0:
+            return digest.hexdigest()
+        # mmap lets the digest read straight from the page cache, slices of a memoryview are not copied. The view
+        # has to be released before the map is closed
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                memoryview(mapped) as view:
+            for offset in range(0, size, HASH_CHUNK_SIZE):
+                digest.update(view[offset:offset + HASH_CHUNK_SIZE])
+        return digest.hexdigest()
+
+    @staticmethod
+    def script_hash() -> str:
+        script = BlenderSettings.generate_lighting_functions(collection_list=collection_list,
+                                                             camera_collection=camera_collection_name)
+        return hashlib.blake2b(script.encode("utf-8"), digest_size=20).hexdigest()
+
+    @staticmethod
+    def compute(job: ShotJob, script_hash: str, content_hash: bool = False, stat_file=os.stat) -> str:
+        data = {
+            "master": ShotFingerprint.file_signature(job.master_file, content_hash, stat_file),
+            "animation": ShotFingerprint.file_signature(job.animation_file, content_hash, stat_file),
+            "frame_range": [job.start_frame, job.end_frame],
+            "collection_list": [list(item) for item in collection_list],
+            "camera_collection": camera_collection_name,
+            "beauty_path": job.beauty_path,
+            "alpha_path": job.alpha_path,
+            "script": script_hash,
+        }
+        return hashlib.blake2b(json.dumps(data, sort_keys=True).encode("utf-8"), digest_size=20).hexdigest()
+
+    @staticmethod
+    def read(lighting_file: str) -> str | None:
+        try:
+            with open(ShotFingerprint.sidecar_path(lighting_file), "r") as file:
+                return json.load(file).get("fingerprint")
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def write(job: ShotJob):
+        if not job.fingerprint:
+            return
+        sidecar = ShotFingerprint.sidecar_path(job.lighting_file)
+        tmp_path = sidecar + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"fingerprint": job.fingerprint, "shot_file": job.shot_file}, file)
+        os.replace(tmp_path, sidecar)
+
+    @staticmethod
+    def split_up_to_date(jobs: list[ShotJob], force: bool = False,
+                         content_hash: bool = False) -> tuple[list[ShotJob], list[ShotJob]]:
+        # Sets job.fingerprint on every job, returns (jobs to build, jobs already up to date)
+        script_hash = ShotFingerprint.script_hash()
+        stale, up_to_date = [], []
+        for job in jobs:
+            job.fingerprint = ShotFingerprint.compute(job, script_hash, content_hash)
+            if not force and FileManager.exists(job.lighting_file) and \
+                    ShotFingerprint.read(job.lighting_file) == job.fingerprint:
+                up_to_date.append(job)
+            else:
+                stale.append(job)
+        return stale, up_to_date
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.data.executor_config import prefetch_budget, prefetch_workers
+from app.services.fingerprint import HASH_CHUNK_SIZE
+
+
+class InputPrefetcher:
+    def __init__(self, budget: int = prefetch_budget, max_workers: int = prefetch_workers):
+        # Warms the page cache with files Blender opens soon. posix_fadvise asks the kernel to read the file in the
+        # background, where it is missing (Windows, macOS) the file is streamed once and the data dropped
+        self.budget = budget
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._scheduled = set()  # paths in flight or read ahead
+        self._reserved = {}  # path -> bytes read ahead and not opened yet
+        self._deferred = set()  # paths that did not fit, tried again once the budget frees up
+        self.prefetched = {}  # path -> seconds the read ahead took
+
+    def schedule(self, paths):
+        with self._lock:
+            paths = [path for path in dict.fromkeys(paths)
+                     if path not in self._scheduled and path not in self._deferred]
+            self._scheduled.update(paths)
+        for path in paths:
+            self._pool.submit(self.warm, path)
+
+    def warm(self, path: str):
+        started = time.monotonic()
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            return
+        with self._lock:
+            if path not in self._scheduled:
+                return
+            if sum(self._reserved.values()) + size > self.budget:
+                self._scheduled.discard(path)
+                self._deferred.add(path)
+                return
+            self._reserved[path] = size
+        try:
+            with open(path, "rb") as file:
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(file.fileno(), 0, size, os.POSIX_FADV_WILLNEED)
+                else:
+                    while file.read(HASH_CHUNK_SIZE):
+                        pass
+        except OSError:
+            # Blender reports the real error when it opens the file
+            with self._lock:
+                self._reserved.pop(path, None)
+            return
+        self.prefetched[path] = time.monotonic() - started
+
+    def consume(self, path: str) -> bool:
+        # Blender opens the file now, its share of the budget is free again. True when it was read ahead
+        with self._lock:
+            self._scheduled.discard(path)
+            freed = self._reserved.pop(path, None) is not None
+            if freed:
+                self._deferred.clear()
+        return self.prefetched.pop(path, None) is not None
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
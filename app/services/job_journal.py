@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+
+from app.data.executor_config import journal_path
+from app.services.shot_job import ShotJob
+
+# Job states, "done" jobs are skipped when a run is resumed
+JOB_STATES = ["queued", "running", "retrying", "done", "failed", "skipped", "cancelled"]
+# Run states, "running" and "cancelled" runs can be resumed, "abandoned" ones were declined
+RUN_STATES = ["running", "finished", "cancelled", "abandoned"]
+
+
+class JobJournal:
+    def __init__(self, path: str = journal_path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The executor writes from its own thread, every access goes through the lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                label TEXT NOT NULL,
+                state TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS jobs (
+                run_id INTEGER NOT NULL,
+                output_path TEXT NOT NULL,
+                shot_file TEXT NOT NULL,
+                inputs TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                queued_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                duration REAL,
+                message TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (run_id, output_path)
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                run_id INTEGER NOT NULL,
+                output_path TEXT NOT NULL,
+                state TEXT NOT NULL,
+                time REAL NOT NULL,
+                message TEXT NOT NULL DEFAULT ''
+            );
+            CREATE TABLE IF NOT EXISTS shot_stats (
+                output_path TEXT PRIMARY KEY,
+                shot_file TEXT NOT NULL,
+                peak_memory INTEGER NOT NULL DEFAULT 0,
+                duration REAL,
+                frames INTEGER,
+                animation_size INTEGER,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS runs_label ON runs (label, state);
+        """)
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(shot_stats)")]
+        if "animation_size" not in columns:
+            self._connection.execute("ALTER TABLE shot_stats ADD COLUMN animation_size INTEGER")
+        self._connection.commit()
+
+    @staticmethod
+    def run_label(project_code: str, csv_path: str, master_file: str) -> str:
+        return "|".join([project_code, os.path.abspath(csv_path), os.path.abspath(master_file)])
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def start_run(self, label: str, jobs: list[ShotJob]) -> int:
+        now = time.time()
+        with self._lock, self._connection:
+            run_id = self._connection.execute("INSERT INTO runs (label, state, created_at) VALUES (?, 'running', ?)",
+                                              (label, now)).lastrowid
+            self._connection.executemany(
+                "INSERT INTO jobs (run_id, output_path, shot_file, inputs, state, queued_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?)",
+                [(run_id, job.lighting_file, job.shot_file, json.dumps(asdict(job)), now) for job in jobs])
+            self._connection.executemany(
+                "INSERT INTO events (run_id, output_path, state, time) VALUES (?, ?, 'queued', ?)",
+                [(run_id, job.lighting_file, now) for job in jobs])
+        return run_id
+
+    def mark(self, run_id: int, output_path: str, state: str, message: str = "", duration: float = None):
+        now = time.time()
+        with self._lock, self._connection:
+            if state == "running":
+                self._connection.execute(
+                    "UPDATE jobs SET state = ?, started_at = ?, attempts = attempts + 1 "
+                    "WHERE run_id = ? AND output_path = ?", (state, now, run_id, output_path))
+            else:
+                self._connection.execute(
+                    "UPDATE jobs SET state = ?, finished_at = ?, duration = COALESCE(?, duration), message = ? "
+                    "WHERE run_id = ? AND output_path = ?", (state, now, duration, message, run_id, output_path))
+            self._connection.execute("INSERT INTO events (run_id, output_path, state, time, message) "
+                                     "VALUES (?, ?, ?, ?, ?)", (run_id, output_path, state, now, message))
+
+    def finish_run(self, run_id: int, state: str = "finished"):
+        with self._lock, self._connection:
+            self._connection.execute("UPDATE runs SET state = ?, finished_at = ? WHERE run_id = ?",
+                                     (state, time.time(), run_id))
+
+    def unfinished_run(self, label: str) -> int | None:
+        # Latest run with this label that crashed or was cancelled
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT run_id FROM runs WHERE label = ? AND state IN ('running', 'cancelled') "
+                "ORDER BY run_id DESC LIMIT 1",
+                (label,)).fetchone()
+        return row[0] if row else None
+
+    def job_states(self, run_id: int) -> dict:
+        with self._lock:
+            rows = self._connection.execute("SELECT output_path, state FROM jobs WHERE run_id = ?",
+                                            (run_id,)).fetchall()
+        return dict(rows)
+
+    def resume_jobs(self, run_id: int) -> tuple[list[ShotJob], int]:
+        # Completed jobs are skipped, in-flight, queued and failed ones run again
+        with self._lock:
+            rows = self._connection.execute("SELECT inputs, state FROM jobs WHERE run_id = ? ORDER BY rowid",
+                                            (run_id,)).fetchall()
+        jobs = [ShotJob(**json.loads(inputs)) for inputs, state in rows if state != "done"]
+        with self._lock, self._connection:
+            self._connection.execute("UPDATE runs SET state = 'running', finished_at = NULL WHERE run_id = ?",
+                                     (run_id,))
+            self._connection.execute("UPDATE jobs SET state = 'queued' WHERE run_id = ? AND state != 'done'",
+                                     (run_id,))
+        return jobs, len(rows) - len(jobs)
+
+    def record_shot(self, output_path: str, shot_file: str, peak_memory: int, duration: float, frames: int,
+                    animation_size: int):
+        # Latest measurements of a shot, used to predict memory and duration of the next build
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO shot_stats (output_path, shot_file, peak_memory, duration, frames, animation_size, "
+                "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (output_path) DO UPDATE SET "
+                "peak_memory = CASE WHEN excluded.peak_memory > 0 THEN excluded.peak_memory ELSE peak_memory END, "
+                "duration = excluded.duration, frames = excluded.frames, animation_size = excluded.animation_size, "
+                "updated_at = excluded.updated_at",
+                (output_path, shot_file, peak_memory, duration, frames, animation_size, time.time()))
+
+    def shot_history(self, limit: int = 2000) -> list[tuple[int, int, float]]:
+        # (animation size, frames, duration) of the most recent builds, for the cost model
+        with self._lock:
+            return self._connection.execute(
+                "SELECT animation_size, frames, duration FROM shot_stats "
+                "WHERE duration IS NOT NULL AND animation_size > 0 ORDER BY updated_at DESC LIMIT ?",
+                (limit,)).fetchall()
+
+    def shot_stats(self, output_paths: list[str]) -> dict:
+        # output_path -> (peak_memory, duration)
+        stats = {}
+        with self._lock:
+            for start in range(0, len(output_paths), 500):
+                chunk = output_paths[start:start + 500]
+                rows = self._connection.execute(
+                    f"SELECT output_path, peak_memory, duration FROM shot_stats "
+                    f"WHERE output_path IN ({', '.join('?' * len(chunk))})", chunk).fetchall()
+                stats.update((row[0], (row[1], row[2])) for row in rows)
+        return stats
@@ -0,0 +1,146 @@
+import re
+from functools import lru_cache
+from operator import itemgetter
+from string import Formatter
+
+from app.data.project import project_list, division_list, path_layout, project_path_layouts, path_field_patterns
+
+# Regex of a field without an entry in path_field_patterns
+DEFAULT_FIELD_PATTERN = r"[^/_]+"
+
+
+class PathTemplate:
+    def __init__(self, template: str):
+        # Parsed once into the literal parts and field names, a format string that renders the template and one
+        # regex that reads the fields back from a path
+        self.template = template
+        self.parts = []
+        for literal, field, format_spec, conversion in Formatter().parse(template):
+            plain = field is None or field.isidentifier()
+            if not plain or format_spec or conversion:
+                raise ValueError(f"Path template fields have to be plain names: {template}")
+            self.parts.append((literal, field))
+        self.fields = tuple(dict.fromkeys(field for _, field in self.parts if field))
+        # The parts joined once into a positional %-format, a render picks the values out of the field dict in
+        # template order and formats them, both in C
+        self.format = "".join(literal.replace("%", "%%") + ("%s" if field else "") for literal, field in self.parts)
+        order = [field for _, field in self.parts if field]
+        self.values = itemgetter(*order) if order else lambda fields: ()
+
+        pattern, seen = [], set()
+        for literal, field in self.parts:
+            pattern.append(re.escape(literal))
+            if field in seen:
+                # A field used twice has to hold the same value both times
+                pattern.append(f"(?P={field})")
+            elif field:
+                seen.add(field)
+                pattern.append(f"(?P<{field}>{path_field_patterns.get(field, DEFAULT_FIELD_PATTERN)})")
+        self.pattern = "".join(pattern)
+        self.regex = re.compile(self.pattern, re.IGNORECASE)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def compile(template: str) -> "PathTemplate":
+        # Every template string is parsed and compiled once per process
+        return PathTemplate(template)
+
+    def render(self, **fields) -> str:
+        return self.render_fields(fields)
+
+    def render_fields(self, fields: dict) -> str:
+        try:
+            return self.format % self.values(fields)
+        except KeyError as e:
+            raise TypeError(f"Path template field {e} is missing: {self.template}") from None
+
+    def render_all(self, rows) -> list[str]:
+        # Bulk render of (ep, seq, shot) rows, e.g. ShotRecords, for a template bound down to the shot fields
+        render = self.render_fields
+        return [render({"ep": row[0], "seq": row[1], "shot": row[2]}) for row in rows]
+
+    def bind(self, **fields) -> "PathTemplate":
+        # Fills the given fields in for good, fields not in the template are ignored
+        template = "".join(
+            literal.replace("{", "{{").replace("}", "}}") +
+            ("" if field is None else
+             str(fields[field]).replace("{", "{{").replace("}", "}}") if field in fields else f"{{{field}}}")
+            for literal, field in self.parts)
+        return PathTemplate.compile(template)
+
+    def prefix(self, field: str) -> "PathTemplate":
+        # The template cut off right after the first use of field
+        end = next(i for i, (_, name) in enumerate(self.parts) if name == field)
+        return PathTemplate.compile("".join(
+            literal.replace("{", "{{").replace("}", "}}") + (f"{{{name}}}" if name else "")
+            for literal, name in self.parts[:end + 1]))
+
+    def parse(self, path: str) -> dict | None:
+        match = self.regex.fullmatch(path)
+        return match.groupdict() if match else None
+
+    def __add__(self, other: "PathTemplate") -> "PathTemplate":
+        return PathTemplate.compile(self.template + other.template)
+
+
+class PathLayout:
+    def __init__(self, project: list):
+        # Templates of one project with the project fields filled in, renders only fill in the shot fields
+        drive, _, code, output_drive = project
+        templates = PathLayout.templates_of(code)
+        self.code = code
+        self.root = templates["root"].render(drive=drive)
+        self.output_root = templates["output_root"].render(output_drive=output_drive)
+        project_fields = {"drive": drive, "output_drive": output_drive, "code": code, "root": self.root,
+                          "output_root": self.output_root}
+        self.templates = {name: template.bind(**project_fields) for name, template in templates.items()}
+        # Folder and file name of a shot file as one template, ep/seq/shot in both have to agree
+        self.shot_file_path = self.templates["shot_folder"] + PathTemplate.compile("/") + self.templates["shot_file"]
+        # division code -> templates of the path and the name of its shot files, layer -> template of its EXR files
+        self.shot_paths = {division[0]: self.shot_path(division) for division in division_list}
+        self.shot_names = {division[0]: self.templates["shot_file"].bind(division=division[0], extension="blend")
+                           for division in division_list}
+        self.exr_paths = {}
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def templates_of(code: str) -> dict[str, PathTemplate]:
+        # path_layout with the overrides of the project, compiled
+        return {name: PathTemplate.compile(template)
+                for name, template in {**path_layout, **project_path_layouts.get(code, {})}.items()}
+
+    @staticmethod
+    def of(project: list) -> "PathLayout":
+        return PathLayout.cached(tuple(project))
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def cached(project: tuple) -> "PathLayout":
+        return PathLayout(list(project))
+
+    def shot_path(self, division: list, extension: str = "blend") -> PathTemplate:
+        return self.shot_file_path.bind(division=division[0], phase=division[2], folder=division[3],
+                                        extension=extension)
+
+    def exr_path(self, layer: str) -> PathTemplate:
+        if layer not in self.exr_paths:
+            self.exr_paths[layer] = self.templates["exr"].bind(layer=layer)
+        return self.exr_paths[layer]
+
+    def parse_shot(self, path: str) -> tuple[str, str, str] | None:
+        # (ep, seq, shot) of a shot file of any division, None when the path is not in this layout
+        fields = self.shot_file_path.parse(path)
+        if not fields:
+            return None
+        return fields["ep"].lower(), fields["seq"].lower(), fields["shot"].lower()
+
+    def script_table(self) -> dict:
+        # Compiled templates and regexes of the project for the Blender scripts, which cannot import app
+        # shot_name is the start of a shot file name up to the shot, for names with a suffix like _lgt_v002
+        tables = {"shot_file_path": self.shot_file_path, "shot_file": self.templates["shot_file"],
+                  "shot_name": self.templates["shot_file"].prefix("shot"), "exr": self.templates["exr"]}
+        return {name: (template.template, template.pattern) for name, template in tables.items()}
+
+    @staticmethod
+    def script_tables() -> dict:
+        return {project[2]: PathLayout.of(project).script_table() for project in project_list}
@@ -0,0 +1,116 @@
+import os
+import time
+
+from app.data.executor_config import memory_limit_fraction, cpu_limit, swap_pages_per_second, swap_backoff
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+class ResourceMonitor:
+    def __init__(self, memory_limit: int = None, cpu_limit: float = cpu_limit):
+        # Without /proc (Windows, macOS) nothing is sampled and only the worker count limits concurrency
+        self.available = os.path.exists("/proc/meminfo")
+        total_memory = self.meminfo().get("MemTotal", 0)
+        self.memory_limit = memory_limit or int(total_memory * memory_limit_fraction)
+        self.cpu_capacity = (os.cpu_count() or 1) * cpu_limit
+        self._cpu_times = {}  # session pid -> (cpu seconds, monotonic time)
+        self._swap_sample = None  # (pages swapped, monotonic time)
+        self.swapping_until = 0.0
+
+    @staticmethod
+    def meminfo() -> dict:
+        # /proc/meminfo values in bytes
+        values = {}
+        try:
+            with open("/proc/meminfo", "r") as file:
+                for line in file:
+                    key, _, value = line.partition(":")
+                    parts = value.split()
+                    if parts:
+                        values[key] = int(parts[0]) * (1024 if parts[-1] == "kB" else 1)
+        except OSError:
+            pass
+        return values
+
+    @staticmethod
+    def swapped_pages() -> int:
+        pages = 0
+        try:
+            with open("/proc/vmstat", "r") as file:
+                for line in file:
+                    key, _, value = line.partition(" ")
+                    if key in ("pswpin", "pswpout"):
+                        pages += int(value)
+        except OSError:
+            pass
+        return pages
+
+    @staticmethod
+    def session_usage(session_ids: set) -> dict:
+        # session id -> (rss bytes, cpu seconds) summed over every process of the session,
+        # Blender is started with start_new_session so its pid is the session id of all its children
+        usage = {}
+        for entry in os.scandir("/proc"):
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(os.path.join(entry.path, "stat"), "r") as file:
+                    stat = file.read()
+            except OSError:
+                continue
+            # The command name may contain spaces, the fields after it are fixed
+            fields = stat[stat.rfind(")") + 2:].split()
+            session_id = int(fields[3])
+            if session_id not in session_ids:
+                continue
+            rss = int(fields[21]) * PAGE_SIZE
+            cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+            total_rss, total_cpu = usage.get(session_id, (0, 0.0))
+            usage[session_id] = (total_rss + rss, total_cpu + cpu_seconds)
+        return usage
+
+    @property
+    def swapping(self) -> bool:
+        return time.monotonic() < self.swapping_until
+
+    def sample(self, sessions: list) -> bool:
+        # Updates rss, cpu and the per-shot peak of every session, returns True when swapping was just detected
+        if not self.available:
+            return False
+        now = time.monotonic()
+        usage = self.session_usage({session.process.pid for session in sessions})
+        for session in sessions:
+            rss, cpu_seconds = usage.get(session.process.pid, (0, 0.0))
+            previous = self._cpu_times.get(session.process.pid)
+            self._cpu_times[session.process.pid] = (cpu_seconds, now)
+            session.rss = rss
+            if previous and now > previous[1]:
+                session.cpu = max(0.0, cpu_seconds - previous[0]) / (now - previous[1])
+            session.cpu_time = cpu_seconds
+            if session.current_shot is not None:
+                session.shot_peaks[session.current_shot] = max(session.shot_peaks.get(session.current_shot, 0), rss)
+        alive = {session.process.pid for session in sessions}
+        for pid in [pid for pid in self._cpu_times if pid not in alive]:
+            del self._cpu_times[pid]
+
+        pages = self.swapped_pages()
+        previous_swap, self._swap_sample = self._swap_sample, (pages, now)
+        if previous_swap and now > previous_swap[1]:
+            rate = (pages - previous_swap[0]) / (now - previous_swap[1])
+            if rate > swap_pages_per_second:
+                started = not self.swapping
+                self.swapping_until = now + swap_backoff
+                return started
+        return False
+
+    def can_start(self, sessions: list, job_memory: int) -> bool:
+        # One Blender may always run, otherwise a shot larger than the limit would never start
+        if not self.available or not sessions:
+            return True
+        if self.swapping:
+            return False
+        predicted = sum(max(session.rss, session.predicted_memory) for session in sessions) + job_memory
+        if predicted > self.memory_limit:
+            return False
+        return sum(session.cpu for session in sessions) < self.cpu_capacity
@@ -0,0 +1,54 @@
+import os
+
+from app.data.project import project_list, division_list
+from app.services.file_manager import FileManager
+from app.services.path_template import PathLayout
+from app.services.shot_job import ShotJob
+
+
+class ShotBuilder:
+    @staticmethod
+    def find_project(name: str) -> list | None:
+        # Accepts the drive letter, project name or project code
+        name = name.lower()
+        return next((p for p in project_list if name in (p[0].lower(), p[1].lower(), p[2].lower())), None)
+
+    @staticmethod
+    def build_job(project_data: list, master_file: str, ep: str, seq: str, shot: str, start_frame: int,
+                  end_frame: int) -> ShotJob:
+        return ShotBuilder.build_jobs(project_data, master_file, [(ep, seq, shot, start_frame, end_frame)])[0]
+
+    @staticmethod
+    def build_jobs(project_data: list, master_file: str, records) -> list[ShotJob]:
+        # Jobs of (ep, seq, shot, start_frame, end_frame) rows, e.g. ShotRecords. The layout templates are bound
+        # to the project once, every path of a shot is then one format of the same field dict
+        layout = PathLayout.of(project_data)
+        animation_path = layout.shot_paths[division_list[0][0]].render_fields
+        lighting_path = layout.shot_paths[division_list[1][0]].render_fields
+        lighting_name = layout.shot_names[division_list[1][0]].render_fields
+        beauty_path = layout.exr_path("beauty").render_fields
+        alpha_path = layout.exr_path("alpha_char").render_fields
+        master_file = str(master_file)
+        jobs = []
+        for ep, seq, shot, start_frame, end_frame, *_ in records:
+            fields = {"ep": ep, "seq": seq, "shot": shot}
+            jobs.append(ShotJob(shot_file=lighting_name(fields), ep=ep, seq=seq, shot=shot,
+                                start_frame=start_frame, end_frame=end_frame, master_file=master_file,
+                                animation_file=animation_path(fields), lighting_file=lighting_path(fields),
+                                beauty_path=beauty_path(fields), alpha_path=alpha_path(fields)))
+        return jobs
+
+    @staticmethod
+    def shot_folders(jobs: list[ShotJob]) -> set[str]:
+        # Animation and lighting folders of the jobs, refreshed in the shot tree index before their files are checked
+        return {os.path.dirname(path) for job in jobs for path in (job.animation_file, job.lighting_file)}
+
+    @staticmethod
+    def split_missing(jobs: list[ShotJob]) -> tuple[list[ShotJob], list[ShotJob]]:
+        ready, missing = [], []
+        for job in jobs:
+            if FileManager.exists(job.animation_file):
+                ready.append(job)
+            else:
+                missing.append(job)
+        return ready, missing
@@ -0,0 +1,83 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Iterator
+
+from app.data.executor_config import shot_cache_path
+from app.services.shot_job import ShotRecord
+
+
+class ShotCache:
+    # Parsed shot CSVs keyed by path, size and mtime. The Blender scripts read the same file with sqlite3, so the
+    # schema is the interface: shots are looked up by (csv_id, ep, seq, shot) through the primary key
+    def __init__(self, path: str = shot_cache_path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS csv_files (
+                csv_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT NOT NULL UNIQUE,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                errors TEXT NOT NULL,
+                cached_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS shots (
+                csv_id INTEGER NOT NULL,
+                ep TEXT NOT NULL,
+                seq TEXT NOT NULL,
+                shot TEXT NOT NULL,
+                start_frame INTEGER NOT NULL,
+                end_frame INTEGER NOT NULL,
+                line INTEGER NOT NULL,
+                PRIMARY KEY (csv_id, ep, seq, shot)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS shots_line ON shots (csv_id, line);
+        """)
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    @staticmethod
+    def signature(file_path: str) -> tuple[str, int, int]:
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+    def lookup(self, signature: tuple[str, int, int]) -> tuple[int, list] | None:
+        # (csv_id, errors) when the cached parse still matches the file
+        row = self._connection.execute("SELECT csv_id, errors FROM csv_files WHERE path = ? AND size = ? "
+                                       "AND mtime_ns = ?", signature).fetchone()
+        if row is None:
+            return None
+        return row[0], [tuple(error) for error in json.loads(row[1])]
+
+    def records(self, csv_id: int) -> Iterator[ShotRecord]:
+        cursor = self._connection.execute("SELECT ep, seq, shot, start_frame, end_frame, line FROM shots "
+                                          "WHERE csv_id = ? ORDER BY line", (csv_id,))
+        for row in cursor:
+            yield ShotRecord(*row)
+
+    def find(self, csv_id: int, ep: str, seq: str, shot: str) -> ShotRecord | None:
+        row = self._connection.execute("SELECT ep, seq, shot, start_frame, end_frame, line FROM shots "
+                                       "WHERE csv_id = ? AND ep = ? AND seq = ? AND shot = ?",
+                                       (csv_id, ep, seq, shot)).fetchone()
+        return ShotRecord(*row) if row else None
+
+    def store(self, signature: tuple[str, int, int], records: list[ShotRecord], errors: list):
+        with self._connection:
+            self._connection.execute(
+                "INSERT INTO csv_files (path, size, mtime_ns, errors, cached_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+                "errors = excluded.errors, cached_at = excluded.cached_at",
+                (*signature, json.dumps(errors), time.time()))
+            csv_id = self._connection.execute("SELECT csv_id FROM csv_files WHERE path = ?",
+                                              (signature[0],)).fetchone()[0]
+            self._connection.execute("DELETE FROM shots WHERE csv_id = ?", (csv_id,))
+            self._connection.executemany("INSERT INTO shots VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                         ((csv_id, *record) for record in records))
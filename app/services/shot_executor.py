@@ -0,0 +1,709 @@
+import itertools
+import json
+import math
+import os
+import selectors
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from app.data.blender_config import collection_list, camera_collection_name
+from app.data.executor_config import default_worker_count, default_shots_per_session, worker_start_timeout, \
+    worker_health_interval, worker_health_timeout, log_root, job_timeout, no_output_timeout, max_retries, \
+    retry_backoff, transient_failure_patterns, default_shot_memory, resource_sample_interval, \
+    swap_backoff, prefetch_depth
+from app.services.blender_session import BlenderSession, WORKER_REPLY_PREFIX
+from app.services.blend_cache import BlendCache
+from app.services.blender_settings import BlenderSettings
+from app.services.cost_model import ShotCostModel
+from app.services.execute_program import ExecuteProgram
+from app.services.file_manager import FileManager
+from app.services.fingerprint import ShotFingerprint
+from app.services.input_prefetcher import InputPrefetcher
+from app.services.job_journal import JobJournal
+from app.services.resource_monitor import ResourceMonitor
+from app.services.shot_job import ShotJob, ShotResult
+from app.services.shot_uploader import ShotUploader
+
+# Result message of a shot taken away from the run while it was queued or building
+DISCARDED_MESSAGE = "Discarded"
+
+
+class ShotExecutor:
+    def __init__(self, blender_path: str, max_workers: int = default_worker_count,
+                 shots_per_session: int = default_shots_per_session, persistent: bool = False,
+                 log_dir: str = None, job_timeout: float = job_timeout, no_output_timeout: float = no_output_timeout,
+                 max_retries: int = max_retries, journal: JobJournal = None, poll_interval: float = 0.2,
+                 memory_limit: int = None, longest_first: bool = True, staging_dir: str = None,
+                 blend_cache: BlendCache = None, prefetch_depth: int = prefetch_depth):
+        self.blender_path = blender_path
+        self.journal = journal
+        self.log_dir = log_dir
+        self.job_timeout = job_timeout
+        self.no_output_timeout = no_output_timeout
+        self.max_retries = max(0, max_retries)
+        self.max_workers = max(1, max_workers)
+        self.shots_per_session = max(1, shots_per_session)
+        self.persistent = persistent
+        self.poll_interval = poll_interval
+        self.monitor = ResourceMonitor(memory_limit)
+        self.longest_first = longest_first
+        self.staging_dir = None
+        self.set_staging(staging_dir)
+        self.blend_cache = blend_cache
+        self.prefetch_depth = max(0, prefetch_depth)
+        self._local_masters = {}  # mastershot path -> local copy from the blend cache
+        self._local_libraries = {}  # mastershot path -> {library path: local copy}, once its libraries are known
+        self.cost_model = ShotCostModel()
+        self._shot_stats = {}  # output_path -> (peak_memory, duration) from earlier builds
+        self._costs = {}  # output_path -> estimated seconds
+        self._cancel_event = threading.Event()
+        self._discarded = set()  # output paths to drop from the running run, added from other threads
+        self._discard_lock = threading.Lock()
+        self.last_log_dir = None
+        self._workers = []  # persistent worker sessions kept between runs
+        self._worker_script_path = None
+
+    def set_staging(self, staging_dir: str | None):
+        # Blender saves to staging_dir/<pid> and the uploader moves the file to the mount, None saves in place
+        self.staging_dir = os.path.join(staging_dir, str(os.getpid())) if staging_dir else None
+
+    def generate_script(self, jobs: list[ShotJob]) -> str:
+        return BlenderSettings.generate_lighting_batch_script(jobs=[self.script_job(job) for job in jobs],
+                                                              collection_list=collection_list,
+                                                              camera_collection=camera_collection_name)
+
+    def script_job(self, job: ShotJob) -> dict:
+        # A cached mastershot is opened from its local copy, its relative paths are resolved from master_source
+        master_file = self._local_masters.get(job.master_file, job.master_file)
+        cached = master_file != job.master_file
+        return {
+            "master_file": master_file,
+            "master_source": job.master_file if cached else "",
+            "library_copies": self._local_libraries.get(job.master_file, {}) if cached else {},
+            "animation_file": job.animation_file,
+            "start_frame": job.start_frame,
+            "end_frame": job.end_frame,
+            "output_path": job.lighting_file,
+            "save_path": self.staged_path(job),
+            "beauty_base_path": job.beauty_path,
+            "alpha_base_path": job.alpha_path,
+        }
+
+    def staged_path(self, job: ShotJob) -> str:
+        # Where Blender saves the lighting file, the output path itself without staging
+        if not self.staging_dir:
+            return job.lighting_file
+        return os.path.join(self.staging_dir, job.shot_file)
+
+    def predict_memory(self, job: ShotJob) -> int:
+        peak_memory = self._shot_stats.get(job.lighting_file, (0, None))[0]
+        return peak_memory or default_shot_memory
+
+    def load_shot_stats(self, jobs: list[ShotJob]):
+        if self.journal:
+            self._shot_stats.update(self.journal.shot_stats([job.lighting_file for job in jobs]))
+        for job in jobs:
+            past_duration = self._shot_stats.get(job.lighting_file, (0, None))[1]
+            self._costs[job.lighting_file] = self.cost_model.estimate(job, past_duration)
+
+    def prepare(self, jobs: list[ShotJob]):
+        self.cost_model = ShotCostModel(self.journal.shot_history() if self.journal else None)
+        self.load_shot_stats(jobs)
+
+    def estimate_cost(self, job: ShotJob) -> float:
+        return self._costs.get(job.lighting_file, 0.0)
+
+    def order(self, jobs: list[ShotJob]) -> list[ShotJob]:
+        # Longest shots first, so one big shot never starts at the end of the batch
+        if not self.longest_first:
+            return list(jobs)
+        return sorted(jobs, key=self.estimate_cost, reverse=True)
+
+    def session_size(self, pending_count: int) -> int:
+        # Spread the remaining shots over all workers, capped by the session limit
+        return max(1, min(self.shots_per_session, math.ceil(pending_count / self.max_workers)))
+
+    def take_session_jobs(self, pending: deque) -> list[ShotJob]:
+        # The longest pending shot, topped up with the shortest ones while the session stays within
+        # its share of the remaining work
+        size = self.session_size(len(pending))
+        if not self.longest_first:
+            return [pending.popleft() for _ in range(size)]
+        share = sum(self.estimate_cost(job) for job in pending) / self.max_workers
+        jobs = [pending.popleft()]
+        cost = self.estimate_cost(jobs[0])
+        while len(jobs) < size and pending and cost + self.estimate_cost(pending[-1]) <= share:
+            jobs.append(pending.pop())
+            cost += self.estimate_cost(jobs[-1])
+        return jobs
+
+    @staticmethod
+    def return_session_jobs(pending: deque, jobs: list[ShotJob]):
+        pending.extend(reversed(jobs[1:]))
+        pending.appendleft(jobs[0])
+
+    @staticmethod
+    def ensure_output_directories(jobs: list[ShotJob]) -> tuple[list[ShotJob], list[tuple[ShotJob, OSError]]]:
+        # Folders are only made for shots that run, returns (ready jobs, (job, error) of the others)
+        errors = FileManager.ensure_directories(os.path.dirname(job.lighting_file) for job in jobs)
+        if not errors:
+            return list(jobs), []
+        ready, failed = [], []
+        for job in jobs:
+            error = errors.get(os.path.dirname(job.lighting_file))
+            if error is None:
+                ready.append(job)
+            else:
+                failed.append((job, error))
+        return ready, failed
+
+    def cache_masters(self, jobs: list[ShotJob]) -> dict[str, OSError]:
+        # Copies each mastershot and the libraries it is known to link into the blend cache once, returns the files
+        # that are opened from the mount instead
+        errors = {}
+        if not self.blend_cache:
+            return errors
+        for master_file in dict.fromkeys(job.master_file for job in jobs):
+            if master_file in self._local_masters:
+                continue
+            try:
+                local_master = self._local_masters[master_file] = self.blend_cache.fetch(master_file)
+                libraries = self.blend_cache.libraries(local_master) if local_master != master_file else None
+            except (OSError, sqlite3.Error) as e:
+                errors[master_file] = e
+                continue
+            if libraries is None:
+                continue
+            copies = self._local_libraries[master_file] = {}
+            for library in libraries:
+                try:
+                    local_library = self.blend_cache.fetch(library)
+                except (OSError, sqlite3.Error) as e:
+                    errors[library] = e
+                    continue
+                if local_library != library:
+                    copies[library] = local_library
+        return errors
+
+    def learn_libraries(self, job: ShotJob, message: str):
+        # Blender reports the libraries of a cached mastershot, they are cached along with it from the next run on
+        if job is None or job.master_file in self._local_libraries or job.master_file not in self._local_masters:
+            return
+        self._local_libraries[job.master_file] = {}
+        self.blend_cache.set_libraries(self._local_masters[job.master_file], json.loads(message))
+
+    def plan(self, jobs: list[ShotJob]) -> list[dict]:
+        # Predicted schedule of a run, the memory limit and retries are not simulated
+        self.prepare(jobs)
+        pending = deque(self.order(jobs))
+        sessions = []
+        while pending:
+            session_jobs = [pending.popleft()] if self.persistent else self.take_session_jobs(pending)
+            sessions.append((session_jobs, sum(self.estimate_cost(job) for job in session_jobs)))
+        return ShotCostModel.simulate(sessions, self.max_workers)
+
+    @staticmethod
+    def parse_marker(line: str):
+        # Returns (marker, output_path, message) for shot markers
+        for marker in ("SHOT_START", "SHOT_TIMINGS", "SHOT_LIBRARIES", "SHOT_OK", "SHOT_FAILED"):
+            prefix = f"[{marker}] "
+            if line.startswith(prefix):
+                output_path, _, message = line[len(prefix):].partition(": ")
+                return marker, output_path.strip(), message.strip()
+        return None
+
+    @staticmethod
+    def classify_failure(message: str, return_code: int | None) -> str:
+        # Killed by a signal or an I/O problem is worth another try, anything else will fail again
+        if return_code is not None and return_code < 0:
+            return "transient"
+        message = message.lower()
+        if any(pattern.lower() in message for pattern in transient_failure_patterns):
+            return "transient"
+        return "permanent"
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def reset_cancel(self):
+        # Called when a run is set up, not by run(), a cancel that comes before the run starts is kept
+        self._cancel_event.clear()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def discard(self, lighting_file: str):
+        # Thread safe, the shot is dropped from the queue or its Blender is killed, it ends as skipped without a retry
+        with self._discard_lock:
+            self._discarded.add(lighting_file)
+
+    def is_discarded(self, lighting_file: str) -> bool:
+        with self._discard_lock:
+            return lighting_file in self._discarded
+
+    def spawn_session(self, jobs: list[ShotJob], log_dir: str) -> BlenderSession:
+        if self.persistent:
+            if not self._worker_script_path or not os.path.exists(self._worker_script_path):
+                self._worker_script_path = ExecuteProgram.write_script(BlenderSettings.generate_worker_script(
+                    collection_list=collection_list, camera_collection=camera_collection_name,
+                    reply_prefix=WORKER_REPLY_PREFIX))
+            process = ExecuteProgram.blender_worker_spawn(blender_path=self.blender_path,
+                                                          script_path=self._worker_script_path)
+            return BlenderSession(process, self._worker_script_path, log_dir, persistent=True)
+
+        script_path = ExecuteProgram.write_script(self.generate_script(jobs))
+        try:
+            process = ExecuteProgram.blender_spawn(blender_path=self.blender_path, script_path=script_path)
+        except OSError:
+            os.remove(script_path)
+            raise
+        return BlenderSession(process, script_path, log_dir, jobs=jobs)
+
+    def run_log_dir(self) -> str:
+        if self.log_dir:
+            os.makedirs(self.log_dir, exist_ok=True)
+            return self.log_dir
+        # Runs started in the same second, by this process or another one, get folders of their own
+        name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        for suffix in itertools.count():
+            log_dir = os.path.join(log_root, f"{name}_{suffix}" if suffix else name)
+            try:
+                os.makedirs(log_dir)
+                return log_dir
+            except FileExistsError:
+                continue
+
+    def check_worker(self, session: BlenderSession):
+        # Health check for persistent workers, a hung worker is killed and respawned
+        now = time.monotonic()
+        if session.retiring:
+            return
+        if not session.ready:
+            if now - session.start_time > worker_start_timeout:
+                session.kill(f"Blender worker did not start within {worker_start_timeout}s")
+        elif session.ping_sent_time is not None:
+            if now - session.ping_sent_time > worker_health_timeout:
+                session.kill(f"Blender worker did not answer a ping within {worker_health_timeout}s")
+        elif session.idle and now - session.last_healthy_time > worker_health_interval:
+            session.ping()
+
+    def check_timeouts(self, session: BlenderSession):
+        started = session.current_job_start_time()
+        if started is None or session.kill_reason:
+            return
+        now = time.monotonic()
+        if now - started > self.job_timeout:
+            session.kill(f"Timed out after {self.job_timeout}s")
+        elif now - session.last_output_time > self.no_output_timeout:
+            session.kill(f"Timed out, no output for {self.no_output_timeout}s")
+
+    def run(self, jobs: list[ShotJob], on_result=None, on_log=None, run_id: int = None,
+            feed=None) -> list[ShotResult]:
+        # feed(free_slots) -> list[ShotJob] is asked for more work whenever the queue runs dry
+        self.prepare(jobs)
+        jobs, unwritable = self.ensure_output_directories(jobs)
+        uploader = None
+        if self.staging_dir:
+            os.makedirs(self.staging_dir, exist_ok=True)
+            uploader = ShotUploader()
+        uploads = {}  # upload future -> (job, result) of a built shot whose file is still staged
+        prefetcher = InputPrefetcher() if self.prefetch_depth else None
+        prefetched = {}  # output_path -> the animation file was read ahead when the shot started
+        pending = deque(self.order(jobs))
+        retries = []  # (ready_time, job) waiting for their backoff
+        attempts = {}  # output_path -> number of times the shot was dispatched
+        sessions = self._workers if self.persistent else []
+        results = []
+        log_dir = self.last_log_dir = self.run_log_dir()
+        log_output = on_log or print
+        last_sample_time = 0.0
+        selector = selectors.DefaultSelector()
+        for session in sessions:
+            session.begin_run(log_dir)
+            selector.register(session, selectors.EVENT_READ)
+
+        def journal(job: ShotJob, state: str, message: str = "", duration: float = None):
+            if self.journal and run_id is not None:
+                self.journal.mark(run_id, job.lighting_file, state, message=message, duration=duration)
+
+        def finish(job: ShotJob, result: ShotResult):
+            results.append(result)
+            with self._discard_lock:
+                self._discarded.discard(job.lighting_file)
+            if result.success:
+                try:
+                    ShotFingerprint.write(job)
+                except OSError as e:
+                    log(f"[WARNING] Could not write fingerprint for {job.shot_file}: {e}")
+                if self.journal:
+                    self.journal.record_shot(job.lighting_file, job.shot_file, result.peak_memory, result.duration,
+                                             job.end_frame - job.start_frame + 1,
+                                             ShotCostModel.animation_size(job))
+                    self._shot_stats[job.lighting_file] = (result.peak_memory, result.duration)
+                journal(job, "done", duration=result.duration)
+            elif result.message == "Cancelled":
+                journal(job, "cancelled", result.message)
+            else:
+                journal(job, "skipped" if result.skipped else "failed", result.message, result.duration)
+            if on_result:
+                on_result(result)
+
+        def log(line: str, session: BlenderSession = None):
+            if session:
+                session.record(line)
+            log_output(line)
+
+        def dispatch(job: ShotJob):
+            attempts[job.lighting_file] = attempts.get(job.lighting_file, 0) + 1
+            journal(job, "running")
+            log(f"Generating for shot file: {job.shot_file}")
+
+        def report(session: BlenderSession, job: ShotJob, result: ShotResult):
+            # Taken off the worker before a retry is queued, the retry is a new dispatch
+            session.outstanding.pop(job.lighting_file, None)
+            session.results.append(result)
+            log_path, result.counters = session.end_shot(job.lighting_file)
+            result.log_file = log_path or ""
+            result.attempts = attempts.get(job.lighting_file, 1)
+            result.peak_memory = session.shot_peaks.get(job.lighting_file, 0)
+            result.open_link_time = result.timings.get("open_master", 0.0) + result.timings.get("link_animation", 0.0)
+            result.prefetched = prefetched.get(job.lighting_file, False)
+            if self.is_discarded(job.lighting_file):
+                log(f"[WARNING] {job.shot_file} was discarded, its result is dropped")
+                result.success = False
+                result.skipped = True
+                result.message = DISCARDED_MESSAGE
+                finish(job, result)
+                return
+            if not result.success and not result.skipped:
+                result.failure_class = self.classify_failure(result.message, result.return_code)
+                if result.failure_class == "transient" and result.attempts <= self.max_retries:
+                    delay = retry_backoff * 2 ** (result.attempts - 1)
+                    log(f"[RETRY] {job.shot_file}: {result.message}, retrying in {delay}s "
+                        f"(attempt {result.attempts + 1} of {self.max_retries + 1})")
+                    retries.append((time.monotonic() + delay, job))
+                    journal(job, "retrying", result.message, result.duration)
+                    return
+            log(f"Blender process for {job.shot_file} {'completed successfully' if result.success else 'failed'}.")
+            if result.success and uploader:
+                # Blender already moved on, the shot counts as done once its file is on the mount
+                uploads[uploader.submit(self.staged_path(job), job.lighting_file)] = (job, result)
+                return
+            finish(job, result)
+
+        def collect_uploads(wait: bool = False):
+            for future in [f for f in uploads if wait or f.done()]:
+                job, result = uploads.pop(future)
+                try:
+                    result.timings["upload"] = future.result()
+                except OSError as e:
+                    log(f"[ERROR] Could not upload {job.shot_file}, it stays at {self.staged_path(job)}: {e}")
+                    result.success = False
+                    result.message = f"Upload failed: {e}"
+                    result.failure_class = "permanent"
+                finish(job, result)
+
+        def find_job(session: BlenderSession, output_path: str) -> ShotJob | None:
+            return session.outstanding.get(output_path)
+
+        def consume(session: BlenderSession, lines: list[str]):
+            for line in lines:
+                reply = BlenderSession.parse_reply(line)
+                if reply is not None:
+                    session.last_healthy_time = time.monotonic()
+                    if reply.get("type") == "ready":
+                        session.ready = True
+                    elif reply.get("type") == "pong":
+                        session.ping_sent_time = None
+                    elif reply.get("type") == "result":
+                        session.busy = False
+                        session.predicted_memory = 0
+                    continue
+
+                parsed = self.parse_marker(line)
+                if parsed and parsed[0] == "SHOT_START":
+                    job = find_job(session, parsed[1])
+                    if job:
+                        session.begin_shot(job)
+                        if prefetcher:
+                            prefetched[job.lighting_file] = prefetcher.consume(job.animation_file)
+                log(line, session)
+                if not parsed:
+                    continue
+                marker, output_path, message = parsed
+                now = time.monotonic()
+                if marker == "SHOT_START":
+                    session.shot_start_times[output_path] = now
+                elif marker == "SHOT_TIMINGS":
+                    session.timings[output_path] = message
+                elif marker == "SHOT_LIBRARIES":
+                    try:
+                        self.learn_libraries(find_job(session, output_path), message)
+                    except (ValueError, sqlite3.Error) as e:
+                        log(f"[WARNING] Could not record the libraries of the mastershot: {e}", session)
+                else:
+                    job = find_job(session, output_path)
+                    if job is None:
+                        continue
+                    timings = session.parse_timings(output_path)
+                    duration = timings.get("total", now - session.shot_start_times.get(output_path,
+                                                                                        session.start_time))
+                    # A built shot exited cleanly whatever the session does later, a failed one gets its exit code
+                    success = marker == "SHOT_OK"
+                    report(session, job, ShotResult(shot_file=job.shot_file, success=success, message=message,
+                                                    duration=duration, timings=timings,
+                                                    return_code=0 if success else None))
+
+        def close_session(session: BlenderSession, cancelled: bool = False):
+            selector.unregister(session)
+            consume(session, session.close(remove_script=not session.persistent))
+            now = time.monotonic()
+            return_code = session.process.returncode
+            fallback_message = session.kill_reason or f"Blender exited with code {return_code} " \
+                                                      f"before finishing the shot"
+            requeued = []
+            for job in session.unfinished_jobs():
+                if not cancelled and job.lighting_file not in session.shot_start_times and \
+                        session.shot_start_times:
+                    # Never started in this session, not its failure
+                    session.outstanding.pop(job.lighting_file)
+                    attempts[job.lighting_file] -= 1
+                    requeued.append(job)
+                    continue
+                report(session, job, ShotResult(
+                    shot_file=job.shot_file, success=False, return_code=return_code,
+                    duration=now - session.shot_start_times.get(job.lighting_file, now), message=fallback_message,
+                    skipped=cancelled))
+            # Back to the front of the queue in their dispatch order, longest first stays intact
+            pending.extendleft(reversed(requeued))
+            for result in session.results:
+                if result.return_code is None:
+                    result.return_code = return_code
+            if return_code and not cancelled:
+                log(f"[WARNING] Blender exited with code {return_code}", session)
+            session.close_logs()
+
+        def in_flight() -> bool:
+            return any(not s.persistent or s.unfinished_jobs() for s in sessions)
+
+        def prefetch():
+            # Shots handed to a Blender that did not start them yet, then the next ones in the queue
+            upcoming = [job.animation_file for s in sessions for job in s.unfinished_jobs()
+                        if job.lighting_file not in s.shot_start_times]
+            upcoming.extend(job.animation_file for job in itertools.islice(pending, self.prefetch_depth))
+            prefetcher.schedule(upcoming)
+
+        def cache_masters(jobs: list[ShotJob]):
+            for master_file, error in self.cache_masters(jobs).items():
+                log(f"[WARNING] Could not cache {master_file}, it is opened from the mount: {error}")
+
+        def drop_discarded():
+            with self._discard_lock:
+                discarded = set(self._discarded)
+            dropped = [job for job in pending if job.lighting_file in discarded]
+            dropped.extend(job for _, job in retries if job.lighting_file in discarded)
+            pending_jobs = [job for job in pending if job.lighting_file not in discarded]
+            pending.clear()
+            pending.extend(pending_jobs)
+            retries[:] = [r for r in retries if r[1].lighting_file not in discarded]
+            for job in dropped:
+                log(f"[WARNING] {job.shot_file} was discarded before it started")
+                finish(job, ShotResult(shot_file=job.shot_file, success=False, message=DISCARDED_MESSAGE,
+                                       skipped=True, attempts=attempts.get(job.lighting_file, 0)))
+            # A batch session is killed once it starts the shot, the shots it did not start go back to the queue
+            for session in sessions:
+                if session.current_shot in discarded and not session.kill_reason:
+                    session.kill(DISCARDED_MESSAGE)
+
+        def fail_unwritable(failed: list[tuple[ShotJob, OSError]]):
+            for job, error in failed:
+                log(f"[ERROR] Could not create the folder for {job.shot_file}: {error}")
+                finish(job, ShotResult(shot_file=job.shot_file, success=False, message=str(error),
+                                       failure_class="permanent"))
+
+        try:
+            fail_unwritable(unwritable)
+            cache_masters(jobs)
+            while pending or retries or in_flight() or uploads:
+                collect_uploads()
+                if self.cancelled:
+                    for _, job in retries:
+                        pending.append(job)
+                    retries.clear()
+                    while pending:
+                        job = pending.popleft()
+                        finish(job, ShotResult(shot_file=job.shot_file, success=False, message="Cancelled",
+                                               skipped=True, attempts=attempts.get(job.lighting_file, 0)))
+                    for session in sessions:
+                        session.kill("Cancelled")
+                    for session in sessions:
+                        session.process.wait()
+                        close_session(session, cancelled=True)
+                    sessions.clear()
+                    break
+
+                # Shots whose retry backoff has passed go to the front of the queue
+                now = time.monotonic()
+                ready = [r for r in retries if r[0] <= now]
+                for ready_time, job in ready:
+                    retries.remove((ready_time, job))
+                pending.extendleft(reversed([job for _, job in ready]))
+
+                if feed and not pending and not retries:
+                    busy = sum(1 for s in sessions if not s.persistent or s.unfinished_jobs())
+                    if busy < self.max_workers:
+                        fed, unwritable = self.ensure_output_directories(feed(self.max_workers - busy))
+                        fail_unwritable(unwritable)
+                        cache_masters(fed)
+                        self.load_shot_stats(fed)
+                        pending.extend(self.order(fed))
+
+                now = time.monotonic()
+                if now - last_sample_time >= resource_sample_interval:
+                    last_sample_time = now
+                    if self.monitor.sample(sessions):
+                        log(f"[WARNING] System is swapping, no new shot starts for {swap_backoff}s")
+
+                # Fill free worker slots
+                waiting = sum(1 for s in sessions if s.persistent and not s.busy and not s.retiring)
+                while pending and len(sessions) < self.max_workers and (
+                        not self.persistent or len(pending) > waiting):
+                    predicted_memory = 0
+                    session_jobs = [] if self.persistent else self.take_session_jobs(pending)
+                    if session_jobs:
+                        predicted_memory = max(self.predict_memory(job) for job in session_jobs)
+                        if not self.monitor.can_start(sessions, predicted_memory):
+                            self.return_session_jobs(pending, session_jobs)
+                            break
+                    try:
+                        session = self.spawn_session(session_jobs, log_dir)
+                    except OSError as e:
+                        for job in session_jobs or list(pending):
+                            finish(job, ShotResult(shot_file=job.shot_file, success=False, message=str(e),
+                                                   failure_class="permanent"))
+                        if self.persistent:
+                            pending.clear()
+                        continue
+                    for job in session_jobs:
+                        dispatch(job)
+                    session.predicted_memory = predicted_memory
+                    sessions.append(session)
+                    selector.register(session, selectors.EVENT_READ)
+                    waiting += 1
+
+                if prefetcher:
+                    prefetch()
+
+                # Wait for output from any Blender, one thread reads every pipe
+                for key, _ in selector.select(timeout=self.poll_interval):
+                    consume(key.fileobj, key.fileobj.read_lines())
+
+                if self._discarded:
+                    drop_discarded()
+
+                for session in list(sessions):
+                    if session.process.poll() is not None:
+                        sessions.remove(session)
+                        close_session(session)
+                        continue
+                    self.check_timeouts(session)
+                    if not session.persistent:
+                        continue
+
+                    self.check_worker(session)
+                    if session.idle and pending:
+                        if len(session.jobs) >= self.shots_per_session:
+                            # Restart the worker before its memory grows too large
+                            session.retire()
+                            continue
+                        if not self.monitor.can_start([s for s in sessions if s is not session],
+                                                      self.predict_memory(pending[0])):
+                            continue
+                        job = pending.popleft()
+                        dispatch(job)
+                        session.predicted_memory = self.predict_memory(job)
+                        if not session.send_job(job, self.script_job(job)):
+                            session.kill("Blender worker stopped accepting jobs")
+        except BaseException:
+            # Never leave Blender processes behind when the run is interrupted
+            for session in sessions:
+                ExecuteProgram.kill_tree(session.process)
+                session.process.wait()
+                session.close(remove_script=not session.persistent)
+                session.close_logs()
+            sessions.clear()
+            raise
+        finally:
+            for session in sessions:
+                selector.unregister(session)
+            selector.close()
+            with self._discard_lock:
+                self._discarded.clear()
+            if prefetcher:
+                prefetcher.shutdown()
+            if self.blend_cache:
+                # The next run looks the mastershot up again, a changed file gets a new copy
+                self._local_masters.clear()
+                self._local_libraries.clear()
+                self.blend_cache.release()
+            if uploader:
+                # Shots built before a cancel are still uploaded
+                uploader.shutdown()
+                collect_uploads(wait=True)
+                try:
+                    os.rmdir(self.staging_dir)
+                except OSError:
+                    pass
+
+        if self.journal and run_id is not None:
+            self.journal.finish_run(run_id, "cancelled" if self.cancelled else "finished")
+        return results
+
+    def shutdown(self, timeout: float = 10):
+        # Stop the persistent workers kept between runs
+        for session in self._workers:
+            session.retire()
+        for session in self._workers:
+            try:
+                session.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                session.process.kill()
+                session.process.wait()
+            session.close(remove_script=False)
+            session.close_logs()
+        self._workers.clear()
+        if self._worker_script_path and os.path.exists(self._worker_script_path):
+            os.remove(self._worker_script_path)
+        self._worker_script_path = None
+
+    @staticmethod
+    def summarize(results: list[ShotResult]) -> str:
+        succeeded = [r for r in results if r.success]
+        skipped = [r for r in results if r.skipped]
+        failed = [r for r in results if not r.success and not r.skipped]
+        lines = [f"Generated {len(succeeded)} of {len(results)} lighting files."]
+        warnings = sum(r.counters.get("WARNING", 0) for r in results)
+        if warnings:
+            lines.append(f"{warnings} warning(s) reported by Blender.")
+        if succeeded:
+            open_link_time = sum(r.open_link_time for r in succeeded)
+            prefetched = sum(1 for r in succeeded if r.prefetched)
+            lines.append(f"Open+link time {open_link_time:.1f}s, {prefetched} of {len(succeeded)} "
+                         f"animation files were read ahead.")
+        if skipped:
+            lines.append("")
+            lines.append("Skipped:")
+            for result in skipped:
+                lines.append(f"  {result.shot_file}: {result.message}")
+        if failed:
+            lines.append("")
+            lines.append("Failed:")
+            for result in failed:
+                retried = f" (after {result.attempts} attempts)" if result.attempts > 1 else ""
+                lines.append(f"  {result.shot_file}: {result.message}{retried}")
+        return "\n".join(lines)
@@ -0,0 +1,45 @@
+from app.data.project import division_list
+from app.services.file_manager import FileManager
+from app.services.shot_job import ShotRecord
+
+
+class ShotIndex:
+    def __init__(self, project_code: str, records: list[ShotRecord]):
+        # Built once per scan, every later lookup is a dict access instead of a pass over the CSV
+        self.project_code = project_code
+        self.by_file = {}  # lighting file name -> record
+        self.by_key = {}  # (ep, seq, shot) -> record
+        self.positions = {}  # lighting file name -> position in the CSV, a sort key without a Python call
+        for record in records:
+            file_name = self.file_name(record)
+            self.by_file[file_name] = record
+            self.positions[file_name] = len(self.positions)
+            self.by_key[(record.ep, record.seq, record.shot)] = record
+
+    def file_name(self, record: ShotRecord) -> str:
+        return FileManager.generate_file_name(project_code=self.project_code, ep=record.ep, seq=record.seq,
+                                              shot=record.shot, division=division_list[1][0], extension="blend")
+
+    def file_names(self) -> list[str]:
+        # Lighting file names in CSV order
+        return list(self.by_file)
+
+    def get(self, shot_file: str) -> ShotRecord | None:
+        return self.by_file.get(shot_file)
+
+    def find(self, ep: str, seq: str, shot: str) -> ShotRecord | None:
+        return self.by_key.get((ep.lower(), seq.lower(), shot.lower()))
+
+    def diff(self, other: "ShotIndex") -> tuple[list[str], list[str], list[str]]:
+        # (added, removed, frame range changed) lighting file names going from this index to other
+        added = [name for name in other.by_file if name not in self.by_file]
+        removed = [name for name in self.by_file if name not in other.by_file]
+        changed = []
+        for name, record in other.by_file.items():
+            old = self.by_file.get(name)
+            if old and (old.start_frame, old.end_frame) != (record.start_frame, record.end_frame):
+                changed.append(name)
+        return added, removed, changed
+
+    def __len__(self) -> int:
+        return len(self.by_file)
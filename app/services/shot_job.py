@@ -0,0 +1,47 @@
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+
+class ShotRecord(NamedTuple):
+    # One validated CSV row, a tuple keeps 100k-row exports small
+    ep: str
+    seq: str
+    shot: str
+    start_frame: int
+    end_frame: int
+    line: int  # line number in the CSV file
+
+
+@dataclass
+class ShotJob:
+    shot_file: str
+    ep: str
+    seq: str
+    shot: str
+    start_frame: int
+    end_frame: int
+    master_file: str
+    animation_file: str
+    lighting_file: str
+    beauty_path: str
+    alpha_path: str
+    fingerprint: str = ""
+
+
+@dataclass
+class ShotResult:
+    shot_file: str
+    success: bool
+    return_code: int | None = None
+    duration: float = 0.0
+    message: str = ""
+    skipped: bool = False
+    timings: dict = field(default_factory=dict)
+    counters: dict = field(default_factory=dict)
+    log_file: str = ""
+    attempts: int = 1
+    peak_memory: int = 0  # bytes, 0 when it could not be sampled
+    failure_class: str = ""  # "transient" or "permanent" for failed shots
+    # Seconds Blender spent opening the mastershot and linking the animation, reading and deserializing included
+    open_link_time: float = 0.0
+    prefetched: bool = False  # the animation file was read ahead before the shot started
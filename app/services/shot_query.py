@@ -0,0 +1,105 @@
+import bisect
+import fnmatch
+import re
+from string import ascii_lowercase
+
+from app.services.shot_index import ShotIndex
+
+# Query terms, all of them have to match:
+#   ep001  seq10  sh0020          field equals the number (leading zeros and prefix spelling do not matter)
+#   seq0010-0040  ep1-ep3         inclusive number range
+#   sh*  seq00?0                  wildcard on the field number (prefix spelling does not matter)
+#   frames>200  start>=1001  end<2000
+#   anything else                 part of the lighting file name
+FIELD_PREFIXES = {"ep": "ep", "seq": "seq", "sq": "seq", "sh": "shot"}
+FIELD_TERM = re.compile(r"^(ep|seq|sq|sh)(\d*)(?:-(?:ep|seq|sq|sh)?(\d+))?$")
+FRAME_TERM = re.compile(r"^(frames|start|end)(>=|<=|==|=|>|<)(\d+)$")
+NUMBER = re.compile(r"(\d+)(?!.*\d)")
+
+
+class ShotQuery:
+    def __init__(self, shot_index: ShotIndex):
+        # Posting lists per field value, and the values and frame numbers as sorted arrays for range lookups
+        self.names = shot_index.file_names()
+        self.postings = {field: {} for field in ("ep", "seq", "shot")}  # field -> value -> [positions]
+        frames = {"frames": [], "start": [], "end": []}
+        for position, name in enumerate(self.names):
+            record = shot_index.get(name)
+            self.postings["ep"].setdefault(record.ep, []).append(position)
+            self.postings["seq"].setdefault(record.seq, []).append(position)
+            self.postings["shot"].setdefault(record.shot, []).append(position)
+            frames["frames"].append((record.end_frame - record.start_frame + 1, position))
+            frames["start"].append((record.start_frame, position))
+            frames["end"].append((record.end_frame, position))
+
+        self.numbered = {}  # field -> (sorted numbers, values in the same order)
+        for field, values in self.postings.items():
+            pairs = sorted((int(match.group(1)), value) for value in values
+                           if (match := NUMBER.search(value)) is not None)
+            self.numbered[field] = ([number for number, _ in pairs], [value for _, value in pairs])
+
+        self.frames = {}  # field -> (sorted frame numbers, positions in the same order)
+        for field, pairs in frames.items():
+            pairs.sort()
+            self.frames[field] = ([number for number, _ in pairs], [position for _, position in pairs])
+
+    def value_positions(self, field: str, values) -> set[int]:
+        positions = set()
+        for value in values:
+            positions.update(self.postings[field][value])
+        return positions
+
+    def number_range(self, field: str, low: int, high: int) -> set[int]:
+        numbers, values = self.numbered[field]
+        first, last = bisect.bisect_left(numbers, low), bisect.bisect_right(numbers, high)
+        return self.value_positions(field, values[first:last])
+
+    def frame_range(self, field: str, operator: str, number: int) -> set[int]:
+        numbers, positions = self.frames[field]
+        if operator == ">":
+            return set(positions[bisect.bisect_right(numbers, number):])
+        if operator == ">=":
+            return set(positions[bisect.bisect_left(numbers, number):])
+        if operator == "<":
+            return set(positions[:bisect.bisect_left(numbers, number)])
+        if operator == "<=":
+            return set(positions[:bisect.bisect_right(numbers, number)])
+        return set(positions[bisect.bisect_left(numbers, number):bisect.bisect_right(numbers, number)])
+
+    def term_positions(self, term: str) -> set[int] | None:
+        # None means the term matches every shot
+        if match := FRAME_TERM.match(term):
+            return self.frame_range(match.group(1), match.group(2), int(match.group(3)))
+
+        prefix = next((p for p in FIELD_PREFIXES if term.startswith(p)), None)
+        if prefix and any(char in term for char in "*?["):
+            field = FIELD_PREFIXES[prefix]
+            if term in (prefix, prefix + "*"):
+                return None
+            # The prefix of the term and of the values are both dropped, sq00* finds seq0010 and sq0010
+            pattern = term[len(prefix):]
+            return self.value_positions(field, (value for value in self.postings[field]
+                                                if fnmatch.fnmatchcase(value.lstrip(ascii_lowercase), pattern)))
+        if match := FIELD_TERM.match(term):
+            field = FIELD_PREFIXES[match.group(1)]
+            if not match.group(2):
+                return None
+            low = int(match.group(2))
+            high = int(match.group(3)) if match.group(3) else low
+            return self.number_range(field, min(low, high), max(low, high))
+
+        return {position for position, name in enumerate(self.names) if term in name}
+
+    def match(self, text: str) -> set[str] | None:
+        # Lighting file names matching every term, None when the query is empty
+        result = None
+        for term in text.lower().split():
+            positions = self.term_positions(term)
+            if positions is None:
+                continue
+            result = positions if result is None else result & positions
+            if not result:
+                break
+        if result is None:
+            return None
+        return {self.names[position] for position in result}
@@ -0,0 +1,85 @@
+import errno
+import os
+import threading
+import time
+from typing import NamedTuple
+
+from app.data.executor_config import stat_cache_ttl
+from app.services.file_manager import FileManager
+from app.services.fingerprint import ShotFingerprint
+from app.services.shot_job import ShotJob
+
+# Badges shown next to every scanned shot
+STATUS_MISSING = "missing"  # no animation file
+STATUS_READY = "ready"  # animation file found, no lighting file yet
+STATUS_BUILT = "built"  # lighting file exists but its inputs changed since, or no mastershot to compare with
+STATUS_UP_TO_DATE = "up-to-date"  # lighting file built from the current inputs
+
+
+class CachedStat(NamedTuple):
+    # The fields of os.stat_result the sweep reads
+    st_size: int
+    st_mtime_ns: int
+
+
+class StatCache:
+    def __init__(self, ttl: float = stat_cache_ttl):
+        # Shared by the sweep threads, a missing file is cached as well
+        self.ttl = ttl
+        # path -> (monotonic time, errno or 0, size, mtime_ns). Plain tuples of numbers are untracked by the garbage
+        # collector, a cache of os.stat_result objects or exceptions made every full collection walk all of them
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def stat(self, path: str) -> CachedStat:
+        # Same contract as os.stat for st_size and st_mtime_ns, raises OSError for a missing file
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None or now - entry[0] > self.ttl:
+            try:
+                result = os.stat(path)
+                entry = (now, 0, result.st_size, result.st_mtime_ns)
+            except OSError as e:
+                entry = (now, e.errno or errno.ENOENT, 0, 0)
+            with self._lock:
+                self._entries[path] = entry
+        if entry[1]:
+            raise OSError(entry[1], os.strerror(entry[1]), path)
+        return CachedStat(entry[2], entry[3])
+
+    def exists(self, path: str) -> bool:
+        try:
+            self.stat(path)
+        except OSError:
+            return False
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ShotStatus:
+    @staticmethod
+    def exists(path: str, stat_cache: StatCache) -> bool:
+        # The shot tree index answers for the shot files, the stat cache for everything else
+        if FileManager.shot_tree is not None:
+            known = FileManager.shot_tree.exists(path)
+            if known is not None:
+                return known
+        return stat_cache.exists(path)
+
+    @staticmethod
+    def check(job: ShotJob, stat_cache: StatCache, script_hash: str = None) -> tuple[str, bool]:
+        # (status, whether the beauty EXR folder exists), script_hash None skips the fingerprint comparison
+        renders = stat_cache.exists(os.path.dirname(job.beauty_path))
+        if not ShotStatus.exists(job.animation_file, stat_cache):
+            return STATUS_MISSING, renders
+        if not ShotStatus.exists(job.lighting_file, stat_cache):
+            return STATUS_READY, renders
+        if script_hash and job.master_file and \
+                ShotFingerprint.read(job.lighting_file) == ShotFingerprint.compute(job, script_hash,
+                                                                                   stat_file=stat_cache.stat):
+            return STATUS_UP_TO_DATE, renders
+        return STATUS_BUILT, renders
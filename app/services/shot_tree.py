@@ -0,0 +1,231 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.data.executor_config import shot_tree_path, shot_tree_extensions, directory_workers
+from app.data.project import division_list
+from app.services.file_manager import FileManager
+
+# Folders below a division root: episode, sequence, shot. Only shot folders have their files indexed
+SHOT_DEPTH = 3
+
+
+class ShotTree:
+    def __init__(self, drive: str, path: str = None):
+        # Index of the animation and lighting shot trees of one project drive, kept in memory and in SQLite.
+        # A folder is listed again only when its mtime changed, every other refresh costs one stat per folder
+        self.drive = drive
+        self.path = path or shot_tree_path.format(drive=drive)
+        self.roots = [os.path.join(FileManager.get_project_path(drive), division[2], division[3])
+                      for division in division_list]
+        # folder path -> (mtime_ns when listed, sub folder names, indexed file names), swapped as a whole
+        self._folders = {}
+        self.loaded = False
+        self.refreshed_at = None
+        self._lock = threading.Lock()  # one refresh at a time
+        # Shot folders a refresh_shots could not check because a full refresh ran, asked from the file system
+        # until a refresh started after them is done. Folder path -> number of the bypass, swapped as a whole
+        self._bypassed = {}
+        self._bypass_count = 0
+        self._bypass_lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS folders (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER,
+                subfolders TEXT NOT NULL,
+                files TEXT NOT NULL
+            ) WITHOUT ROWID
+        """)
+        connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return connection
+
+    def load(self) -> bool:
+        # False when the index was never built on this machine
+        if not os.path.exists(self.path):
+            return False
+        connection = self.connect()
+        try:
+            folders = {path: (mtime_ns, frozenset(json.loads(subfolders)), frozenset(json.loads(files)))
+                       for path, mtime_ns, subfolders, files in connection.execute("SELECT * FROM folders")}
+            row = connection.execute("SELECT value FROM meta WHERE key = 'refreshed_at'").fetchone()
+        finally:
+            connection.close()
+        self._folders = folders
+        self.refreshed_at = float(row[0]) if row else None
+        self.loaded = bool(folders)
+        return self.loaded
+
+    def save(self, changed: dict, removed: set):
+        connection = self.connect()
+        try:
+            with connection:
+                connection.executemany("DELETE FROM folders WHERE path = ?", ((path,) for path in removed))
+                connection.executemany(
+                    "INSERT OR REPLACE INTO folders VALUES (?, ?, ?, ?)",
+                    ((path, mtime_ns, json.dumps(sorted(subfolders)), json.dumps(sorted(files)))
+                     for path, (mtime_ns, subfolders, files) in changed.items()))
+                connection.execute("INSERT OR REPLACE INTO meta VALUES ('refreshed_at', ?)", (str(self.refreshed_at),))
+        finally:
+            connection.close()
+
+    def check_folder(self, folders: dict, path: str, depth: int):
+        # (mtime_ns, sub folders, files, listed again), None when the folder is gone
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        known = folders.get(path)
+        if known and known[0] == mtime_ns:
+            return known[0], known[1], known[2], False
+        subfolders, files = set(), set()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if depth < SHOT_DEPTH and entry.is_dir():
+                        subfolders.add(entry.name)
+                    elif depth == SHOT_DEPTH and entry.name.endswith(shot_tree_extensions) and entry.is_file():
+                        files.add(entry.name)
+        except OSError:
+            return None
+        # mtime taken before listing, a change during the listing is picked up by the next refresh
+        return mtime_ns, frozenset(subfolders), frozenset(files), True
+
+    def bypass(self, shot_folders):
+        with self._bypass_lock:
+            self._bypass_count += 1
+            self._bypassed = {**self._bypassed, **dict.fromkeys(shot_folders, self._bypass_count)}
+
+    def checked(self, shot_folders=frozenset(), before: int = 0):
+        # Ends the bypass of the given folders and of all folders bypassed up to the given number
+        with self._bypass_lock:
+            self._bypassed = {path: count for path, count in self._bypassed.items()
+                              if count > before and path not in shot_folders}
+
+    def refresh(self, max_workers: int = directory_workers) -> tuple[int, int]:
+        # Walks both trees one level at a time, returns (folders checked, folders listed)
+        with self._lock:
+            bypass_count = self._bypass_count
+            old = self._folders if self.loaded else {}
+            folders, changed = {}, {}
+            checked = listed = 0
+            level = [(root, 0) for root in self.roots]
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                while level:
+                    results = pool.map(lambda item: self.check_folder(old, item[0], item[1]), level)
+                    next_level = []
+                    for (path, depth), result in zip(level, results):
+                        checked += 1
+                        if result is None:
+                            continue
+                        mtime_ns, subfolders, files, relisted = result
+                        folders[path] = (mtime_ns, subfolders, files)
+                        if relisted:
+                            listed += 1
+                            changed[path] = folders[path]
+                        if depth < SHOT_DEPTH:
+                            next_level.extend((os.path.join(path, name), depth + 1) for name in subfolders)
+                    level = next_level
+            removed = set(old) - set(folders)
+            self._folders = folders
+            self.loaded = True
+            self.refreshed_at = time.time()
+            self.save(changed, removed)
+            self.checked(before=bypass_count)
+            return checked, listed
+
+    def refresh_shots(self, shot_folders) -> int:
+        # Checks only the given shot folders, and lists the ones that changed, returns the number listed.
+        # A new shot folder is added to its parents, which are listed in full by the next refresh.
+        # While a full refresh runs, the folders are bypassed, it may have checked them already
+        if not self.loaded:
+            return 0
+        shot_folders = frozenset(os.path.normpath(folder) for folder in shot_folders)
+        if not self._lock.acquire(blocking=False):
+            self.bypass(shot_folders)
+            return 0
+        try:
+            folders = dict(self._folders)
+            changed, removed = {}, set()
+            for path in shot_folders:
+                located = self.locate(path)
+                if located is None or len(located[1]) != SHOT_DEPTH:
+                    continue
+                result = self.check_folder(folders, path, SHOT_DEPTH)
+                parent, name = os.path.split(path)
+                if result is None:
+                    if path in folders:
+                        del folders[path]
+                        removed.add(path)
+                    continue
+                if result[3]:
+                    folders[path] = changed[path] = result[:3]
+                # Parents created after the last full refresh get no mtime, so they are listed next time
+                while name and (parent not in folders or name not in folders[parent][1]):
+                    mtime_ns, subfolders, files = folders.get(parent, (None, frozenset(), frozenset()))
+                    folders[parent] = changed[parent] = (None, subfolders | {name}, files)
+                    if parent in self.roots:
+                        break
+                    parent, name = os.path.split(parent)
+            self._folders = folders
+            self.save(changed, removed)
+            self.checked(shot_folders)
+            return len(changed)
+        finally:
+            self._lock.release()
+
+    def locate(self, path: str) -> tuple[str, list[str]] | None:
+        # (division root, folder names below it) of a path inside one of the trees
+        path = os.path.normpath(path)
+        for root in self.roots:
+            if path == root:
+                return root, []
+            if path.startswith(root + os.sep):
+                return root, path[len(root) + 1:].split(os.sep)
+        return None
+
+    def is_bypassed(self, root: str, names: list[str]) -> bool:
+        return bool(self._bypassed) and len(names) >= SHOT_DEPTH and \
+            os.path.join(root, *names[:SHOT_DEPTH]) in self._bypassed
+
+    def exists(self, path: str) -> bool | None:
+        # None when the index cannot tell, the caller has to ask the file system
+        located = self.locate(path) if self.loaded else None
+        if located is None or self.is_bypassed(*located):
+            return None
+        folders = self._folders
+        folder, names = located
+        if folder not in folders:
+            return None
+        for depth, name in enumerate(names):
+            subfolders, files = folders[folder][1], folders[folder][2]
+            last = depth == len(names) - 1
+            if depth < SHOT_DEPTH:
+                if name not in subfolders:
+                    # Files are not indexed above the shot folders
+                    return None if last else False
+                folder = os.path.join(folder, name)
+                if folder not in folders:
+                    return None
+            elif last and name.endswith(shot_tree_extensions):
+                return name in files
+            else:
+                return None
+        return True
+
+    def list_dir(self, path: str) -> list[str] | None:
+        # Sub folders above the shot level, indexed files inside a shot folder, None when the folder is not indexed
+        located = self.locate(path) if self.loaded else None
+        if located is None or self.is_bypassed(*located):
+            return None
+        known = self._folders.get(os.path.normpath(path))
+        if known is None:
+            return None
+        return sorted(known[2] if len(located[1]) == SHOT_DEPTH else known[1])
@@ -0,0 +1,83 @@
+import errno
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.data.executor_config import upload_workers, upload_bandwidth, upload_chunk_size, max_retries, retry_backoff
+from app.services.fingerprint import ShotFingerprint
+
+
+class BandwidthLimiter:
+    def __init__(self, bytes_per_second: float = 0):
+        # Shared by every upload thread, 0 means no limit
+        self.rate = bytes_per_second
+        self._lock = threading.Lock()
+        self._next_time = time.monotonic()
+
+    def consume(self, size: int):
+        # Each chunk takes the next free slot of the budget, the caller sleeps until that slot has passed
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._next_time = max(now, self._next_time) + size / self.rate
+            end = self._next_time
+        time.sleep(max(0.0, end - now))
+
+
+class ShotUploader:
+    def __init__(self, max_workers: int = upload_workers, bandwidth: float = upload_bandwidth,
+                 retries: int = max_retries):
+        self.limiter = BandwidthLimiter(bandwidth)
+        self.retries = max(0, retries)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="shot_upload")
+
+    def submit(self, staged_path: str, destination: str) -> Future:
+        # The future returns the seconds the upload took, or raises the last OSError
+        return self._pool.submit(self.upload, staged_path, destination)
+
+    def upload(self, staged_path: str, destination: str) -> float:
+        started = time.monotonic()
+        for attempt in range(self.retries + 1):
+            try:
+                self.copy_verified(staged_path, destination)
+                break
+            except OSError:
+                # The staged file stays until an upload went through
+                if attempt == self.retries:
+                    raise
+                time.sleep(retry_backoff * 2 ** attempt)
+        os.remove(staged_path)
+        return time.monotonic() - started
+
+    def copy_verified(self, source: str, destination: str):
+        # Written next to the destination under a temporary name and renamed once size and checksum match,
+        # readers on the mount never see a partial lighting file
+        tmp_path = f"{destination}.upload-{os.getpid()}-{threading.get_ident()}"
+        digest = hashlib.blake2b(digest_size=20)
+        size = 0
+        try:
+            with open(source, "rb") as src, open(tmp_path, "wb") as dst:
+                while chunk := src.read(upload_chunk_size):
+                    self.limiter.consume(len(chunk))
+                    digest.update(chunk)
+                    dst.write(chunk)
+                    size += len(chunk)
+                dst.flush()
+                os.fsync(dst.fileno())
+            uploaded_size = os.stat(tmp_path).st_size
+            if uploaded_size != size or ShotFingerprint.hash_file(tmp_path, size) != digest.hexdigest():
+                raise OSError(errno.EIO, f"Uploaded copy does not match the staged file ({uploaded_size} of "
+                                         f"{size} bytes)", destination)
+            os.replace(tmp_path, destination)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,272 @@
+import json
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict
+
+from app.data.executor_config import spool_poll_interval, spool_lease_timeout, spool_heartbeat_interval
+from app.services.shot_executor import ShotExecutor
+from app.services.shot_job import ShotJob, ShotResult
+
+# Spool layout, every state change is a rename inside the same file system so it is atomic on NFS and SMB
+#   pending/<name>.json            job waiting for a worker
+#   claimed/<name>@<worker>.json   job leased by a worker, the file mtime is the lease heartbeat
+#   results/<name>.json            ShotResult written by the worker
+SPOOL_FOLDERS = ["pending", "claimed", "results", "tmp"]
+LEASE_SEPARATOR = "@"
+
+
+class SpoolQueue:
+    def __init__(self, spool_dir: str):
+        self.spool_dir = spool_dir
+        for folder in SPOOL_FOLDERS:
+            os.makedirs(os.path.join(spool_dir, folder), exist_ok=True)
+
+    def folder(self, name: str) -> str:
+        return os.path.join(self.spool_dir, name)
+
+    @staticmethod
+    def worker_id() -> str:
+        return f"{socket.gethostname()}.{os.getpid()}"
+
+    @staticmethod
+    def job_name(job: ShotJob) -> str:
+        return os.path.splitext(job.shot_file)[0]
+
+    @staticmethod
+    def lease_name(claimed_file: str) -> tuple[str, str]:
+        # "<name>@<worker>.json" -> (name, worker)
+        name, _, worker = os.path.splitext(claimed_file)[0].rpartition(LEASE_SEPARATOR)
+        return name, worker
+
+    def write_json(self, folder: str, file_name: str, data: dict):
+        # Written in tmp/ first so readers never see a half written file
+        tmp_path = os.path.join(self.folder("tmp"), f"{file_name}.{self.worker_id()}")
+        with open(tmp_path, "w") as file:
+            json.dump(data, file, indent=2)
+        os.replace(tmp_path, os.path.join(self.folder(folder), file_name))
+
+    @staticmethod
+    def read_json(path: str) -> dict | None:
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def server_time(self) -> float:
+        # Lease mtimes are set by the file server, compare them with its clock and not with the local one
+        clock_path = os.path.join(self.folder("tmp"), f".clock.{self.worker_id()}")
+        with open(clock_path, "w"):
+            pass
+        try:
+            return os.stat(clock_path).st_mtime
+        finally:
+            os.remove(clock_path)
+
+    def submit(self, jobs: list[ShotJob]) -> list[str]:
+        names = []
+        for job in jobs:
+            name = self.job_name(job)
+            try:
+                os.remove(os.path.join(self.folder("results"), f"{name}.json"))
+            except FileNotFoundError:
+                pass
+            self.write_json("pending", f"{name}.json", {"job": asdict(job), "submitted_by": self.worker_id(),
+                                                          "submitted_at": time.time()})
+            names.append(name)
+        return names
+
+    def claim(self, worker: str, limit: int) -> list[tuple[str, ShotJob]]:
+        # Returns (claimed file, job) pairs, a rename that fails means another worker was faster
+        claimed = []
+        for file_name in sorted(os.listdir(self.folder("pending"))):
+            if len(claimed) >= limit:
+                break
+            if not file_name.endswith(".json"):
+                continue
+            name = os.path.splitext(file_name)[0]
+            claimed_file = f"{name}{LEASE_SEPARATOR}{worker}.json"
+            claimed_path = os.path.join(self.folder("claimed"), claimed_file)
+            try:
+                os.rename(os.path.join(self.folder("pending"), file_name), claimed_path)
+            except FileNotFoundError:
+                continue
+            os.utime(claimed_path)
+            data = self.read_json(claimed_path)
+            if not data or "job" not in data:
+                print(f"[WARNING] Invalid spool job file: {claimed_path}")
+                self.write_json("results", f"{name}.json", asdict(ShotResult(
+                    shot_file=file_name, success=False, message="Invalid spool job file",
+                    failure_class="permanent")))
+                os.remove(claimed_path)
+                continue
+            claimed.append((claimed_file, ShotJob(**data["job"])))
+        return claimed
+
+    def heartbeat(self, claimed_file: str) -> bool:
+        # False when the lease was lost to another worker
+        try:
+            os.utime(os.path.join(self.folder("claimed"), claimed_file))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, claimed_file: str, result: ShotResult):
+        name, worker = self.lease_name(claimed_file)
+        self.write_json("results", f"{name}.json", dict(asdict(result), worker=worker, finished_at=time.time()))
+        try:
+            os.remove(os.path.join(self.folder("claimed"), claimed_file))
+        except FileNotFoundError:
+            pass
+
+    def release(self, claimed_file: str):
+        # Puts an unfinished job back in the queue
+        name, _ = self.lease_name(claimed_file)
+        try:
+            os.rename(os.path.join(self.folder("claimed"), claimed_file),
+                      os.path.join(self.folder("pending"), f"{name}.json"))
+        except FileNotFoundError:
+            pass
+
+    def requeue_expired(self, lease_timeout: float = spool_lease_timeout) -> list[str]:
+        # Jobs of workers that stopped sending heartbeats go back to pending
+        now = self.server_time()
+        requeued = []
+        for claimed_file in os.listdir(self.folder("claimed")):
+            try:
+                expired = now - os.stat(os.path.join(self.folder("claimed"), claimed_file)).st_mtime > lease_timeout
+            except FileNotFoundError:
+                continue
+            if expired:
+                self.release(claimed_file)
+                requeued.append(claimed_file)
+        return requeued
+
+    def result(self, name: str) -> ShotResult | None:
+        data = self.read_json(os.path.join(self.folder("results"), f"{name}.json"))
+        if data is None:
+            return None
+        data.pop("worker", None)
+        data.pop("finished_at", None)
+        return ShotResult(**data)
+
+    def status(self) -> dict:
+        return {folder: len(os.listdir(self.folder(folder))) for folder in ("pending", "claimed", "results")}
+
+    def wait(self, names: list[str], on_result=None, poll_interval: float = spool_poll_interval,
+             timeout: float = None) -> list[ShotResult]:
+        remaining = list(names)
+        results = []
+        deadline = time.monotonic() + timeout if timeout else None
+        while remaining:
+            for name in list(remaining):
+                result = self.result(name)
+                if result is None:
+                    continue
+                remaining.remove(name)
+                results.append(result)
+                if on_result:
+                    on_result(result)
+            if remaining:
+                if deadline and time.monotonic() > deadline:
+                    break
+                time.sleep(poll_interval)
+        return results
+
+
+class SpoolWorker:
+    def __init__(self, queue: SpoolQueue, executor: ShotExecutor, lease_timeout: float = spool_lease_timeout,
+                 heartbeat_interval: float = spool_heartbeat_interval, poll_interval: float = spool_poll_interval):
+        self.queue = queue
+        self.executor = executor
+        self.lease_timeout = lease_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.worker = SpoolQueue.worker_id()
+        self._claims = {}  # shot_file -> (claimed file, lighting file)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._last_scan_time = 0.0
+        self._last_requeue_time = 0.0
+
+    def requeue_expired(self):
+        # Throttled to once per heartbeat interval, also runs while the executor keeps feeding from the spool
+        if time.monotonic() - self._last_requeue_time < self.heartbeat_interval:
+            return
+        self._last_requeue_time = time.monotonic()
+        for claimed_file in self.queue.requeue_expired(self.lease_timeout):
+            print(f"[SPOOL] Requeued expired lease {claimed_file}")
+
+    def claim(self, limit: int) -> list[ShotJob]:
+        # Scanning the spool is throttled, the executor asks for work on every poll
+        if time.monotonic() - self._last_scan_time < self.poll_interval:
+            return []
+        self._last_scan_time = time.monotonic()
+        self.requeue_expired()
+        jobs = []
+        for claimed_file, job in self.queue.claim(self.worker, limit):
+            with self._lock:
+                self._claims[job.shot_file] = (claimed_file, job.lighting_file)
+            print(f"[SPOOL] {self.worker} claimed {job.shot_file}")
+            jobs.append(job)
+        return jobs
+
+    def on_result(self, result: ShotResult):
+        with self._lock:
+            claim = self._claims.pop(result.shot_file, None)
+        if claim is None:
+            # Never claimed here, or the lease was lost and another worker owns the shot now
+            return
+        claimed_file = claim[0]
+        if result.skipped and result.message == "Cancelled":
+            self.queue.release(claimed_file)
+        else:
+            self.queue.complete(claimed_file, result)
+
+    def keep_leases(self):
+        while not self._stop_event.wait(self.heartbeat_interval):
+            with self._lock:
+                claims = list(self._claims.items())
+            for shot_file, (claimed_file, lighting_file) in claims:
+                if not self.queue.heartbeat(claimed_file):
+                    # The job went back to the queue, building on would race the next owner for the lighting file.
+                    # A claim already gone was completed in the meantime
+                    with self._lock:
+                        if self._claims.get(shot_file) != (claimed_file, lighting_file):
+                            continue
+                        del self._claims[shot_file]
+                    print(f"[WARNING] Lease lost for {shot_file}, the shot is discarded")
+                    self.executor.discard(lighting_file)
+
+    def stop(self):
+        self._stop_event.set()
+        self.executor.cancel()
+
+    def run(self, idle_exit: float = None) -> list[ShotResult]:
+        # Builds spooled shots until stopped, or until the spool stayed empty for idle_exit seconds
+        results = []
+        heartbeat_thread = threading.Thread(target=self.keep_leases, daemon=True)
+        heartbeat_thread.start()
+        idle_since = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                self._last_scan_time = 0.0
+                jobs = self.claim(self.executor.max_workers)
+                if not jobs:
+                    if idle_exit is not None and time.monotonic() - idle_since > idle_exit:
+                        break
+                    self._stop_event.wait(self.poll_interval)
+                    continue
+                results.extend(self.executor.run(jobs, on_result=self.on_result, feed=self.claim))
+                idle_since = time.monotonic()
+        finally:
+            self._stop_event.set()
+            heartbeat_thread.join()
+            with self._lock:
+                claims = list(self._claims.values())
+                self._claims.clear()
+            for claimed_file, _ in claims:
+                self.queue.release(claimed_file)
+        return results
@@ -26,6 +26,18 @@ class Ui_Form(object):
         self.pushButton_generate = QtWidgets.QPushButton(parent=Form)
         self.pushButton_generate.setObjectName("pushButton_generate")
         self.gridLayout_generate.addWidget(self.pushButton_generate, 1, 0, 1, 2)
+        self.progressBar_generate = QtWidgets.QProgressBar(parent=Form)
+        self.progressBar_generate.setProperty("value", 0)
+        self.progressBar_generate.setObjectName("progressBar_generate")
+        self.gridLayout_generate.addWidget(self.progressBar_generate, 2, 0, 1, 1)
+        self.pushButton_generate_cancel = QtWidgets.QPushButton(parent=Form)
+        self.pushButton_generate_cancel.setEnabled(False)
+        self.pushButton_generate_cancel.setObjectName("pushButton_generate_cancel")
+        self.gridLayout_generate.addWidget(self.pushButton_generate_cancel, 2, 1, 1, 1)
+        self.label_generate_status = QtWidgets.QLabel(parent=Form)
+        self.label_generate_status.setText("")
+        self.label_generate_status.setObjectName("label_generate_status")
+        self.gridLayout_generate.addWidget(self.label_generate_status, 3, 0, 1, 2)
         self.gridLayout.addLayout(self.gridLayout_generate, 2, 0, 1, 1)
         self.gridLayout_data = QtWidgets.QGridLayout()
         self.gridLayout_data.setObjectName("gridLayout_data")
@@ -74,9 +86,61 @@ class Ui_Form(object):
         self.label_mastershot.setObjectName("label_mastershot")
         self.gridLayout_mastershot.addWidget(self.label_mastershot, 0, 0, 1, 2)
         self.gridLayout_data.addLayout(self.gridLayout_mastershot, 1, 1, 1, 1)
+        self.gridLayout_workers = QtWidgets.QGridLayout()
+        self.gridLayout_workers.setObjectName("gridLayout_workers")
+        self.label_workers = QtWidgets.QLabel(parent=Form)
+        self.label_workers.setObjectName("label_workers")
+        self.gridLayout_workers.addWidget(self.label_workers, 0, 0, 1, 1)
+        self.spinBox_workers = QtWidgets.QSpinBox(parent=Form)
+        self.spinBox_workers.setMinimum(1)
+        self.spinBox_workers.setObjectName("spinBox_workers")
+        self.gridLayout_workers.addWidget(self.spinBox_workers, 1, 0, 1, 1)
+        self.gridLayout_data.addLayout(self.gridLayout_workers, 2, 0, 1, 1)
+        self.gridLayout_missing = QtWidgets.QGridLayout()
+        self.gridLayout_missing.setObjectName("gridLayout_missing")
+        self.label_missing = QtWidgets.QLabel(parent=Form)
+        self.label_missing.setObjectName("label_missing")
+        self.gridLayout_missing.addWidget(self.label_missing, 0, 0, 1, 1)
+        self.comboBox_missing = QtWidgets.QComboBox(parent=Form)
+        self.comboBox_missing.setObjectName("comboBox_missing")
+        self.gridLayout_missing.addWidget(self.comboBox_missing, 1, 0, 1, 1)
+        self.gridLayout_data.addLayout(self.gridLayout_missing, 3, 0, 1, 1)
+        self.checkBox_persistent = QtWidgets.QCheckBox(parent=Form)
+        self.checkBox_persistent.setObjectName("checkBox_persistent")
+        self.gridLayout_data.addWidget(self.checkBox_persistent, 3, 1, 1, 1)
+        self.checkBox_force = QtWidgets.QCheckBox(parent=Form)
+        self.checkBox_force.setObjectName("checkBox_force")
+        self.gridLayout_data.addWidget(self.checkBox_force, 4, 1, 1, 1)
+        self.checkBox_watch = QtWidgets.QCheckBox(parent=Form)
+        self.checkBox_watch.setObjectName("checkBox_watch")
+        self.gridLayout_data.addWidget(self.checkBox_watch, 4, 0, 1, 1)
+        self.checkBox_staging = QtWidgets.QCheckBox(parent=Form)
+        self.checkBox_staging.setObjectName("checkBox_staging")
+        self.gridLayout_data.addWidget(self.checkBox_staging, 5, 0, 1, 1)
+        self.checkBox_blend_cache = QtWidgets.QCheckBox(parent=Form)
+        self.checkBox_blend_cache.setObjectName("checkBox_blend_cache")
+        self.gridLayout_data.addWidget(self.checkBox_blend_cache, 5, 1, 1, 1)
+        self.gridLayout_session = QtWidgets.QGridLayout()
+        self.gridLayout_session.setObjectName("gridLayout_session")
+        self.label_session = QtWidgets.QLabel(parent=Form)
+        self.label_session.setObjectName("label_session")
+        self.gridLayout_session.addWidget(self.label_session, 0, 0, 1, 1)
+        self.spinBox_session = QtWidgets.QSpinBox(parent=Form)
+        self.spinBox_session.setMinimum(1)
+        self.spinBox_session.setObjectName("spinBox_session")
+        self.gridLayout_session.addWidget(self.spinBox_session, 1, 0, 1, 1)
+        self.gridLayout_data.addLayout(self.gridLayout_session, 2, 1, 1, 1)
         self.gridLayout.addLayout(self.gridLayout_data, 0, 0, 1, 1)
         self.gridLayout_list = QtWidgets.QGridLayout()
         self.gridLayout_list.setObjectName("gridLayout_list")
+        self.lineEdit_filter = QtWidgets.QLineEdit(parent=Form)
+        self.lineEdit_filter.setClearButtonEnabled(True)
+        self.lineEdit_filter.setObjectName("lineEdit_filter")
+        self.gridLayout_list.addWidget(self.lineEdit_filter, 0, 0, 1, 1)
+        self.label_filter = QtWidgets.QLabel(parent=Form)
+        self.label_filter.setText("")
+        self.label_filter.setObjectName("label_filter")
+        self.gridLayout_list.addWidget(self.label_filter, 2, 0, 1, 1)
         self.gridLayout_listControl = QtWidgets.QGridLayout()
         self.gridLayout_listControl.setObjectName("gridLayout_listControl")
         self.pushButton_listControl_add = QtWidgets.QPushButton(parent=Form)
@@ -90,13 +154,21 @@ class Ui_Form(object):
         spacerItem1 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Expanding)
         self.gridLayout_listControl.addItem(spacerItem1, 0, 0, 1, 1)
         self.gridLayout_list.addLayout(self.gridLayout_listControl, 1, 1, 1, 1)
-        self.listWidget_available = QtWidgets.QListWidget(parent=Form)
-        self.listWidget_available.setObjectName("listWidget_available")
-        self.gridLayout_list.addWidget(self.listWidget_available, 1, 0, 1, 1)
-        self.listWidget_selected = QtWidgets.QListWidget(parent=Form)
-        self.listWidget_selected.setObjectName("listWidget_selected")
-        self.gridLayout_list.addWidget(self.listWidget_selected, 1, 2, 1, 1)
+        self.listView_available = QtWidgets.QListView(parent=Form)
+        self.listView_available.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.listView_available.setUniformItemSizes(True)
+        self.listView_available.setObjectName("listView_available")
+        self.gridLayout_list.addWidget(self.listView_available, 1, 0, 1, 1)
+        self.listView_selected = QtWidgets.QListView(parent=Form)
+        self.listView_selected.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.listView_selected.setUniformItemSizes(True)
+        self.listView_selected.setObjectName("listView_selected")
+        self.gridLayout_list.addWidget(self.listView_selected, 1, 2, 1, 1)
         self.gridLayout.addLayout(self.gridLayout_list, 1, 0, 1, 1)
+        self.plainTextEdit_log = QtWidgets.QPlainTextEdit(parent=Form)
+        self.plainTextEdit_log.setReadOnly(True)
+        self.plainTextEdit_log.setObjectName("plainTextEdit_log")
+        self.gridLayout.addWidget(self.plainTextEdit_log, 3, 0, 1, 1)
 
         self.retranslateUi(Form)
         QtCore.QMetaObject.connectSlotsByName(Form)
@@ -107,6 +179,7 @@ class Ui_Form(object):
         self.pushButton_generate_scan.setText(_translate("Form", "Scan"))
         self.pushButton_generate_clear.setText(_translate("Form", "Clear"))
         self.pushButton_generate.setText(_translate("Form", "Generate"))
+        self.pushButton_generate_cancel.setText(_translate("Form", "Cancel"))
         self.toolButton_csv.setText(_translate("Form", "Locate"))
         self.label_csv.setText(_translate("Form", "CSV"))
         self.toolButton_blender.setText(_translate("Form", "Locate"))
@@ -114,5 +187,18 @@ class Ui_Form(object):
         self.label_project.setText(_translate("Form", "Project"))
         self.toolButton_mastershot.setText(_translate("Form", "Locate"))
         self.label_mastershot.setText(_translate("Form", "Mastershot"))
+        self.label_workers.setText(_translate("Form", "Workers"))
+        self.label_missing.setText(_translate("Form", "Missing Animation"))
+        self.checkBox_persistent.setText(_translate("Form", "Persistent Workers"))
+        self.checkBox_force.setText(_translate("Form", "Force Rebuild"))
+        self.checkBox_watch.setToolTip(_translate("Form", "Update the shot lists when the CSV file changes"))
+        self.checkBox_watch.setText(_translate("Form", "Watch CSV"))
+        self.checkBox_staging.setToolTip(_translate("Form", "Save the lighting files to a local folder and upload them to the mount in the background"))
+        self.checkBox_staging.setText(_translate("Form", "Stage Locally"))
+        self.checkBox_blend_cache.setToolTip(_translate("Form", "Open the mastershot from a local copy instead of the mount"))
+        self.checkBox_blend_cache.setText(_translate("Form", "Cache Mastershot"))
+        self.label_session.setText(_translate("Form", "Shots per Session"))
+        self.lineEdit_filter.setToolTip(_translate("Form", "ep001 seq0010-0040 sh* frames>200 start>=1001 end<2000, or part of the file name"))
+        self.lineEdit_filter.setPlaceholderText(_translate("Form", "Filter, e.g. ep001 seq0010-0040 sh* frames>200"))
         self.pushButton_listControl_add.setText(_translate("Form", ">"))
         self.pushButton_listControl_remove.setText(_translate("Form", "<"))
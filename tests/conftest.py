@@ -0,0 +1,37 @@
+import os
+import stat
+import sys
+
+import pytest
+
+from app.services.shot_job import ShotJob
+
+FAKE_BLENDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_blender.py")
+
+
+@pytest.fixture
+def fake_blender(tmp_path) -> str:
+    # The executor starts Blender as one executable, the wrapper runs the stand-in with this interpreter
+    path = tmp_path / "blender"
+    path.write_text(f"#!/bin/sh\nexec {sys.executable} {FAKE_BLENDER} \"$@\"\n")
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+@pytest.fixture
+def started_pids(tmp_path, monkeypatch):
+    # Pids of every fake Blender started during the test, in start order
+    path = tmp_path / "pids.txt"
+    monkeypatch.setenv("FAKE_BLENDER_PIDS", str(path))
+    return lambda: [int(line) for line in path.read_text().split()] if path.exists() else []
+
+
+def make_job(folder, name: str) -> ShotJob:
+    # name goes into the animation file name, see fake_blender.py for the keywords it acts on
+    os.makedirs(folder, exist_ok=True)
+    return ShotJob(shot_file=f"{name}_lgt.blend", ep="ep001", seq="seq0010", shot=name, start_frame=1, end_frame=10,
+                   master_file=os.path.join(folder, "master.blend"),
+                   animation_file=os.path.join(folder, f"{name}_anm.blend"),
+                   lighting_file=os.path.join(folder, f"{name}_lgt.blend"),
+                   beauty_path=os.path.join(folder, "render", "beauty"),
+                   alpha_path=os.path.join(folder, "render", "alpha"))
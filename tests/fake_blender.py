@@ -0,0 +1,80 @@
+# Blender stand-in for the tests. Runs the driver part of a generated batch or worker script with a mocked bpy and a
+# build_shot that acts on keywords in the animation file name:
+#   hang    never returns          slow   sleeps FAKE_BLENDER_SLOW seconds
+#   crash   exits with code 139    fail   raises a permanent error
+#   ioerr   raises an I/O error the first time the shot is built
+# Environment:
+#   FAKE_BLENDER_PIDS        file every started process appends its pid to
+#   FAKE_BLENDER_SLOW_START  file, the first process that finds it missing creates it and never gets ready
+#   FAKE_BLENDER_NO_PONG     set to ignore pings
+#   FAKE_BLENDER_JOBS        file every job is appended to as one JSON line
+#   FAKE_BLENDER_LIBRARIES   libraries reported for a cached mastershot, separated by os.pathsep
+import json
+import os
+import sys
+import time
+import traceback
+from types import SimpleNamespace
+from unittest import mock
+
+# Everything after build_shot is the driver, the job loop of a batch script or the request loop of a worker
+FUNCTIONS_END = "    return timings\n"
+
+
+def build_shot(job: dict) -> dict:
+    started = time.perf_counter()
+    name = os.path.basename(job["animation_file"])
+    if os.environ.get("FAKE_BLENDER_JOBS"):
+        with open(os.environ["FAKE_BLENDER_JOBS"], "a") as file:
+            file.write(json.dumps(job) + "\n")
+    if job.get("master_source"):
+        libraries = [path for path in os.environ.get("FAKE_BLENDER_LIBRARIES", "").split(os.pathsep) if path]
+        print(f"[SHOT_LIBRARIES] {job['output_path']}: {json.dumps(libraries)}")
+    print(f"[INFO] Linking {job['animation_file']}")
+    if "hang" in name:
+        time.sleep(3600)
+    if "slow" in name:
+        time.sleep(float(os.environ.get("FAKE_BLENDER_SLOW", "2")))
+    if "crash" in name:
+        sys.stdout.flush()
+        os._exit(139)
+    if "ioerr" in name:
+        marker = job["output_path"] + ".ioerr"
+        if not os.path.exists(marker):
+            open(marker, "w").close()
+            raise OSError(5, "Input/output error")
+    if "fail" in name:
+        raise ValueError("No collection named 'SET'")
+    with open(job.get("save_path") or job["output_path"], "w") as file:
+        file.write(f"lighting {os.getpid()}\n")
+    return {"open_master": 0.0, "link_animation": 0.0, "total": time.perf_counter() - started}
+
+
+def requests():
+    for line in sys.stdin:
+        if os.environ.get("FAKE_BLENDER_NO_PONG") and '"ping"' in line:
+            continue
+        yield line
+
+
+def main():
+    if os.environ.get("FAKE_BLENDER_PIDS"):
+        with open(os.environ["FAKE_BLENDER_PIDS"], "a") as file:
+            file.write(f"{os.getpid()}\n")
+    slow_start = os.environ.get("FAKE_BLENDER_SLOW_START")
+    if slow_start and not os.path.exists(slow_start):
+        open(slow_start, "w").close()
+        time.sleep(3600)
+
+    with open(sys.argv[sys.argv.index("--python") + 1], "r") as file:
+        driver = file.read().split(FUNCTIONS_END, 1)[1]
+    bpy = mock.MagicMock()
+    sys.modules["bpy"] = bpy
+    fake_sys = SimpleNamespace(stdin=requests(), stdout=sys.stdout, exit=sys.exit)
+    print("Blender (fake)")
+    exec(driver, {"bpy": bpy, "sys": fake_sys, "time": time, "json": json, "traceback": traceback,
+                  "build_shot": build_shot})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+
+from app.services.blend_cache import BlendCache
+from app.services.shot_executor import ShotExecutor
+from conftest import make_job
+
+
+@pytest.fixture
+def cache(tmp_path) -> BlendCache:
+    return BlendCache(str(tmp_path / "cache"), budget=1 << 30)
+
+
+def blobs(cache: BlendCache) -> list[str]:
+    return [name for _, _, names in os.walk(os.path.join(cache.root, "blobs")) for name in names]
+
+
+def test_fetch_copies_once(cache, tmp_path):
+    source = tmp_path / "master.blend"
+    source.write_bytes(b"master")
+    local = cache.fetch(str(source))
+    assert local != str(source)
+    assert open(local, "rb").read() == b"master"
+    assert cache.fetch(str(source)) == local
+    assert len(blobs(cache)) == 1
+
+
+def test_source_changed_during_copy_leaves_no_blob(cache, tmp_path, monkeypatch):
+    source = tmp_path / "master.blend"
+    source.write_bytes(b"master")
+    copy = cache.copy
+
+    def copy_while_saved(path: str) -> str:
+        digest = copy(path)
+        source.write_bytes(b"master saved again")
+        return digest
+
+    monkeypatch.setattr(cache, "copy", copy_while_saved)
+    assert cache.fetch(str(source)) == str(source)
+    assert blobs(cache) == []
+
+
+def test_libraries_are_cached_from_the_next_run(cache, tmp_path, fake_blender, monkeypatch):
+    master, library = tmp_path / "shots" / "master.blend", tmp_path / "lib" / "set.blend"
+    library.parent.mkdir()
+    library.write_bytes(b"set")
+    jobs = [make_job(tmp_path / "shots", name) for name in ("sh0010", "sh0020")]
+    master.write_bytes(b"master")
+    monkeypatch.setenv("FAKE_BLENDER_LIBRARIES", str(library))
+    monkeypatch.setenv("FAKE_BLENDER_JOBS", str(tmp_path / "jobs.jsonl"))
+    executor = ShotExecutor(fake_blender, max_workers=1, log_dir=str(tmp_path / "logs"), poll_interval=0.05,
+                            memory_limit=1 << 50, prefetch_depth=0, blend_cache=cache)
+
+    assert all(result.success for result in executor.run(jobs[:1]))
+    assert cache.libraries(cache.fetch(str(master))) == [str(library)]
+    assert all(result.success for result in executor.run(jobs[1:]))
+
+    first, second = [json.loads(line) for line in (tmp_path / "jobs.jsonl").read_text().splitlines()]
+    assert first["master_source"] == second["master_source"] == str(master)
+    assert first["library_copies"] == {}
+    [(canonical, local)] = second["library_copies"].items()
+    assert canonical == str(library)
+    assert open(local, "rb").read() == b"set"
@@ -0,0 +1,86 @@
+import pytest
+
+from app.services import shot_executor
+from app.services.shot_executor import ShotExecutor
+from conftest import make_job
+
+
+@pytest.fixture
+def executor(fake_blender, tmp_path):
+    executor = ShotExecutor(fake_blender, max_workers=1, persistent=True, log_dir=str(tmp_path / "logs"),
+                            poll_interval=0.05, memory_limit=1 << 50, prefetch_depth=0)
+    yield executor
+    executor.shutdown(timeout=5)
+
+
+def outcome(results) -> dict:
+    return {result.shot_file: result.success for result in results}
+
+
+def test_worker_builds_shots(executor, tmp_path, started_pids):
+    jobs = [make_job(tmp_path / "shots", name) for name in ("sh0010", "sh0020", "sh0030")]
+    assert outcome(executor.run(jobs)) == {job.shot_file: True for job in jobs}
+    assert all(open(job.lighting_file).read() == f"lighting {started_pids()[0]}\n" for job in jobs)
+    assert len(started_pids()) == 1
+
+
+def test_consecutive_runs_reuse_the_workers(executor, tmp_path, started_pids):
+    # The second run builds the same shots again on the worker kept from the first one
+    jobs = [make_job(tmp_path / "shots", name) for name in ("sh0010", "sh0020")]
+    first = executor.run(jobs)
+    second = executor.run(jobs)
+    assert outcome(first) == outcome(second) == {job.shot_file: True for job in jobs}
+    assert len(started_pids()) == 1
+    assert [result.attempts for result in second] == [1, 1]
+
+
+def test_failed_shot_keeps_the_worker(executor, tmp_path, started_pids):
+    jobs = [make_job(tmp_path / "shots", name) for name in ("sh0010_fail", "sh0020")]
+    results = {result.shot_file: result for result in executor.run(jobs)}
+    assert not results["sh0010_fail_lgt.blend"].success
+    assert results["sh0010_fail_lgt.blend"].failure_class == "permanent"
+    assert "No collection named" in results["sh0010_fail_lgt.blend"].message
+    assert results["sh0020_lgt.blend"].success
+    assert len(started_pids()) == 1
+
+
+def test_crashed_worker_is_respawned(executor, tmp_path, started_pids):
+    executor.max_retries = 0
+    jobs = [make_job(tmp_path / "shots", name) for name in ("sh0010_crash", "sh0020")]
+    executor.longest_first = False
+    results = {result.shot_file: result for result in executor.run(jobs)}
+    assert not results["sh0010_crash_lgt.blend"].success
+    assert results["sh0010_crash_lgt.blend"].return_code == 139
+    assert results["sh0020_lgt.blend"].success
+    assert len(started_pids()) == 2
+
+
+def test_worker_retires_after_shots_per_session(executor, tmp_path, started_pids):
+    executor.shots_per_session = 2
+    jobs = [make_job(tmp_path / "shots", f"sh00{i}0") for i in range(1, 6)]
+    assert outcome(executor.run(jobs)) == {job.shot_file: True for job in jobs}
+    assert len(started_pids()) == 3
+    assert len({open(job.lighting_file).read() for job in jobs}) == 3
+
+
+def test_worker_that_never_gets_ready_is_replaced(executor, tmp_path, started_pids, monkeypatch):
+    monkeypatch.setattr(shot_executor, "worker_start_timeout", 0.5)
+    monkeypatch.setenv("FAKE_BLENDER_SLOW_START", str(tmp_path / "slow_start"))
+    jobs = [make_job(tmp_path / "shots", "sh0010")]
+    assert outcome(executor.run(jobs)) == {"sh0010_lgt.blend": True}
+    assert len(started_pids()) == 2
+
+
+def test_worker_that_stops_answering_pings_is_killed(executor, tmp_path, started_pids, monkeypatch):
+    # The quick shot leaves its worker idle while the slow one builds, the idle worker is pinged and never answers
+    monkeypatch.setattr(shot_executor, "worker_health_interval", 0.2)
+    monkeypatch.setattr(shot_executor, "worker_health_timeout", 0.3)
+    monkeypatch.setenv("FAKE_BLENDER_NO_PONG", "1")
+    monkeypatch.setenv("FAKE_BLENDER_SLOW", "2")
+    executor.max_workers = 2
+    jobs = [make_job(tmp_path / "shots", name) for name in ("sh0010_slow", "sh0020")]
+    lines = []
+    assert outcome(executor.run(jobs, on_log=lines.append)) == {job.shot_file: True for job in jobs}
+    assert len(started_pids()) == 2
+    assert len(executor._workers) == 1
+    assert any("Blender exited with code -9" in line for line in lines)
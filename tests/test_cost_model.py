@@ -0,0 +1,67 @@
+from dataclasses import replace
+
+import pytest
+
+from app.data.executor_config import cost_base_seconds, cost_seconds_per_mb, cost_seconds_per_frame
+from app.services.cost_model import ShotCostModel
+from app.services.job_journal import JobJournal
+from app.services.shot_executor import ShotExecutor
+from conftest import make_job
+
+DEFAULTS = (cost_base_seconds, cost_seconds_per_mb, cost_seconds_per_frame)
+MB = 1024 ** 2
+
+
+def test_fit_recovers_the_coefficients():
+    history = [(size * MB, frames, 10 + 2 * size + 0.1 * frames) for size in (1, 5, 20) for frames in (50, 200)]
+    assert ShotCostModel(history).coefficients == pytest.approx((10, 2, 0.1))
+
+
+def test_fit_keeps_the_defaults_without_enough_or_sensible_history():
+    assert ShotCostModel([(MB, 100, 30.0)] * 4).coefficients == DEFAULTS
+    # Duration falling with size would need a negative coefficient
+    history = [(size * MB, 100, 100 - size) for size in (1, 10, 20, 40, 80)]
+    assert ShotCostModel(history).coefficients == DEFAULTS
+
+
+def test_estimate_prefers_the_measured_duration(tmp_path):
+    job = make_job(tmp_path / "shots", "sh0010")
+    with open(job.animation_file, "wb") as file:
+        file.truncate(4 * MB)
+    model = ShotCostModel([])
+    assert model.estimate(job) == pytest.approx(cost_base_seconds + 4 * cost_seconds_per_mb
+                                                + 10 * cost_seconds_per_frame)
+    assert model.estimate(job, past_duration=42.0) == 42.0
+
+
+def test_order_is_longest_first(tmp_path, fake_blender):
+    executor = ShotExecutor(fake_blender, max_workers=2)
+    jobs = [replace(make_job(tmp_path / "shots", f"sh00{i}0"), end_frame=frames)
+            for i, frames in enumerate((100, 5000, 10, 800), start=1)]
+    executor.prepare(jobs)
+    assert [job.end_frame for job in executor.order(jobs)] == [5000, 800, 100, 10]
+    executor.longest_first = False
+    assert executor.order(jobs) == jobs
+
+
+def test_measured_durations_order_the_next_run(tmp_path, fake_blender, monkeypatch):
+    # The shots look the same to the model, only the durations recorded by the first run tell them apart
+    monkeypatch.setenv("FAKE_BLENDER_SLOW", "0.5")
+    journal = JobJournal(str(tmp_path / "journal.sqlite"))
+    jobs = [make_job(tmp_path / "shots", name) for name in ("sh0010", "sh0020_slow", "sh0030")]
+    executor = ShotExecutor(fake_blender, max_workers=1, log_dir=str(tmp_path / "logs"), poll_interval=0.05,
+                            memory_limit=1 << 50, prefetch_depth=0, journal=journal)
+    assert all(result.success for result in executor.run(jobs))
+
+    next_executor = ShotExecutor(fake_blender, journal=journal)
+    next_executor.prepare(jobs)
+    assert next_executor.order(jobs)[0] is jobs[1]
+    assert next_executor.estimate_cost(jobs[1]) >= 0.5
+    journal.close()
+
+
+def test_simulate_fills_the_free_slots(tmp_path):
+    jobs = [make_job(tmp_path / "shots", f"sh00{i}0") for i in range(1, 4)]
+    schedule = ShotCostModel.simulate([([jobs[0]], 10.0), ([jobs[1]], 4.0), ([jobs[2]], 3.0)], slots=2)
+    assert [(entry["slot"], entry["start"], entry["end"]) for entry in schedule] == \
+           [(0, 0.0, 10.0), (1, 0.0, 4.0), (1, 4.0, 7.0)]
@@ -0,0 +1,40 @@
+from app.services.csv_manager import CSVManager
+from app.services.shot_job import ShotRecord
+
+CSV = """EP,SEQ,SHOT,IN,OUT
+EP001,SEQ0010,SH0010,1,100
+EP001,SEQ0010,SH0020,1
+EP001,,SH0030,1,100
+
+EP001,SEQ0010,SH0040,1,ten
+EP001,SEQ0010,SH0050,100,1
+ep001 , seq0010 , sh0010 ,5,10
+EP001,SEQ0010,SH0060,1001,1001
+"""
+
+
+def test_read_records_rejects_invalid_and_duplicate_rows(tmp_path):
+    path = tmp_path / "shots.csv"
+    path.write_text(CSV)
+    errors = []
+    records = list(CSVManager.read_records(str(path), errors=errors))
+    assert records == [ShotRecord("ep001", "seq0010", "sh0010", 1, 100, 2),
+                       ShotRecord("ep001", "seq0010", "sh0060", 1001, 1001, 9)]
+    assert [line for line, _ in errors] == [3, 4, 6, 7, 8]
+    assert errors[0][1] == "expected 5 columns (EP, SEQ, SHOT, START_FRAME, END_FRAME), got 4"
+    assert errors[1][1] == "EP, SEQ and SHOT must not be empty"
+    assert errors[2][1] == "frame range '1'-'ten' is not a whole number"
+    assert errors[3][1] == "END_FRAME 1 is before START_FRAME 100"
+    assert errors[4][1] == "duplicate shot ep001 seq0010 sh0010, first defined on line 2"
+
+
+def test_cached_records_return_the_same_rows_and_errors(tmp_path):
+    path = tmp_path / "shots.csv"
+    path.write_text(CSV)
+    cache_path = str(tmp_path / "cache.sqlite")
+    expected_errors = []
+    expected = list(CSVManager.read_records(str(path), errors=expected_errors))
+    for _ in range(2):
+        errors = []
+        assert list(CSVManager.cached_records(str(path), errors=errors, cache_path=cache_path)) == expected
+        assert errors == expected_errors
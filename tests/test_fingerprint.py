@@ -0,0 +1,16 @@
+import hashlib
+
+import pytest
+
+from app.services import fingerprint
+from app.services.fingerprint import ShotFingerprint
+
+
+@pytest.mark.parametrize("size", [0, 1, 4096, 10000])
+def test_hash_file_matches_blake2b(tmp_path, monkeypatch, size):
+    # Small chunks, the last one is partial unless the size is a multiple of them
+    monkeypatch.setattr(fingerprint, "HASH_CHUNK_SIZE", 4096)
+    data = bytes(range(256)) * (size // 256) + bytes(size % 256)
+    path = tmp_path / "shot.blend"
+    path.write_bytes(data)
+    assert ShotFingerprint.hash_file(str(path), size) == hashlib.blake2b(data, digest_size=20).hexdigest()
@@ -0,0 +1,58 @@
+import pytest
+
+from app.services.job_journal import JobJournal
+from app.services.shot_executor import ShotExecutor
+from conftest import make_job
+
+
+@pytest.fixture
+def journal(tmp_path) -> JobJournal:
+    journal = JobJournal(str(tmp_path / "journal.sqlite"))
+    yield journal
+    journal.close()
+
+
+def test_resume_runs_every_job_that_is_not_done(journal, tmp_path):
+    jobs = [make_job(tmp_path / "shots", f"sh00{i}0") for i in range(1, 6)]
+    run_id = journal.start_run("label", jobs)
+    for job, state in zip(jobs, ["done", "running", "failed", "done", "queued"]):
+        journal.mark(run_id, job.lighting_file, state)
+
+    resumed, done = journal.resume_jobs(run_id)
+    assert done == 2
+    assert resumed == [jobs[1], jobs[2], jobs[4]]
+    assert journal.job_states(run_id) == {jobs[0].lighting_file: "done", jobs[1].lighting_file: "queued",
+                                          jobs[2].lighting_file: "queued", jobs[3].lighting_file: "done",
+                                          jobs[4].lighting_file: "queued"}
+    assert journal.unfinished_run("label") == run_id
+
+
+def test_only_interrupted_runs_are_offered(journal, tmp_path):
+    jobs = [make_job(tmp_path / "shots", "sh0010")]
+    cancelled = journal.start_run("label", jobs)
+    journal.finish_run(cancelled, "cancelled")
+    assert journal.unfinished_run("label") == cancelled
+    running = journal.start_run("label", jobs)
+    assert journal.unfinished_run("label") == running
+    journal.finish_run(running, "abandoned")
+    journal.finish_run(cancelled, "finished")
+    assert journal.unfinished_run("label") is None
+    assert journal.unfinished_run("other") is None
+
+
+def test_run_records_the_state_of_every_shot(journal, tmp_path, fake_blender):
+    executor = ShotExecutor(fake_blender, max_workers=1, log_dir=str(tmp_path / "logs"), poll_interval=0.05,
+                            memory_limit=1 << 50, prefetch_depth=0, journal=journal)
+    jobs = [make_job(tmp_path / "shots", name) for name in ("sh0010", "sh0020_fail")]
+    run_id = journal.start_run("label", jobs)
+    executor.run(jobs, run_id=run_id)
+    assert journal.job_states(run_id) == {jobs[0].lighting_file: "done", jobs[1].lighting_file: "failed"}
+    assert journal.unfinished_run("label") is None
+    assert journal.resume_jobs(run_id) == ([jobs[1]], 1)
+
+
+def test_shot_stats_keep_the_last_known_peak_memory(journal):
+    journal.record_shot("/out/sh0010_lgt.blend", "sh0010_lgt.blend", 2 << 30, 12.0, 100, 1 << 20)
+    journal.record_shot("/out/sh0010_lgt.blend", "sh0010_lgt.blend", 0, 10.0, 100, 1 << 20)
+    assert journal.shot_stats(["/out/sh0010_lgt.blend", "/out/other"]) == {"/out/sh0010_lgt.blend": (2 << 30, 10.0)}
+    assert journal.shot_history() == [(1 << 20, 100, 10.0)]
@@ -0,0 +1,75 @@
+import sys
+from unittest import mock
+
+import pytest
+
+from app.data.project import project_list, division_list, project_path_layouts
+from app.services.file_manager import FileManager
+from app.services.path_template import PathTemplate, PathLayout
+
+COMPOSITOR_SCRIPT = "app/data/raw/compositor_generator_v003.py"
+
+
+def test_render_and_parse_round_trip():
+    template = PathTemplate.compile("/mnt/{drive}/{ep}/{ep}_{seq}/{code}_{ep}_{seq}_{shot}.{extension}")
+    path = template.render(drive="J", ep="ep001", seq="sq0010", shot="sh0010", code="jgt", extension="blend")
+    assert path == "/mnt/J/ep001/ep001_sq0010/jgt_ep001_sq0010_sh0010.blend"
+    assert template.parse(path) == {"drive": "J", "ep": "ep001", "seq": "sq0010", "code": "jgt",
+                                    "shot": "sh0010", "extension": "blend"}
+    # A field used twice has to hold the same value both times
+    assert template.parse("/mnt/J/ep001/ep002_sq0010/jgt_ep001_sq0010_sh0010.blend") is None
+
+
+def test_bind_and_prefix_keep_literal_braces():
+    template = PathTemplate.compile("{{x}}/{code}_{ep}_{seq}_{shot}_{division}.{extension}")
+    assert template.bind(code="jgt").render(ep="a", seq="b", shot="c", division="lgt", extension="blend") == \
+           "{x}/jgt_a_b_c_lgt.blend"
+    assert template.prefix("shot").template == "{{x}}/{code}_{ep}_{seq}_{shot}"
+
+
+@pytest.mark.parametrize("template", ["{ep!r}", "{ep:>4}", "{ep.real}", "{ep[0]}", "{1}"])
+def test_only_plain_fields_are_accepted(template):
+    with pytest.raises(ValueError):
+        PathTemplate(template)
+
+
+@pytest.mark.parametrize("override", [{}, {"shot_folder": "{root}/{phase}/{folder}/{ep}/{seq}/{shot}"}],
+                         ids=["default", "override"])
+def test_layout_matches_file_manager(monkeypatch, override):
+    project, division = project_list[0], division_list[1]
+    monkeypatch.setitem(project_path_layouts, project[2], override)
+    PathLayout.cached.cache_clear()
+    layout = PathLayout.of(project)
+    path = layout.shot_paths[division[0]].render(ep="ep001", seq="sq0010", shot="sh0010")
+    folder = FileManager.generate_shot_path(project_code=project[2],
+                                            project_path=FileManager.get_project_path(project[0]),
+                                            production=division[2], division=division[3], ep="ep001",
+                                            seq="sq0010", shot="sh0010")
+    PathLayout.cached.cache_clear()
+    assert path == f"{folder}/{layout.shot_names[division[0]].render(ep='ep001', seq='sq0010', shot='sh0010')}"
+    assert layout.parse_shot(path) == ("ep001", "sq0010", "sh0010")
+
+
+@pytest.fixture
+def compositor(monkeypatch):
+    bpy = mock.MagicMock()
+    monkeypatch.setitem(sys.modules, "bpy", bpy)
+    namespace = {}
+    with open(COMPOSITOR_SCRIPT, "r") as file:
+        exec(compile(file.read(), COMPOSITOR_SCRIPT, "exec"), namespace)
+    return namespace, bpy
+
+
+def test_compositor_tables_are_current(compositor):
+    assert compositor[0]["PATH_TABLES"] == PathLayout.script_tables()
+
+
+def test_compositor_reads_working_file_names(compositor):
+    namespace, bpy = compositor
+    bpy.data.filepath = "/mnt/J/work/jgt_ep001_seq0010_sh0010_lgt_v002.blend"
+    assert namespace["parse_shot_path"](bpy.data.filepath) == ("jgt", "ep001", "seq0010", "sh0010")
+    assert namespace["gen_ouput_path"]("beauty") == \
+           "/mnt/K/ep001/ep001_seq0010/ep001_seq0010_sh0010/exr/beauty/jgt_ep001_seq0010_sh0010_beauty_####"
+    bpy.data.filepath = "/mnt/J/work/untitled.blend"
+    with pytest.raises(ValueError):
+        namespace["gen_ouput_path"]("beauty")
@@ -0,0 +1,81 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import resource_monitor
+from app.services.resource_monitor import ResourceMonitor
+from app.services.shot_executor import ShotExecutor
+from conftest import make_job
+
+pytestmark = pytest.mark.skipif(not ResourceMonitor().available, reason="needs /proc")
+
+
+def session(rss: int = 0, predicted_memory: int = 0, cpu: float = 0.0, process=None, current_shot=None):
+    return SimpleNamespace(rss=rss, predicted_memory=predicted_memory, cpu=cpu, process=process, cpu_time=0.0,
+                           current_shot=current_shot, shot_peaks={})
+
+
+def test_memory_cap_gates_new_sessions():
+    monitor = ResourceMonitor(memory_limit=1000, cpu_limit=1.0)
+    # A single shot may always start, even when it is larger than the limit
+    assert monitor.can_start([], 5000)
+    running = [session(rss=400), session(predicted_memory=300)]
+    assert monitor.can_start(running, 300)
+    assert not monitor.can_start(running, 301)
+    # Whichever is larger counts, the measured size or the prediction for the shot
+    assert not monitor.can_start([session(rss=100, predicted_memory=900)], 200)
+
+
+def test_cpu_capacity_and_swapping_gate_new_sessions(monkeypatch):
+    monitor = ResourceMonitor(memory_limit=1 << 40, cpu_limit=1.0)
+    assert not monitor.can_start([session(cpu=monitor.cpu_capacity)], 0)
+    assert monitor.can_start([session(cpu=monitor.cpu_capacity - 0.5)], 0)
+
+    pages = iter([0, 1 << 30])
+    monkeypatch.setattr(ResourceMonitor, "swapped_pages", staticmethod(lambda: next(pages)))
+    assert not monitor.sample([])
+    time.sleep(0.01)
+    assert monitor.sample([])
+    assert monitor.swapping
+    assert not monitor.can_start([session()], 0)
+    monitor.swapping_until = 0.0
+    assert monitor.can_start([session()], 0)
+
+
+def test_sample_measures_the_session_and_its_shot_peak():
+    # The child belongs to the session of the parent, both are summed
+    process = subprocess.Popen([sys.executable, "-c", "import subprocess, sys, time; "
+                                "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']); "
+                                "time.sleep(30)"], start_new_session=True)
+    try:
+        time.sleep(0.5)
+        monitor = ResourceMonitor(memory_limit=1 << 40)
+        running = session(process=process, current_shot="/out/sh0010_lgt.blend")
+        monitor.sample([running])
+        own = ResourceMonitor.session_usage({process.pid})[process.pid][0]
+        assert running.rss >= own > 0
+        assert running.shot_peaks["/out/sh0010_lgt.blend"] == running.rss
+    finally:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+def test_executor_waits_for_memory_before_starting_another_blender(tmp_path, fake_blender, monkeypatch):
+    monkeypatch.setenv("FAKE_BLENDER_SLOW", "1")
+    monkeypatch.setattr(resource_monitor, "swap_pages_per_second", float("inf"))
+    jobs = [make_job(tmp_path / "shots", name) for name in ("sh0010_slow", "sh0020_slow")]
+    durations = {}
+    for memory_limit in (1, 1 << 50):
+        executor = ShotExecutor(fake_blender, max_workers=2, shots_per_session=1, log_dir=str(tmp_path / "logs"),
+                                poll_interval=0.05, memory_limit=memory_limit, prefetch_depth=0)
+        started = time.monotonic()
+        assert all(result.success for result in executor.run(jobs))
+        durations[memory_limit] = time.monotonic() - started
+    # Under a tiny limit the second shot waits for the first one, otherwise both build at once
+    assert durations[1] >= 2
+    assert durations[1] > durations[1 << 50] + 0.5
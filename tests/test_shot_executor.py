@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+
+from app.services import shot_executor
+from app.services.job_journal import JobJournal
+from app.services.shot_executor import ShotExecutor
+from conftest import make_job
+
+
+@pytest.fixture(autouse=True)
+def short_backoff(monkeypatch):
+    monkeypatch.setattr(shot_executor, "retry_backoff", 0.1)
+
+
+@pytest.fixture(params=[False, True], ids=["batch", "persistent"])
+def executor(request, fake_blender, tmp_path):
+    executor = ShotExecutor(fake_blender, max_workers=1, persistent=request.param, log_dir=str(tmp_path / "logs"),
+                            poll_interval=0.05, memory_limit=1 << 50, prefetch_depth=0,
+                            journal=JobJournal(str(tmp_path / "journal.sqlite")))
+    yield executor
+    executor.shutdown(timeout=5)
+
+
+def test_transient_failure_is_retried(executor, tmp_path):
+    # The retry goes back to the worker that reported the failure, its result has to be picked up
+    job = make_job(tmp_path / "shots", "sh0010_ioerr")
+    run_id = executor.journal.start_run("test", [job])
+    lines = []
+    results = executor.run([job], on_log=lines.append, run_id=run_id)
+    assert len(results) == 1
+    assert results[0].success
+    assert results[0].attempts == 2
+    assert any(line.startswith("[RETRY] sh0010_ioerr_lgt.blend") for line in lines)
+    assert executor.journal.job_states(run_id) == {job.lighting_file: "done"}
+
+
+def test_permanent_failure_is_not_retried(executor, tmp_path):
+    job = make_job(tmp_path / "shots", "sh0010_fail")
+    results = executor.run([job])
+    assert [(result.success, result.attempts, result.failure_class) for result in results] == \
+           [(False, 1, "permanent")]
+
+
+def test_hung_shot_times_out(executor, tmp_path):
+    executor.job_timeout = 0.5
+    executor.max_retries = 0
+    jobs = [make_job(tmp_path / "shots", name) for name in ("sh0010_hang", "sh0020")]
+    results = {result.shot_file: result for result in executor.run(jobs)}
+    assert results["sh0010_hang_lgt.blend"].message == "Timed out after 0.5s"
+    assert results["sh0010_hang_lgt.blend"].failure_class == "transient"
+    assert results["sh0020_lgt.blend"].success
+
+
+def test_runs_in_the_same_second_log_to_their_own_folders(tmp_path, fake_blender, monkeypatch):
+    monkeypatch.setattr(shot_executor, "log_root", str(tmp_path / "logs"))
+    executor = ShotExecutor(fake_blender)
+    folders = [executor.run_log_dir() for _ in range(3)]
+    assert len(set(folders)) == 3
+    assert all(os.path.isdir(folder) for folder in folders)
+
+
+def test_built_shots_keep_a_clean_exit_code(tmp_path, fake_blender):
+    # One batch session builds all three shots, its exit code belongs to the shots that did not finish
+    executor = ShotExecutor(fake_blender, max_workers=1, shots_per_session=3, log_dir=str(tmp_path / "logs"),
+                            poll_interval=0.05, memory_limit=1 << 50, prefetch_depth=0, longest_first=False)
+    executor.max_retries = 0
+    jobs = [make_job(tmp_path / "shots", name) for name in ("sh0010", "sh0020_fail", "sh0030_crash")]
+    results = {result.shot_file: result for result in executor.run(jobs)}
+    assert results["sh0010_lgt.blend"].success
+    assert results["sh0010_lgt.blend"].return_code == 0
+    assert results["sh0020_fail_lgt.blend"].return_code == 139
+    assert results["sh0030_crash_lgt.blend"].return_code == 139
+
+
+def test_cancel_before_the_run_is_kept(executor, tmp_path, started_pids):
+    executor.cancel()
+    jobs = [make_job(tmp_path / "shots", name) for name in ("sh0010", "sh0020")]
+    assert [(result.skipped, result.message) for result in executor.run(jobs)] == [(True, "Cancelled")] * 2
+    assert started_pids() == []
+
+    executor.reset_cancel()
+    assert all(result.success for result in executor.run(jobs))
+
+
+def test_shots_a_crashed_session_never_started_keep_their_order(tmp_path, fake_blender, monkeypatch):
+    monkeypatch.setenv("FAKE_BLENDER_JOBS", str(tmp_path / "jobs.jsonl"))
+    executor = ShotExecutor(fake_blender, max_workers=1, shots_per_session=4, log_dir=str(tmp_path / "logs"),
+                            poll_interval=0.05, memory_limit=1 << 50, prefetch_depth=0, longest_first=False)
+    executor.max_retries = 0
+    jobs = [make_job(tmp_path / "shots", name) for name in ("sh0010_crash", "sh0020", "sh0030", "sh0040")]
+    executor.run(jobs)
+    built = [json.loads(line)["output_path"] for line in (tmp_path / "jobs.jsonl").read_text().splitlines()]
+    assert built == [job.lighting_file for job in jobs]
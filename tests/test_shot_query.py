@@ -0,0 +1,35 @@
+import pytest
+
+from app.services.shot_index import ShotIndex
+from app.services.shot_job import ShotRecord
+from app.services.shot_query import ShotQuery
+
+
+@pytest.fixture
+def query() -> ShotQuery:
+    records = [ShotRecord("ep001", "seq0010", "sh0010", 1, 100, 2),
+               ShotRecord("ep001", "seq0020", "sh0020", 1, 300, 3),
+               ShotRecord("ep002", "sq0030", "sh0010", 1001, 1050, 4)]
+    return ShotQuery(ShotIndex("jgt", records))
+
+
+def shots(query: ShotQuery, text: str) -> set[tuple[str, str]]:
+    return {(name.split("_")[2], name.split("_")[3]) for name in query.match(text)}
+
+
+def test_field_numbers_ignore_zeros_and_spelling(query):
+    assert shots(query, "seq10") == {("seq0010", "sh0010")}
+    assert shots(query, "sq30") == {("sq0030", "sh0010")}
+    assert shots(query, "seq0010-0020 sh20") == {("seq0020", "sh0020")}
+
+
+@pytest.mark.parametrize("text", ["sq00*", "seq00*", "sq00?0", "seq00[123]0"])
+def test_wildcards_ignore_the_prefix_spelling(query, text):
+    assert shots(query, text) == {("seq0010", "sh0010"), ("seq0020", "sh0020"), ("sq0030", "sh0010")}
+
+
+def test_wildcards_and_frames(query):
+    assert query.match("sq*") is None
+    assert shots(query, "sq*20") == {("seq0020", "sh0020")}
+    assert shots(query, "ep001 frames>200") == {("seq0020", "sh0020")}
+    assert shots(query, "start>=1001") == {("sq0030", "sh0010")}
@@ -0,0 +1,38 @@
+import gc
+import os
+
+import pytest
+
+from app.services.shot_status import StatCache
+
+
+def test_stat_cache_matches_os_stat(tmp_path):
+    path = tmp_path / "file.blend"
+    path.write_bytes(b"x" * 10)
+    cache = StatCache()
+    stat = cache.stat(str(path))
+    assert (stat.st_size, stat.st_mtime_ns) == (10, os.stat(path).st_mtime_ns)
+    assert cache.exists(str(path))
+    with pytest.raises(FileNotFoundError):
+        cache.stat(str(tmp_path / "missing.blend"))
+    assert not cache.exists(str(tmp_path / "missing.blend"))
+
+
+def test_stat_cache_reuses_entries_until_the_ttl(tmp_path):
+    path = tmp_path / "file.blend"
+    cache = StatCache(ttl=60)
+    assert not cache.exists(str(path))
+    path.touch()
+    assert not cache.exists(str(path))
+    cache.clear()
+    assert cache.exists(str(path))
+
+
+def test_stat_cache_entries_are_not_tracked_by_the_collector(tmp_path):
+    # A full collection must not walk one object per cached path
+    (tmp_path / "file.blend").touch()
+    cache = StatCache()
+    cache.exists(str(tmp_path / "file.blend"))
+    cache.exists(str(tmp_path / "missing.blend"))
+    gc.collect()
+    assert not any(gc.is_tracked(entry) for entry in cache._entries.values())
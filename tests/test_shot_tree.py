@@ -0,0 +1,50 @@
+import os
+
+from app.services.file_manager import FileManager
+from app.services.shot_tree import ShotTree
+
+
+def make_tree(tmp_path) -> tuple[ShotTree, str]:
+    root = tmp_path / "lighting"
+    (root / "ep001" / "seq0010" / "sh0010").mkdir(parents=True)
+    tree = ShotTree("jgt", path=str(tmp_path / "shot_tree.sqlite"))
+    tree.roots = [str(root)]
+    tree.refresh(max_workers=1)
+    return tree, str(root / "ep001" / "seq0010" / "sh0010")
+
+
+def test_refresh_shots_picks_up_new_files(tmp_path):
+    tree, shot_folder = make_tree(tmp_path)
+    lighting_file = os.path.join(shot_folder, "sh0010_lgt.blend")
+    assert tree.exists(lighting_file) is False
+    open(lighting_file, "w").close()
+    os.utime(shot_folder, ns=(0, 0))
+    assert tree.refresh_shots([shot_folder]) == 1
+    assert tree.exists(lighting_file) is True
+
+
+def test_shot_folders_are_asked_from_the_file_system_during_a_full_refresh(tmp_path, monkeypatch):
+    tree, shot_folder = make_tree(tmp_path)
+    monkeypatch.setattr(FileManager, "shot_tree", tree)
+    lighting_file = os.path.join(shot_folder, "sh0010_lgt.blend")
+    open(lighting_file, "w").close()
+
+    # The status sweep holds the lock, the folders cannot be checked and the index is not trusted for them
+    with tree._lock:
+        assert tree.refresh_shots([shot_folder]) == 0
+        assert tree.exists(lighting_file) is None
+        assert tree.list_dir(shot_folder) is None
+        assert FileManager.exists(lighting_file)
+        assert FileManager.list_dir(shot_folder) == ["sh0010_lgt.blend"]
+
+    tree.refresh(max_workers=1)
+    assert tree.exists(lighting_file) is True
+    assert not tree._bypassed
+
+
+def test_bypass_outlives_a_refresh_that_started_before_it(tmp_path):
+    tree, shot_folder = make_tree(tmp_path)
+    count = tree._bypass_count
+    tree.bypass([shot_folder])
+    tree.checked(before=count)
+    assert tree.exists(os.path.join(shot_folder, "sh0010_lgt.blend")) is None
@@ -0,0 +1,93 @@
+import errno
+import os
+import time
+
+import pytest
+
+from app.services import shot_uploader
+from app.services.shot_executor import ShotExecutor
+from app.services.shot_uploader import BandwidthLimiter, ShotUploader
+from conftest import make_job
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(shot_uploader, "retry_backoff", 0)
+
+
+@pytest.fixture
+def staged(tmp_path) -> str:
+    path = tmp_path / "staging" / "sh0010_lgt.blend"
+    path.parent.mkdir()
+    path.write_bytes(os.urandom(100_000))
+    return str(path)
+
+
+def leftovers(folder) -> list[str]:
+    return [name for name in os.listdir(folder) if ".upload-" in name]
+
+
+def test_upload_moves_the_staged_file(tmp_path, staged):
+    content = open(staged, "rb").read()
+    destination = tmp_path / "sh0010_lgt.blend"
+    uploader = ShotUploader(max_workers=2)
+    uploader.submit(staged, str(destination)).result()
+    uploader.shutdown()
+    assert destination.read_bytes() == content
+    assert not os.path.exists(staged)
+    assert leftovers(tmp_path) == []
+
+
+def test_failed_copy_is_retried(tmp_path, staged, monkeypatch):
+    attempts = []
+    copy_verified = ShotUploader.copy_verified
+
+    def flaky(self, source, destination):
+        attempts.append(destination)
+        if len(attempts) == 1:
+            raise OSError(errno.EIO, "Input/output error")
+        copy_verified(self, source, destination)
+
+    monkeypatch.setattr(ShotUploader, "copy_verified", flaky)
+    ShotUploader(retries=2).upload(staged, str(tmp_path / "sh0010_lgt.blend"))
+    assert len(attempts) == 2
+    assert (tmp_path / "sh0010_lgt.blend").exists()
+    assert not os.path.exists(staged)
+
+
+def test_upload_that_keeps_failing_leaves_the_staged_file(tmp_path, staged, monkeypatch):
+    # Every attempt reads back a different checksum
+    monkeypatch.setattr(shot_uploader.ShotFingerprint, "hash_file", staticmethod(lambda path, size: "corrupt"))
+    uploader = ShotUploader(retries=2)
+    with pytest.raises(OSError) as error:
+        uploader.upload(staged, str(tmp_path / "sh0010_lgt.blend"))
+    assert error.value.errno == errno.EIO
+    assert os.path.exists(staged)
+    assert not (tmp_path / "sh0010_lgt.blend").exists()
+    assert leftovers(tmp_path) == []
+
+
+def test_bandwidth_limit_is_shared():
+    limiter = BandwidthLimiter(bytes_per_second=1000)
+    started = time.monotonic()
+    for _ in range(3):
+        limiter.consume(100)
+    assert time.monotonic() - started >= 0.29
+    BandwidthLimiter(0).consume(1 << 30)
+
+
+def test_failed_upload_fails_the_shot(tmp_path, fake_blender, monkeypatch):
+    def unreachable(self, source, destination):
+        raise OSError(errno.EHOSTDOWN, "Host is down")
+
+    monkeypatch.setattr(ShotUploader, "copy_verified", unreachable)
+    executor = ShotExecutor(fake_blender, max_workers=1, log_dir=str(tmp_path / "logs"), poll_interval=0.05,
+                            memory_limit=1 << 50, prefetch_depth=0, staging_dir=str(tmp_path / "staging"))
+    job = make_job(tmp_path / "shots", "sh0010")
+    staged_path = executor.staged_path(job)
+    [result] = executor.run([job])
+    assert not result.success
+    assert result.message == f"Upload failed: {OSError(errno.EHOSTDOWN, 'Host is down')}"
+    assert result.failure_class == "permanent"
+    assert os.path.exists(staged_path)
+    assert not os.path.exists(job.lighting_file)
@@ -0,0 +1,111 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from app.services.shot_executor import ShotExecutor
+from app.services.spool_queue import SpoolQueue, SpoolWorker
+from conftest import make_job
+
+
+def wait_until(condition, timeout: float = 30, interval: float = 0.05):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(interval)
+
+
+def claimed_files(queue: SpoolQueue, name: str) -> list[str]:
+    return [file_name for file_name in os.listdir(queue.folder("claimed")) if file_name.startswith(name + "@")]
+
+
+def test_claim_requeues_expired_leases(tmp_path, fake_blender):
+    # A worker that never goes idle still gives the leases of dead workers back to the queue
+    queue = SpoolQueue(str(tmp_path / "spool"))
+    queue.submit([make_job(tmp_path / "shots", "sh0010")])
+    [(claimed_file, _)] = queue.claim("deadhost.1", 1)
+    expired = time.time() - 60
+    os.utime(os.path.join(queue.folder("claimed"), claimed_file), (expired, expired))
+
+    worker = SpoolWorker(queue, ShotExecutor(fake_blender), lease_timeout=10, heartbeat_interval=1,
+                         poll_interval=0)
+    assert [job.shot_file for job in worker.claim(1)] == ["sh0010_lgt.blend"]
+    assert claimed_files(queue, "sh0010_lgt") == [f"sh0010_lgt@{worker.worker}.json"]
+
+
+def test_lost_lease_discards_the_shot(tmp_path, fake_blender, monkeypatch):
+    monkeypatch.setenv("FAKE_BLENDER_SLOW", "60")
+    queue = SpoolQueue(str(tmp_path / "spool"))
+    slow_job, quick_job = make_job(tmp_path / "shots", "sh0010_slow"), make_job(tmp_path / "shots", "sh0020")
+    queue.submit([slow_job, quick_job])
+    executor = ShotExecutor(fake_blender, max_workers=2, log_dir=str(tmp_path / "logs"), poll_interval=0.05,
+                            memory_limit=1 << 50, prefetch_depth=0)
+    worker = SpoolWorker(queue, executor, lease_timeout=60, heartbeat_interval=0.2, poll_interval=0.1)
+    results = []
+    thread = threading.Thread(target=lambda: results.extend(worker.run(idle_exit=0.5)))
+    started = time.monotonic()
+    thread.start()
+
+    # Another host requeues the lease and claims the shot while this worker builds it
+    wait_until(lambda: claimed_files(queue, "sh0010_slow_lgt") and os.path.exists(quick_job.lighting_file))
+    [claimed_file] = claimed_files(queue, "sh0010_slow_lgt")
+    queue.release(claimed_file)
+    assert [job.shot_file for _, job in queue.claim("otherhost.1", 1)] == ["sh0010_slow_lgt.blend"]
+    thread.join(timeout=30)
+
+    assert not thread.is_alive()
+    assert time.monotonic() - started < 30
+    assert {(result.shot_file, result.skipped, result.message) for result in results if not result.success} == \
+           {("sh0010_slow_lgt.blend", True, "Discarded")}
+    assert queue.result("sh0010_slow_lgt") is None
+    assert queue.result("sh0020_lgt").success
+    assert claimed_files(queue, "sh0010_slow_lgt") == ["sh0010_slow_lgt@otherhost.1.json"]
+    assert not os.path.exists(slow_job.lighting_file)
+
+
+def start_worker(tmp_path, fake_blender: str, name: str, slow: str) -> subprocess.Popen:
+    env = dict(os.environ, FAKE_BLENDER_SLOW=slow, FAKE_BLENDER_PIDS=str(tmp_path / f"{name}.pids"))
+    command = [sys.executable, "-m", "app.cli", "spool-worker", "--spool", str(tmp_path / "spool"),
+               "--blender", fake_blender, "--workers", "1", "--journal", str(tmp_path / f"{name}.sqlite"),
+               "--log-dir", str(tmp_path / "logs"), "--prefetch", "0", "--lease-timeout", "2",
+               "--heartbeat-interval", "0.3", "--poll-interval", "0.1", "--idle-exit", "3"]
+    with open(tmp_path / f"{name}.log", "w") as log_file:
+        return subprocess.Popen(command, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_workers_take_over_the_shots_of_a_killed_worker(tmp_path, fake_blender):
+    queue = SpoolQueue(str(tmp_path / "spool"))
+    queue.submit([make_job(tmp_path / "shots", "sh0010_slow")])
+
+    # The first worker claims the shot and dies with its Blender while building it
+    first = start_worker(tmp_path, fake_blender, "first", slow="3600")
+    try:
+        wait_until(lambda: claimed_files(queue, "sh0010_slow_lgt") and (tmp_path / "first.pids").exists())
+        assert claimed_files(queue, "sh0010_slow_lgt")[0].endswith(f".{first.pid}.json")
+    finally:
+        first.kill()
+        first.wait()
+        wait_until(lambda: (tmp_path / "first.pids").read_text().strip())
+        for pid in (tmp_path / "first.pids").read_text().split():
+            try:
+                os.killpg(int(pid), signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    names = ["sh0010_slow_lgt"] + queue.submit([make_job(tmp_path / "shots", f"sh00{i}0") for i in range(2, 8)])
+    workers = [start_worker(tmp_path, fake_blender, name, slow="0") for name in ("second", "third")]
+    try:
+        results = queue.wait(names, poll_interval=0.1, timeout=60)
+    finally:
+        for worker in workers:
+            worker.wait(timeout=30)
+
+    assert sorted(result.shot_file for result in results if result.success) == sorted(f"{n}.blend" for n in names)
+    with open(os.path.join(queue.folder("results"), "sh0010_slow_lgt.json"), "r") as file:
+        assert not json.load(file)["worker"].endswith(f".{first.pid}")
+    assert [worker.returncode for worker in workers] == [0, 0]
+    assert queue.status() == {"pending": 0, "claimed": 0, "results": 7}